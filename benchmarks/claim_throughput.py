@@ -0,0 +1,84 @@
+# Measures configuration files claimed/s by concurrent claimers, and checks that no file is claimed twice.
+# Usage: python -m benchmarks.claim_throughput --configurations 5000 --threads 1 8 32 --count 1 10
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("SQLALCHEMY_DATABASE_URI", "sqlite://")
+
+from src import Constants  # noqa: E402
+from src.configuration_file_gateway import JsonConfigurationFileGateway  # noqa: E402
+from src.models import ConfigurationFileFactory  # noqa: E402
+from src.utils.data_validators import ParserFactory  # noqa: E402
+
+
+def measure(configurations: int, threads: int, count: int, directory: str):
+    with tempfile.TemporaryDirectory(dir=directory) as configurations_directory:
+        Constants.RL_CONFIGURATIONS = configurations_directory
+        os.mkdir(f"{configurations_directory}/{Constants.RL_CONFIGURATIONS_PROCESSING_SUBDIRECTORY}")
+
+        gateway = JsonConfigurationFileGateway()
+        save_configuration_files(gateway, configurations)
+        claimed, elapsed = measure_claims(gateway, threads, count)
+
+    assert len(claimed) == len(set(claimed)), "configuration file claimed more than once"
+    assert len(claimed) == configurations, f"{configurations - len(claimed)} configuration files were not claimed"
+
+    print(f"{threads} claimers, {count} per claim: {len(claimed)} claimed in {elapsed:.3f}s "
+          f"({len(claimed) / elapsed:.0f} claims/s)")
+
+
+def save_configuration_files(gateway: JsonConfigurationFileGateway, configurations: int):
+    parser_factory = ParserFactory()
+    configuration_files = []
+
+    for i in range(configurations):
+        configuration_file = ConfigurationFileFactory.from_dict(
+            {"algorithm": "acerac", "algorithm_config": {"env_name": "HalfCheetah-v2", "experiment_name": f"b{i}"}},
+            parser_factory
+        )
+        configuration_file.priority = i % 3
+        configuration_files.append(configuration_file)
+
+    gateway.save_many(configuration_files)
+
+
+def measure_claims(gateway: JsonConfigurationFileGateway, threads: int, count: int):
+    claimed = []
+    claimed_lock = threading.Lock()
+
+    def claim():
+        while True:
+            claimed_configuration_files = gateway.claim(count, lease_duration=3600)
+            if not claimed_configuration_files:
+                break
+
+            with claimed_lock:
+                claimed.extend(item['filename'] for item in claimed_configuration_files)
+
+    workers = [threading.Thread(target=claim) for _ in range(threads)]
+
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    return claimed, elapsed
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--configurations', type=int, default=5000)
+    arg_parser.add_argument('--threads', type=int, nargs='+', default=[1, 8, 32])
+    arg_parser.add_argument('--count', type=int, nargs='+', default=[1, 10])
+    arg_parser.add_argument('--directory', type=str, default=None,
+                            help='Directory on the filesystem to benchmark, system temporary directory by default')
+    args = arg_parser.parse_args()
+
+    for count in args.count:
+        for threads in args.threads:
+            measure(args.configurations, threads, count, args.directory)
@@ -0,0 +1,80 @@
+# Measures JsonConfigurationFileGateway saves/s from concurrent writers, without group commit and with group commit
+# made durable by an fsync per file or by syncfs per group.
+# Usage: python -m benchmarks.json_gateway_save --threads 16 --saves-per-thread 200 --window-ms 2
+import argparse
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+
+os.environ.setdefault("SQLALCHEMY_DATABASE_URI", "sqlite://")
+
+from src import Constants  # noqa: E402
+from src.configuration_file_gateway import JsonConfigurationFileGateway  # noqa: E402
+from src.models import ConfigurationFileFactory  # noqa: E402
+from src.utils.data_validators import ParserFactory  # noqa: E402
+
+
+def measure(window_ms: float, syncfs: bool, threads: int, saves_per_thread: int, directory: str):
+    with tempfile.TemporaryDirectory(dir=directory) as configurations_directory:
+        Constants.RL_CONFIGURATIONS = configurations_directory
+        Constants.RL_CONFIGURATIONS_GROUP_COMMIT_WINDOW_MS = window_ms
+        Constants.RL_CONFIGURATIONS_GROUP_COMMIT_SYNCFS = syncfs
+        saves, elapsed, syncs = measure_saves(threads, saves_per_thread)
+
+    print(f"group commit window {window_ms} ms, {'syncfs per group' if syncfs else 'fsync per file'}: "
+          f"{saves} saves in {elapsed:.3f}s ({saves / elapsed:.0f} saves/s, {syncs} fsync/syncfs calls)")
+
+
+def measure_saves(threads: int, saves_per_thread: int):
+    gateway = JsonConfigurationFileGateway()
+    syncs = Counter()
+
+    # fsync and syncfs calls are counted, their cost depends on the filesystem and its write traffic
+    def count_calls(function):
+        def counted(*args):
+            syncs['calls'] += 1
+            return function(*args)
+
+        return counted
+
+    fsync = os.fsync
+    os.fsync = count_calls(fsync)
+    if gateway._file_writer._syncfs is not None:
+        gateway._file_writer._syncfs = count_calls(gateway._file_writer._syncfs)
+
+    configuration_file = ConfigurationFileFactory.from_dict(
+        {"algorithm": "acerac", "algorithm_config": {"env_name": "HalfCheetah-v2", "experiment_name": "benchmark"}},
+        ParserFactory()
+    )
+
+    def save():
+        for _ in range(saves_per_thread):
+            gateway.save(configuration_file)
+
+    workers = [threading.Thread(target=save) for _ in range(threads)]
+
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    os.fsync = fsync
+
+    return threads * saves_per_thread, elapsed, syncs['calls']
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--threads', type=int, default=16)
+    arg_parser.add_argument('--saves-per-thread', type=int, default=200)
+    arg_parser.add_argument('--window-ms', type=float, default=2)
+    arg_parser.add_argument('--directory', type=str, default=None,
+                            help='Directory on the filesystem to benchmark, system temporary directory by default')
+    args = arg_parser.parse_args()
+
+    measure(0, False, args.threads, args.saves_per_thread, args.directory)
+    measure(args.window_ms, False, args.threads, args.saves_per_thread, args.directory)
+    measure(args.window_ms, True, args.threads, args.saves_per_thread, args.directory)
@@ -0,0 +1,88 @@
+# Compares adding training results one by one (a transaction per row, like clients writing to the database directly)
+# with validating and inserting them in batches through the /results/batch path.
+# Usage: python -m benchmarks.results_batch --results 100000 --batch-size 10000
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+# a database file, so commits cost what they cost outside of the benchmark
+os.environ.setdefault("SQLALCHEMY_DATABASE_URI",
+                      f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'results_batch.sqlite')}")
+
+from src import app, db, Constants  # noqa: E402
+from src.models import Algorithm, TrainingResults  # noqa: E402
+from src.repository import AlgorithmRepository, TrainingResultsRepository  # noqa: E402
+from src.routes import get_training_result_or_error  # noqa: E402
+from src.utils import json_codec  # noqa: E402
+
+
+def get_results_data(count: int):
+    algorithms = sorted(Constants.KNOWN_ALGORITHMS)
+    environments = ['HalfCheetah-v2', 'Hopper-v2', 'Walker2d-v2', 'Ant-v2']
+
+    return [
+        {
+            "best_mean_result": i % 5000 - 1000.5,
+            "results_subdirectory": f"results/{i}",
+            "environment": environments[i % len(environments)],
+            "configuration": {"env_name": environments[i % len(environments)], "actor_lr": 0.001 * (i % 10 + 1),
+                              "gamma": 0.99, "actor_layers": [256, 256], "critic_layers": [256, 256], "use_v": True},
+            "date": datetime.now().isoformat(),
+            "algorithm": algorithms[i % len(algorithms)]
+        } for i in range(count)
+    ]
+
+
+def add_one_by_one(data, batch_size: int):
+    algorithms = {algorithm.name: algorithm for algorithm in Algorithm.query.all()}
+
+    for item in data:
+        db.session.add(TrainingResults(
+            best_mean_result=item["best_mean_result"],
+            results_subdirectory=item["results_subdirectory"],
+            environment=item["environment"],
+            algorithm_config=json_codec.dumps(item["configuration"]),
+            date=datetime.fromisoformat(item["date"]),
+            algorithm=algorithms[item["algorithm"]].id
+        ))
+        db.session.commit()
+
+
+def add_batches(data, batch_size: int):
+    for start in range(0, len(data), batch_size):
+        algorithm_ids = AlgorithmRepository.get_algorithm_ids_by_name()
+        validated = [get_training_result_or_error(item, algorithm_ids) for item in data[start:start + batch_size]]
+        result_ids = TrainingResultsRepository.insert_many([result for result, error in validated if error is None])
+        assert len(result_ids) == len(validated)
+
+
+def measure(name: str, function, count: int, batch_size: int):
+    TrainingResults.query.delete()
+    db.session.commit()
+    data = get_results_data(count)
+
+    start = time.perf_counter()
+    function(data, batch_size)
+    elapsed = time.perf_counter() - start
+
+    assert TrainingResults.query.count() == count
+    print(f"{name}: {count} results in {elapsed:.3f}s ({count / elapsed:.0f} results/s)")
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--results', type=int, default=100000)
+    arg_parser.add_argument('--single-results', type=int, default=2000,
+                            help='Number of results added one by one, which is much slower')
+    arg_parser.add_argument('--batch-size', type=int, default=10000)
+    args = arg_parser.parse_args()
+
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([Algorithm(name=name) for name in sorted(Constants.KNOWN_ALGORITHMS)])
+        db.session.commit()
+
+        measure("single", add_one_by_one, args.single_results, args.batch_size)
+        measure(f"batches of {args.batch_size}", add_batches, args.results, args.batch_size)
@@ -0,0 +1,90 @@
+# Compares serializing training results from ORM objects (TrainingResults.to_dict) with serializing rows of selected
+# columns (TrainingResults.row_to_dict), with configurations decoded or passed through as stored.
+# Usage: python -m benchmarks.results_serialization --results 100000
+import argparse
+import os
+import random
+import time
+from datetime import datetime
+
+os.environ.setdefault("SQLALCHEMY_DATABASE_URI", "sqlite://")
+
+from src import app, db, Constants  # noqa: E402
+from src.models import Algorithm, TrainingResults  # noqa: E402
+from src.repository import TrainingResultsRepository  # noqa: E402
+from src.utils import json_codec  # noqa: E402
+
+
+def add_results(count: int):
+    db.create_all()
+
+    algorithms = [Algorithm(name=name) for name in sorted(Constants.KNOWN_ALGORITHMS)]
+    db.session.add_all(algorithms)
+    db.session.commit()
+
+    random.seed(0)
+    environments = ['HalfCheetah-v2', 'Hopper-v2', 'Walker2d-v2', 'Ant-v2']
+
+    db.session.execute(TrainingResults.__table__.insert(), [
+        {
+            'best_mean_result': random.uniform(-1000, 5000),
+            'results_subdirectory': f"results/{i}",
+            'environment': random.choice(environments),
+            'algorithm_config': json_codec.dumps({
+                "env_name": "HalfCheetah-v2", "actor_lr": 0.001 * (i % 10 + 1), "gamma": 0.99,
+                "actor_layers": [256, 256], "critic_layers": [256, 256], "use_v": True, "experiment_name": f"e{i}"
+            }),
+            'date': datetime.now(),
+            'algorithm': random.choice(algorithms).id
+        } for i in range(count)
+    ])
+    db.session.commit()
+
+
+def serialize_orm_objects() -> str:
+    return app.json.dumps([result.to_dict() for result in TrainingResults.query.order_by(
+        TrainingResults.environment.desc(), TrainingResults.best_mean_result.desc()).all()])
+
+
+def serialize_rows() -> str:
+    results, _ = TrainingResultsRepository.get_all_results_page(None, None)
+
+    return app.json.dumps([TrainingResults.row_to_dict(result) for result in results])
+
+
+def serialize_rows_with_raw_configurations() -> str:
+    results, _ = TrainingResultsRepository.get_all_results_page(None, None)
+
+    return app.json.dumps([TrainingResults.row_to_dict(result, raw_configuration=True) for result in results])
+
+
+def measure(name: str, function, count: int, repeats: int):
+    elapsed = []
+
+    for _ in range(repeats):
+        # every repeat starts without objects (e.g. related algorithms) loaded by the previous one
+        db.session.expunge_all()
+
+        start = time.perf_counter()
+        serialized = function()
+        elapsed.append(time.perf_counter() - start)
+
+    assert len(json_codec.loads(serialized)) == count
+
+    best = min(elapsed)
+    print(f"{name}: {count} results in {best:.3f}s ({count / best:.0f} results/s, {json_codec.CODEC_NAME})")
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--results', type=int, default=100000)
+    arg_parser.add_argument('--repeats', type=int, default=3)
+    args = arg_parser.parse_args()
+
+    with app.app_context():
+        add_results(args.results)
+
+        measure("ORM objects, to_dict", serialize_orm_objects, args.results, args.repeats)
+        measure("selected columns, row_to_dict", serialize_rows, args.results, args.repeats)
+        measure("selected columns, row_to_dict with raw configurations", serialize_rows_with_raw_configurations,
+                args.results, args.repeats)
@@ -0,0 +1,61 @@
+# Compares scheduling N configuration files one by one (the /schedule path) with the /schedule/batch path.
+# Usage: python -m benchmarks.schedule_batch --count 1000
+import argparse
+import os
+import tempfile
+import time
+
+os.environ.setdefault("SQLALCHEMY_DATABASE_URI", "sqlite://")
+
+from src import Constants  # noqa: E402
+from src.configuration_file_gateway import ConfigurationFileGatewayFactory  # noqa: E402
+from src.repository import ConfigurationFileRepository  # noqa: E402
+from src.routes import get_configuration_file_or_error, validation_executor  # noqa: E402
+from src.utils.data_validators import ParserFactory  # noqa: E402
+
+
+def get_configuration_files_data(count: int):
+    return [
+        {
+            "algorithm": "acerac",
+            "algorithm_config": {"env_name": "HalfCheetah-v2", "actor_lr": 0.001 * (i % 10 + 1), "gamma": 0.99,
+                                 "actor_layers": [256, 256], "critic_layers": [256, 256], "use_v": True}
+        } for i in range(count)
+    ]
+
+
+def schedule_one_by_one(data):
+    parser_factory = ParserFactory()
+    for item in data:
+        configuration_file, error = get_configuration_file_or_error(item, parser_factory)
+        ConfigurationFileRepository.save(configuration_file, ConfigurationFileGatewayFactory.get_default_gateway())
+
+
+def schedule_batch(data):
+    parser_factory = ParserFactory()
+    validated = list(validation_executor.map(lambda x: get_configuration_file_or_error(x, parser_factory), data))
+    ConfigurationFileRepository.save_many(
+        [configuration_file for configuration_file, error in validated if error is None],
+        ConfigurationFileGatewayFactory.get_default_gateway()
+    )
+
+
+def measure(name: str, function, count: int):
+    with tempfile.TemporaryDirectory() as directory:
+        Constants.RL_CONFIGURATIONS = directory
+        data = get_configuration_files_data(count)
+
+        start = time.perf_counter()
+        function(data)
+        elapsed = time.perf_counter() - start
+
+    print(f"{name}: {count} configuration files in {elapsed:.3f}s ({count / elapsed:.0f} configs/s)")
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--count', type=int, default=1000)
+    args = arg_parser.parse_args()
+
+    measure("single", schedule_one_by_one, args.count)
+    measure("batch", schedule_batch, args.count)
@@ -2,8 +2,10 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 
 from src.constants import Constants
+from src.utils.json_codec import CodecJSONProvider
 
 app = Flask(__name__)
+app.json = CodecJSONProvider(app)
 
 app.config['SECRET_KEY'] = Constants.SECRET_KEY
 app.config['SQLALCHEMY_DATABASE_URI'] = Constants.SQLALCHEMY_DATABASE_URI
@@ -12,4 +14,4 @@ app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 db = SQLAlchemy(app)
 
-from src import routes
+from src import routes, commands
@@ -0,0 +1,171 @@
+import os
+from datetime import datetime
+
+import click
+from sqlalchemy import inspect, text
+
+from src import app, db, Constants
+from src.configuration_file_gateway import JsonConfigurationFileGateway
+from src.models import ConfigurationFileRecord, TrainingResults
+from src.utils import json_codec, configuration_file_metadata
+from src.utils.archive import ConfigurationFileArchive
+from src.utils.sharded_layout import sharded_layout
+
+
+@app.cli.command('import-configurations')
+@click.option('--batch-size', default=1000, show_default=True, help='Number of rows inserted in one transaction')
+def import_configurations(batch_size: int):
+    """Imports configuration files from RL_CONFIGURATIONS directories into the SQL gateway table."""
+    ConfigurationFileRecord.__table__.create(db.engine, checkfirst=True)
+
+    known_filenames = {filename for filename, in db.session.query(ConfigurationFileRecord.filename)}
+    imported = 0
+
+    for status in sorted(Constants.CONFIGURATION_FILE_STATUSES):
+        status_directory = JsonConfigurationFileGateway._get_status_directory(status)
+        if not os.path.isdir(status_directory):
+            continue
+
+        for directory in JsonConfigurationFileGateway._get_status_directories(status_directory):
+            for filename in sorted(
+                    JsonConfigurationFileGateway._get_all_files_with_json_extension_in_directory(directory)):
+                if filename in known_filenames:
+                    continue
+
+                path = JsonConfigurationFileGateway._get_configuration_dir_absolute_path(filename, directory)
+                try:
+                    with open(path, 'rb') as f:
+                        data = json_codec.load(f)
+                except ValueError:
+                    click.echo(f"Skipping {path}, it is not a valid JSON file")
+                    continue
+
+                db.session.add(get_configuration_file_record(filename, status, data, os.path.getmtime(path)))
+                known_filenames.add(filename)
+                imported += 1
+
+                if imported % batch_size == 0:
+                    db.session.commit()
+
+        archive = ConfigurationFileArchive(JsonConfigurationFileGateway._get_archive_directory(status_directory),
+                                           Constants.RL_CONFIGURATIONS_ARCHIVE_BLOCK_SIZE)
+        for filename, data in archive.iterate_data():
+            if filename in known_filenames:
+                continue
+
+            # archived files have no modification time, files without parsable names get the import time
+            db.session.add(get_configuration_file_record(filename, status, data, datetime.now().timestamp()))
+            known_filenames.add(filename)
+            imported += 1
+
+            if imported % batch_size == 0:
+                db.session.commit()
+
+    db.session.commit()
+    click.echo(f"Imported {imported} configuration files")
+
+
+@app.cli.command('shard-configurations')
+def shard_configurations():
+    """Moves configuration files from flat RL_CONFIGURATIONS directories into shard directories.
+
+    Can be run while the application is serving requests with RL_CONFIGURATIONS_SHARDED enabled, files are moved one
+    by one with a rename and the gateway looks for every file in both places.
+    """
+    if not Constants.RL_CONFIGURATIONS_SHARDED:
+        raise click.ClickException("RL_CONFIGURATIONS_SHARDED must be enabled, otherwise moved files are not visible")
+
+    moved = 0
+    skipped = 0
+
+    for status in sorted(Constants.CONFIGURATION_FILE_STATUSES):
+        status_directory = JsonConfigurationFileGateway._get_status_directory(status)
+        if not os.path.isdir(status_directory):
+            continue
+
+        for filename in sorted(JsonConfigurationFileGateway._get_all_files_with_json_extension_in_directory(
+                status_directory)):
+            shard_directory = JsonConfigurationFileGateway._get_configuration_file_directories(filename,
+                                                                                               status_directory)[0]
+            if shard_directory == status_directory:
+                # not named by the gateway, stays in the status directory
+                skipped += 1
+                continue
+
+            sharded_layout.ensure_directory(shard_directory)
+            try:
+                os.rename(JsonConfigurationFileGateway._get_configuration_dir_absolute_path(filename, status_directory),
+                          JsonConfigurationFileGateway._get_configuration_dir_absolute_path(filename, shard_directory))
+            except FileNotFoundError:
+                # status changed in the meantime, the gateway moved the file to its shard already
+                continue
+
+            moved += 1
+
+    click.echo(f"Moved {moved} configuration files, skipped {skipped} configuration files with not parsable names")
+
+
+@app.cli.command('archive-configurations')
+@click.option('--older-than-days', type=float, default=Constants.RL_CONFIGURATIONS_ARCHIVE_AFTER_DAYS or 30,
+              show_default=True, help='Archive files which got their status more than this many days ago')
+def archive_configurations(older_than_days: float):
+    """Moves old configuration files from done and error directories to compressed archive segments."""
+    gateway = JsonConfigurationFileGateway()
+    archived = gateway.archive_configuration_files(older_than_days * 24 * 3600)
+
+    click.echo(f"Archived {archived} configuration files")
+
+
+def get_configuration_file_record(filename: str, status: str, data: dict, mtime: float) -> ConfigurationFileRecord:
+    configuration_file_name = JsonConfigurationFileGateway._parse_configuration_file_name(filename)
+
+    if configuration_file_name is not None:
+        algorithm = configuration_file_name.algorithm
+        environment = configuration_file_name.environment
+        created_at = configuration_file_name.submitted_at
+    else:
+        algorithm_config = data.get('algorithm_config', None) or {}
+        algorithm = data.get('algorithm', '')
+        environment = next(
+            (algorithm_config[key] for key in Constants.ENVIRONMENT_NAME_KEYS if key in algorithm_config), '')
+        created_at = datetime.fromtimestamp(mtime)
+
+    return ConfigurationFileRecord(
+        filename=filename,
+        status=status,
+        algorithm=algorithm,
+        environment=environment,
+        created_at=created_at,
+        payload=json_codec.dumps(data),
+        priority=JsonConfigurationFileGateway._get_priority(configuration_file_metadata.split_metadata(data)[1])
+    )
+
+
+@app.cli.command('create-results-indexes')
+def create_results_indexes():
+    """Creates indexes of the training_results table missing in databases created before they were declared."""
+    for index in TrainingResults.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
+        click.echo(f"Index {index.name} is present")
+
+
+@app.cli.command('upgrade-configuration-file-table')
+def upgrade_configuration_file_table():
+    """Adds columns and indexes missing in configuration_file tables created before they were declared."""
+    table = ConfigurationFileRecord.__table__
+    present_columns = {column['name'] for column in inspect(db.engine).get_columns(table.name)}
+
+    with db.engine.begin() as connection:
+        for column in table.columns:
+            if column.name in present_columns:
+                continue
+
+            column_definition = f"{column.name} {column.type.compile(dialect=db.engine.dialect)}"
+            if column.server_default is not None:
+                column_definition += f" NOT NULL DEFAULT {column.server_default.arg}"
+            connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column_definition}"))
+            click.echo(f"Column {column.name} was added")
+
+    for index in table.indexes:
+        index.create(db.engine, checkfirst=True)
+        click.echo(f"Index {index.name} is present")
@@ -1,18 +1,94 @@
-import json
+import bisect
+import logging
+import os
+import threading
+import time
+import uuid
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from collections import Counter
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import List, Dict, NamedTuple, Optional, Callable, Tuple, Iterator, Hashable
 
-from src import Constants
-from src.models import ConfigurationFile
-from src.utils.utils import get_current_time_as_string, generate_random_id, get_all_files_with_extension_in_directory
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+
+from src import Constants, db, app
+from src.models import ConfigurationFile, ConfigurationFileRecord
+from src.utils import json_codec, configuration_file_metadata
+from src.utils.archive import ConfigurationFileArchive
+from src.utils.bulk_loader import bulk_loader, load_json_file, load_json_file_with_stat
+from src.utils.change_feed import ChangeFeed, ConfigurationFileChange
+from src.utils.directory_index import DirectoryIndex
+from src.utils.group_commit import GroupCommitFileWriter
+from src.utils.sharded_layout import sharded_layout
+from src.utils.journal import ConfigurationJournal, JournalEntry
+from src.utils.leases import LeaseStore, Lease
+from src.utils.statistics import ConfigurationFileStatistics
+from src.utils.sortable_ids import generate_sortable_id, is_sortable_id, get_sortable_id_time, \
+    get_sortable_id_lower_bound
+from src.utils.utils import get_all_files_with_extension_in_directory, parse_time_string, encode_cursor, \
+    decode_cursor
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigurationFileQuery(NamedTuple):
+    limit: Optional[int] = None
+    cursor: Optional[str] = None
+    algorithm: Optional[str] = None
+    environment: Optional[str] = None
+    submitted_after: Optional[datetime] = None
+    submitted_before: Optional[datetime] = None
+
+    @property
+    def has_time_range(self) -> bool:
+        return self.submitted_after is not None or self.submitted_before is not None
+
+
+class ConfigurationFilesPage(NamedTuple):
+    data: List[Dict]
+    next_cursor: Optional[str]
+    # keys identifying stored version of every configuration file (None if unknown), for caching objects built from data
+    keys: Optional[List[Optional[Hashable]]] = None
+
+
+class ConfigurationFileName(NamedTuple):
+    environment: str
+    algorithm: str
+    # sortable id, None for files named before ids were introduced
+    id: Optional[str]
+    submitted_at: datetime
 
 
 class ConfigurationFileGateway(ABC):
+    # sortable ids start with a digit from 0 to 7, so names starting with higher characters are not named by ids
+    LEGACY_FILENAMES_START = '8'
+
+    def __init__(self):
+        self._statistics = ConfigurationFileStatistics(Constants.STATISTICS_RECONCILIATION_INTERVAL_S)
+        self._lease_stores = {}
+        self._leases_requeued_at = 0.0
+        self._requeue_lock = threading.Lock()
+        # claim order and data of unprocessed configuration files, stored data of a filename never changes
+        self._claim_candidates: Dict[str, Tuple[Tuple, Dict]] = {}
+        self._sorted_claim_candidates: List[Tuple[Tuple, str]] = []
+        self._claim_candidates_lock = threading.Lock()
+        self._change_feed = ChangeFeed(Constants.CHANGE_FEED_MAX_CHANGES)
+        # filenames of every status seen by the last look for changes made by other processes
+        self._watched_filenames: Dict[str, Tuple[List[str], set]] = {}
+        self._watched_at = float('-inf')
+        self._watch_lock = threading.Lock()
 
     @abstractmethod
     def save(self, configuration_file: ConfigurationFile) -> Dict:
         pass
 
+    def save_many(self, configuration_files: List[ConfigurationFile]) -> List[Dict]:
+        # Returns metadata of every saved configuration file, or {'error': message} for files which could not be saved
+        # while the others were
+        return [self.save(configuration_file) for configuration_file in configuration_files]
+
     @abstractmethod
     def get_all_unprocessed_configuration_files_data(self) -> List[Dict]:
         pass
@@ -29,68 +105,873 @@ class ConfigurationFileGateway(ABC):
     def get_all_failed_configuration_files_data(self) -> List[Dict]:
         pass
 
+    @abstractmethod
+    def get_configuration_files_data_page(self, status: str, query: ConfigurationFileQuery) -> ConfigurationFilesPage:
+        pass
+
+    @abstractmethod
+    def change_status(self, filename: str, status_from: str, status_to: str) -> bool:
+        # Returns False if there is no configuration file with given filename and status_from status
+        pass
+
+    def get_statistics(self) -> Dict:
+        return self._statistics.get_statistics(self._count_configuration_files)
+
+    def start_statistics_reconciliation(self):
+        # counts configuration files in a background thread, so statistics requests do not have to count them
+        self._statistics.start_reconciliation(self._count_configuration_files)
+
+    def claim(self, count: int, lease_duration: float, worker: Optional[str] = None) -> List[Dict]:
+        # Moves up to count unprocessed configuration files, highest priority and oldest first, to processing status
+        # and leases them to the caller. Claimers skip files leased by others, so concurrent claims never return the
+        # same file. Files with expired leases are returned to the queue before claiming, at most once per
+        # LEASE_REQUEUE_INTERVAL_S.
+        self._requeue_expired_leases_if_needed()
+        lease_store = self._get_lease_store()
+        claimed = []
+
+        for filename, stored_data in self._get_claim_candidates():
+            if len(claimed) == count:
+                break
+
+            lease = lease_store.acquire(filename, worker, lease_duration)
+            if lease is None:
+                continue
+
+            if not self.change_status(filename, Constants.UNPROCESSED_STATUS, Constants.PROCESSING_STATUS):
+                # claimed by a client not using leases, or listed before it was claimed and completed
+                lease_store.release(filename, lease.token)
+                continue
+
+            configuration_file_data, metadata = configuration_file_metadata.split_metadata(stored_data)
+            claimed.append({
+                'id': self._get_configuration_file_id(filename),
+                'filename': filename,
+                'configuration': configuration_file_data,
+                'priority': self._get_priority(metadata),
+                'lease': self._lease_to_dict(lease)
+            })
+
+        return claimed
+
+    def renew_lease(self, filename: str, lease_token: str, lease_duration: float) -> Optional[Dict]:
+        # None is returned if the lease expired or belongs to other claim
+        lease = self._get_lease_store().renew(filename, lease_token, lease_duration)
+
+        return None if lease is None else self._lease_to_dict(lease)
+
+    def complete(self, filename: str, lease_token: str) -> bool:
+        return self._finish_claim(filename, lease_token, Constants.DONE_STATUS)
+
+    def fail(self, filename: str, lease_token: str) -> bool:
+        return self._finish_claim(filename, lease_token, Constants.FAILED_STATUS)
+
+    def requeue_expired_leases(self) -> int:
+        # Returns configuration files with expired leases to unprocessed status, returns number of requeued files
+        lease_store = self._get_lease_store()
+        requeued = 0
+
+        for lease in lease_store.get_expired():
+            # the lease can be renewed, or broken by other process, after it was listed
+            if lease_store.break_expired(lease.filename) is None:
+                continue
+
+            # file is not in processing if its claimer stopped before moving it, then only the lease is removed
+            if self.change_status(lease.filename, Constants.PROCESSING_STATUS, Constants.UNPROCESSED_STATUS):
+                requeued += 1
+
+        return requeued
+
+    def get_changes_token(self) -> str:
+        # token of the current state, get_changes called with it returns only later changes
+        self._watch_for_external_changes_if_needed()
+
+        return self._change_feed.get_token()
+
+    def get_changes(self, token: str, timeout: float, statuses: Optional[List[str]] = None) \
+            -> Optional[Tuple[List[Dict], str]]:
+        # Returns configuration files saved or moved to other status after the token, waiting up to timeout seconds
+        # until there is at least one, and the token to pass next time. None is returned if the token is too old or
+        # was created by other process, then configuration files must be listed again. Changes are published by this
+        # gateway, changes made by other processes are found by comparing listings, at most once per
+        # CHANGE_FEED_WATCH_INTERVAL_S while somebody waits, so a change can be returned twice.
+        deadline = time.monotonic() + timeout
+
+        while True:
+            self._watch_for_external_changes_if_needed()
+            wait_timeout = max(0.0, min(deadline - time.monotonic(), Constants.CHANGE_FEED_WATCH_INTERVAL_S))
+
+            changes_and_token = self._change_feed.wait_for_changes(token, wait_timeout,
+                                                                   Constants.LISTING_MAX_PAGE_SIZE, statuses)
+            if changes_and_token is None:
+                return None
+
+            changes, token = changes_and_token
+            if changes or time.monotonic() >= deadline:
+                return self._changes_to_dicts(changes), token
+
+    @abstractmethod
+    def _count_configuration_files(self) -> Counter:
+        # Counts all configuration files by (status, algorithm, environment), used to reconcile statistics
+        pass
+
+    @abstractmethod
+    def _get_configuration_file_names_and_data_loader(self, status: str) \
+            -> Tuple[List[str], Callable[[str], Optional[Dict]]]:
+        # Returns filenames of all configuration files with given status and function loading their stored data
+        pass
+
+    def _get_claim_candidates(self) -> Iterator[Tuple[str, Dict]]:
+        # Unprocessed configuration files in claim order. Files are loaded and sorted again only when new files appear,
+        # files claimed in the meantime are skipped.
+        filenames, load_data = self._get_configuration_file_names_and_data_loader(Constants.UNPROCESSED_STATUS)
+        unprocessed_filenames = set(filenames)
+
+        with self._claim_candidates_lock:
+            claim_candidates = self._claim_candidates
+
+            if not unprocessed_filenames.issubset(claim_candidates.keys()):
+                claim_candidates = {filename: claim_candidate for filename, claim_candidate in claim_candidates.items()
+                                    if filename in unprocessed_filenames}
+
+                for filename in unprocessed_filenames - claim_candidates.keys():
+                    stored_data = load_data(filename)
+                    if stored_data is not None:
+                        claim_candidates[filename] = (self._get_claim_order(filename, stored_data), stored_data)
+
+                self._claim_candidates = claim_candidates
+                self._sorted_claim_candidates = sorted((order, filename)
+                                                       for filename, (order, _) in claim_candidates.items())
+
+            sorted_claim_candidates = self._sorted_claim_candidates
+
+        for _, filename in sorted_claim_candidates:
+            if filename in unprocessed_filenames:
+                yield filename, claim_candidates[filename][1]
+
+    def _get_claim_order(self, filename: str, stored_data: Dict) -> Tuple:
+        # highest priority first, then oldest first
+        _, metadata = configuration_file_metadata.split_metadata(stored_data)
+        submitted_at = '' if metadata is None else metadata.get('submitted_at', '')
+
+        return -self._get_priority(metadata), submitted_at, filename
+
+    def _finish_claim(self, filename: str, lease_token: str, status_to: str) -> bool:
+        # False is returned if the lease expired or belongs to other claim. The lease is taken before the file is
+        # moved, so it can not expire and be claimed again by other worker in the meantime.
+        lease_store = self._get_lease_store()
+
+        taken = lease_store.take(filename, lease_token)
+        if taken is None:
+            return False
+
+        _, taken_path = taken
+        if not self.change_status(filename, Constants.PROCESSING_STATUS, status_to):
+            lease_store.restore(filename, taken_path)
+            return False
+
+        lease_store.discard(taken_path)
+
+        return True
+
+    def _publish_changes(self, filenames_and_statuses: List[Tuple[str, str]]):
+        with self._watch_lock:
+            for filename, status in filenames_and_statuses:
+                watched = self._watched_filenames.get(status, None)
+                if watched is not None:
+                    watched[1].add(filename)
+
+        self._change_feed.publish(filenames_and_statuses)
+
+    def _watch_for_external_changes_if_needed(self):
+        # publishes configuration files which appeared in a status since the last look
+        with self._watch_lock:
+            if time.monotonic() - self._watched_at < Constants.CHANGE_FEED_WATCH_INTERVAL_S:
+                return
+
+            changes = self._find_external_changes()
+            self._watched_at = time.monotonic()
+
+        self._change_feed.publish(changes)
+
+    def _find_external_changes(self) -> List[Tuple[str, str]]:
+        # Must be called with _watch_lock held. Compares listings of all statuses with the last ones, the first look
+        # only remembers filenames.
+        changes = []
+        for status in sorted(Constants.CONFIGURATION_FILE_STATUSES):
+            filenames, _ = self._get_configuration_file_names_and_data_loader(status)
+            watched = self._watched_filenames.get(status, None)
+
+            # listings are reused while nothing changes
+            if watched is not None and watched[0] is filenames:
+                continue
+
+            current_filenames = set(filenames)
+            if watched is not None:
+                changes.extend((filename, status) for filename in sorted(current_filenames - watched[1]))
+
+            self._watched_filenames[status] = (filenames, current_filenames)
+
+        return changes
+
+    def _changes_to_dicts(self, changes: List[ConfigurationFileChange]) -> List[Dict]:
+        loaders = {}
+        changes_as_dicts = []
+
+        for change in changes:
+            if change.status not in loaders:
+                loaders[change.status] = self._get_data_loader(change.status)
+
+            # None if the file was moved again in the meantime
+            stored_data = loaders[change.status](change.filename)
+            changes_as_dicts.append({
+                'id': self._get_configuration_file_id(change.filename),
+                'filename': change.filename,
+                'status': change.status,
+                'configuration': None if stored_data is None else configuration_file_metadata.split_metadata(
+                    stored_data)[0]
+            })
+
+        return changes_as_dicts
+
+    def _get_data_loader(self, status: str) -> Callable[[str], Optional[Dict]]:
+        return self._get_configuration_file_names_and_data_loader(status)[1]
+
+    def _requeue_expired_leases_if_needed(self):
+        with self._requeue_lock:
+            if time.monotonic() - self._leases_requeued_at < Constants.LEASE_REQUEUE_INTERVAL_S:
+                return
+            self._leases_requeued_at = time.monotonic()
+
+        self.requeue_expired_leases()
+
+    def _get_lease_store(self) -> LeaseStore:
+        directory = self._get_leases_directory()
+
+        lease_store = self._lease_stores.get(directory, None)
+        if lease_store is None:
+            lease_store = self._lease_stores.setdefault(directory, LeaseStore(directory))
+
+        return lease_store
+
+    @staticmethod
+    def _get_leases_directory() -> str:
+        return f"{Constants.RL_CONFIGURATIONS}/{Constants.RL_CONFIGURATIONS_LEASES_SUBDIRECTORY}"
+
+    @staticmethod
+    def _get_priority(metadata: Optional[Dict]) -> int:
+        priority = 0 if metadata is None else metadata.get('priority', 0)
+
+        return priority if isinstance(priority, int) else 0
+
+    @staticmethod
+    def _lease_to_dict(lease: Lease) -> Dict:
+        return {
+            'token': lease.token,
+            'worker': lease.worker,
+            'expires_at': datetime.fromtimestamp(lease.expires_at).isoformat(timespec='seconds')
+        }
+
+    def iterate_configuration_files_data(self, status: str, query: ConfigurationFileQuery) -> Iterator[Dict]:
+        for configuration_files_page in self.iterate_configuration_files_data_pages(status, query):
+            yield from configuration_files_page.data
+
+    def iterate_configuration_files_data_pages(self, status: str,
+                                               query: ConfigurationFileQuery) -> Iterator[ConfigurationFilesPage]:
+        # Reads configuration files lazily, page by page. Only one page is returned, if query has a limit
+        if query.limit is not None:
+            yield self.get_configuration_files_data_page(status, query)
+            return
+
+        query = query._replace(limit=Constants.STREAMING_PAGE_SIZE)
+        while True:
+            configuration_files_page = self.get_configuration_files_data_page(status, query)
+            yield configuration_files_page
+
+            if configuration_files_page.next_cursor is None:
+                break
+            query = query._replace(cursor=configuration_files_page.next_cursor)
+
+    @staticmethod
+    def _get_configuration_file_name(configuration_file: ConfigurationFile):
+        # Names start with a sortable id, so sorted filenames are in submission order
+        assert isinstance(configuration_file, ConfigurationFile)
+
+        env_name = configuration_file.get_environment_name()
+
+        return f"{generate_sortable_id()}_{env_name}_{configuration_file.algorithm}.json"
+
+    @staticmethod
+    @lru_cache(maxsize=Constants.CONFIGURATION_FILE_NAMES_CACHE_SIZE)
+    def _parse_configuration_file_name(filename: str) -> Optional[ConfigurationFileName]:
+        # Reverses _get_configuration_file_name, None is returned for files named in other way.
+        # Parsed names are cached, as listings parse every filename
+        configuration_file_id, separator, rest = filename[:-len('.json')].partition('_')
+        if separator and is_sortable_id(configuration_file_id):
+            environment, separator, algorithm = rest.rpartition('_')
+            if not separator or algorithm not in Constants.KNOWN_ALGORITHMS:
+                return None
+
+            return ConfigurationFileName(environment, algorithm, configuration_file_id,
+                                         get_sortable_id_time(configuration_file_id))
+
+        return ConfigurationFileGateway._parse_legacy_configuration_file_name(filename)
+
+    @staticmethod
+    def _parse_legacy_configuration_file_name(filename: str) -> Optional[ConfigurationFileName]:
+        # {environment}_{algorithm}_{random id}_{%d-%m-%Y_%H-%M-%S timestamp}.json, used before sortable ids
+        parts = filename[:-len('.json')].rsplit('_', 4)
+        if len(parts) != 5:
+            return None
+
+        environment, algorithm, _, date, time = parts
+        if algorithm not in Constants.KNOWN_ALGORITHMS:
+            return None
+
+        try:
+            submitted_at = parse_time_string(f"{date}_{time}")
+        except ValueError:
+            return None
+
+        return ConfigurationFileName(environment, algorithm, None, submitted_at)
+
+    @staticmethod
+    def _get_configuration_file_id(filename: str) -> Optional[str]:
+        configuration_file_name = ConfigurationFileGateway._parse_configuration_file_name(filename)
+
+        return None if configuration_file_name is None else configuration_file_name.id
+
+    @staticmethod
+    def _get_algorithm_and_environment(filename: str, load_data: Callable[[str], Optional[Dict]]) -> Tuple[str, str]:
+        configuration_file_name = ConfigurationFileGateway._parse_configuration_file_name(filename)
+        if configuration_file_name is not None:
+            return configuration_file_name.algorithm, configuration_file_name.environment
+
+        configuration_file_data = load_data(filename) or {}
+        algorithm_config = configuration_file_data.get('algorithm_config', None) or {}
+        environment = next(
+            (algorithm_config[key] for key in Constants.ENVIRONMENT_NAME_KEYS if key in algorithm_config), '')
+
+        return configuration_file_data.get('algorithm', ''), environment
+
+    @staticmethod
+    def _get_configuration_files_data_page_from_filenames(
+            filenames: List[str],
+            load_data: Callable[[str], Optional[Dict]],
+            query: ConfigurationFileQuery,
+            get_key: Optional[Callable[[str], Optional[Hashable]]] = None,
+            load_in_parallel: bool = False) -> ConfigurationFilesPage:
+        # Pages through sorted filenames named by _get_configuration_file_name; load_data returns None for missing
+        # files, get_key returns key of the version of a file returned by the last load_data call. Files which can
+        # still fill the page are loaded together, on the bulk loader if load_in_parallel.
+        gateway = ConfigurationFileGateway
+
+        start = 0 if query.cursor is None else bisect.bisect_right(filenames, decode_cursor(query.cursor))
+        if query.submitted_after is not None:
+            # names starting with sortable ids come first, in submission order, and older names start with environment
+            # names, which sort after them
+            start = max(start, bisect.bisect_left(filenames, get_sortable_id_lower_bound(query.submitted_after)))
+
+        data = []
+        keys = []
+        position = start
+
+        while position < len(filenames) and (query.limit is None or len(data) < query.limit):
+            # filters answered by filename are applied without opening the file, every candidate adds at most one
+            # file to the page
+            candidates = []
+
+            while position < len(filenames) and (query.limit is None or len(candidates) < query.limit - len(data)):
+                filename = filenames[position]
+                configuration_file_name = gateway._parse_configuration_file_name(filename)
+                position += 1
+
+                if configuration_file_name is None:
+                    if query.has_time_range:
+                        continue
+                elif not gateway._configuration_file_name_matches(configuration_file_name, query):
+                    if configuration_file_name.id is not None and query.submitted_before is not None and \
+                            configuration_file_name.submitted_at > query.submitted_before:
+                        # later names with sortable ids are submitted even later, only older names can still match
+                        position = max(position, bisect.bisect_left(filenames, gateway.LEGACY_FILENAMES_START))
+                    continue
+
+                candidates.append((filename, configuration_file_name))
+
+            if load_in_parallel:
+                candidates_data = bulk_loader.map(load_data, [filename for filename, _ in candidates])
+            else:
+                candidates_data = [load_data(filename) for filename, _ in candidates]
+
+            for (filename, configuration_file_name), configuration_file_data in zip(candidates, candidates_data):
+                if configuration_file_data is None:
+                    continue
+                if configuration_file_name is None and \
+                        not gateway._configuration_file_data_matches(configuration_file_data, query):
+                    continue
+
+                data.append(configuration_file_data)
+                if get_key is not None:
+                    keys.append(get_key(filename))
+
+        # the page ends with the last loaded file, when it is full and more files follow
+        next_cursor = None
+        if query.limit is not None and len(data) == query.limit and position < len(filenames):
+            next_cursor = encode_cursor(filenames[position - 1])
+
+        return ConfigurationFilesPage(data, next_cursor, None if get_key is None else keys)
+
+    @staticmethod
+    def _configuration_file_name_matches(configuration_file_name: ConfigurationFileName,
+                                         query: ConfigurationFileQuery) -> bool:
+        if query.algorithm is not None and configuration_file_name.algorithm != query.algorithm:
+            return False
+        if query.environment is not None and configuration_file_name.environment != query.environment:
+            return False
+        if query.submitted_after is not None and configuration_file_name.submitted_at < query.submitted_after:
+            return False
+        if query.submitted_before is not None and configuration_file_name.submitted_at > query.submitted_before:
+            return False
+
+        return True
+
+    @staticmethod
+    def _configuration_file_data_matches(configuration_file_data: Dict, query: ConfigurationFileQuery) -> bool:
+        if query.algorithm is not None and configuration_file_data.get('algorithm', None) != query.algorithm:
+            return False
+
+        if query.environment is not None:
+            algorithm_config = configuration_file_data.get('algorithm_config', None) or {}
+            environments = {algorithm_config.get(key, None) for key in Constants.ENVIRONMENT_NAME_KEYS}
+            if query.environment not in environments:
+                return False
+
+        return True
+
 
 class JsonConfigurationFileGateway(ConfigurationFileGateway):
 
-    def save(self, configuration_file: ConfigurationFile) -> Dict:
-        directory = Constants.RL_CONFIGURATIONS
-        filename = self._get_configuration_file_name(configuration_file)
-        abs_path = self._get_configuration_dir_absolute_path(filename, directory)
+    def __init__(self):
+        super().__init__()
+        self._directory_indices = {}
+        self._directory_indices_lock = threading.Lock()
+        self._file_writer = GroupCommitFileWriter(Constants.RL_CONFIGURATIONS_GROUP_COMMIT_WINDOW_MS / 1000,
+                                                  Constants.RL_CONFIGURATIONS_GROUP_COMMIT_SYNCFS)
+        self._archives = {}
+        self._archives_lock = threading.Lock()
+        self._merged_filenames = {}
+
+        if Constants.RL_CONFIGURATIONS_ARCHIVE_AFTER_DAYS > 0:
+            threading.Thread(target=self._archive_periodically, daemon=True).start()
 
+    def save(self, configuration_file: ConfigurationFile) -> Dict:
         configuration_file_as_dict = configuration_file.to_dict()
+        stored_configuration_file = json_codec.dumps(configuration_file.to_stored_dict(datetime.now()))
+
+        for attempt in range(Constants.CONFIGURATION_FILE_NAME_ATTEMPTS):
+            filename = self._get_configuration_file_name(configuration_file)
+            directory = self._get_new_configuration_file_directory(filename)
 
-        with open(abs_path, 'x') as json_file:
-            json.dump(configuration_file_as_dict, json_file)
+            try:
+                self._file_writer.write(self._get_configuration_dir_absolute_path(filename, directory),
+                                        stored_configuration_file)
+                break
+            except FileExistsError:
+                # other process generated the same id
+                if attempt == Constants.CONFIGURATION_FILE_NAME_ATTEMPTS - 1:
+                    raise
+
+        self._statistics.add(Constants.UNPROCESSED_STATUS, configuration_file.algorithm,
+                             configuration_file.get_environment_name())
+        self._publish_changes([(filename, Constants.UNPROCESSED_STATUS)])
 
         return {
+            'id': self._get_configuration_file_id(filename),
             'filename': filename,
             'configuration': configuration_file_as_dict
         }
 
+    def save_many(self, configuration_files: List[ConfigurationFile]) -> List[Dict]:
+        metadata = []
+        contents = []
+
+        for configuration_file in configuration_files:
+            metadata.append({'id': None, 'filename': None, 'configuration': configuration_file.to_dict()})
+            contents.append(json_codec.dumps(configuration_file.to_stored_dict(datetime.now())))
+
+        errors: List[Optional[Exception]] = [None] * len(configuration_files)
+        positions = list(range(len(configuration_files)))
+
+        for _ in range(Constants.CONFIGURATION_FILE_NAME_ATTEMPTS):
+            paths_and_contents = []
+
+            for position in positions:
+                filename = self._get_configuration_file_name(configuration_files[position])
+                directory = self._get_new_configuration_file_directory(filename)
+                metadata[position].update(id=self._get_configuration_file_id(filename), filename=filename)
+                paths_and_contents.append((self._get_configuration_dir_absolute_path(filename, directory),
+                                           contents[position]))
+
+            for position, error in zip(positions, self._file_writer.write_many(paths_and_contents)):
+                errors[position] = error
+
+            # files whose id was generated by other process too are written again under a new id
+            positions = [position for position in positions if isinstance(errors[position], FileExistsError)]
+            if not positions:
+                break
+
+        for configuration_file, error in zip(configuration_files, errors):
+            if error is None:
+                self._statistics.add(Constants.UNPROCESSED_STATUS, configuration_file.algorithm,
+                                     configuration_file.get_environment_name())
+
+        self._publish_changes([(item['filename'], Constants.UNPROCESSED_STATUS)
+                               for item, error in zip(metadata, errors) if error is None])
+
+        for position, error in enumerate(errors):
+            if error is not None:
+                logger.warning(f"Could not save {metadata[position]['filename']}: {error}")
+                metadata[position] = {'error': f"Configuration file could not be saved: {error.strerror or error}"}
+
+        return metadata
+
     def get_all_unprocessed_configuration_files_data(self) -> List[Dict]:
-        directory = Constants.RL_CONFIGURATIONS
+        directory = self._get_status_directory(Constants.UNPROCESSED_STATUS)
 
         return self._get_all_configuration_files_data_in_directory(directory)
 
     def get_all_processing_configuration_files_data(self) -> List[Dict]:
-        directory = f"{Constants.RL_CONFIGURATIONS}/{Constants.RL_CONFIGURATIONS_PROCESSING_SUBDIRECTORY}"
+        directory = self._get_status_directory(Constants.PROCESSING_STATUS)
 
         return self._get_all_configuration_files_data_in_directory(directory)
 
     def get_all_done_configuration_files_data(self) -> List[Dict]:
-        directory = f"{Constants.RL_CONFIGURATIONS}/{Constants.RL_CONFIGURATIONS_DONE_SUBDIRECTORY}"
+        directory = self._get_status_directory(Constants.DONE_STATUS)
 
         return self._get_all_configuration_files_data_in_directory(directory)
 
     def get_all_failed_configuration_files_data(self) -> List[Dict]:
-        directory = f"{Constants.RL_CONFIGURATIONS}/{Constants.RL_CONFIGURATIONS_FAILED_SUBDIRECTORY}"
+        directory = self._get_status_directory(Constants.FAILED_STATUS)
 
         return self._get_all_configuration_files_data_in_directory(directory)
 
-    def _get_all_configuration_files_data_in_directory(self, directory: str) -> List[Dict]:
-        assert isinstance(directory, str), "directory parameter must be a string"
+    def get_configuration_files_data_page(self, status: str, query: ConfigurationFileQuery) -> ConfigurationFilesPage:
+        directory = self._get_status_directory(status)
+        filenames, load_data, get_key = self._get_filenames_and_data_loader(directory, query)
+
+        # files are read from disk, unless they are indexed
+        return self._get_configuration_files_data_page_from_filenames(
+            filenames, load_data, query, get_key, load_in_parallel=not Constants.RL_CONFIGURATIONS_INDEXED)
+
+    def change_status(self, filename: str, status_from: str, status_to: str) -> bool:
+        destination_directory = self._get_configuration_file_directories(filename,
+                                                                         self._get_status_directory(status_to))[0]
+        destination_path = self._get_configuration_dir_absolute_path(filename, destination_directory)
+        if Constants.RL_CONFIGURATIONS_SHARDED:
+            sharded_layout.ensure_directory(destination_directory)
+
+        for source_directory in self._get_configuration_file_directories(filename,
+                                                                         self._get_status_directory(status_from)):
+            try:
+                os.rename(self._get_configuration_dir_absolute_path(filename, source_directory), destination_path)
+                break
+            except FileNotFoundError:
+                continue
+        else:
+            return False
+
+        configuration_file_name = self._parse_configuration_file_name(filename)
+        if configuration_file_name is None:
+            self._statistics.invalidate()
+        else:
+            self._statistics.move(status_from, status_to, configuration_file_name.algorithm,
+                                  configuration_file_name.environment)
+        self._publish_changes([(filename, status_to)])
+
+        return True
+
+    def archive_configuration_files(self, older_than_s: float) -> int:
+        # Moves done and failed configuration files which got their status more than older_than_s seconds ago to
+        # archive segments, returns number of archived files. Archived files are listed like other files, but their
+        # status can not be changed. Statuses being archived by other process at the same time are skipped.
+        changed_before = time.time() - older_than_s
+        segment_max_size = Constants.RL_CONFIGURATIONS_ARCHIVE_SEGMENT_MAX_SIZE
+        archived = 0
+
+        for status in sorted(Constants.ARCHIVED_STATUSES):
+            status_directory = self._get_status_directory(status)
+            archive = self._get_archive(status_directory)
+
+            with archive.locked(blocking=False) as acquired:
+                if not acquired:
+                    continue
+
+                archived_filenames = set(archive.get_sorted_filenames())
+                paths = self._get_paths_of_files_changed_before(status_directory, changed_before)
+
+                for start in range(0, len(paths), segment_max_size):
+                    archived += self._archive_files(archive, archived_filenames, paths[start:start + segment_max_size])
+
+        return archived
+
+    def _count_configuration_files(self) -> Counter:
+        counters = Counter()
 
-        json_files = self._get_all_files_with_json_extension_in_directory(directory)
+        for status in Constants.CONFIGURATION_FILE_STATUSES:
+            try:
+                filenames, load_data, _ = self._get_filenames_and_data_loader(self._get_status_directory(status))
+            except FileNotFoundError:
+                continue
 
-        configuration_files_data = []
+            for filename in filenames:
+                algorithm, environment = self._get_algorithm_and_environment(filename, load_data)
+                counters[(status, algorithm, environment)] += 1
 
-        for file in json_files:
-            asb_path = self._get_configuration_dir_absolute_path(file, directory)
-            with open(asb_path, 'r') as f:
-                # TODO add metadata dict field
-                configuration_files_data.append(json.load(f))
+        return counters
 
-        return configuration_files_data
+    def _get_configuration_file_names_and_data_loader(self, status: str) \
+            -> Tuple[List[str], Callable[[str], Optional[Dict]]]:
+        filenames, load_data, _ = self._get_filenames_and_data_loader(self._get_status_directory(status))
+
+        return filenames, load_data
 
     @staticmethod
-    def _get_configuration_file_name(configuration_file: ConfigurationFile):
-        assert isinstance(configuration_file, ConfigurationFile)
+    def _get_status_directory(status: str) -> str:
+        if status == Constants.UNPROCESSED_STATUS:
+            return Constants.RL_CONFIGURATIONS
 
-        timestamp = get_current_time_as_string()
-        random_id = generate_random_id()
-        env_name = configuration_file.get_environment_name()
+        subdirectory = {
+            Constants.PROCESSING_STATUS: Constants.RL_CONFIGURATIONS_PROCESSING_SUBDIRECTORY,
+            Constants.DONE_STATUS: Constants.RL_CONFIGURATIONS_DONE_SUBDIRECTORY,
+            Constants.FAILED_STATUS: Constants.RL_CONFIGURATIONS_FAILED_SUBDIRECTORY
+        }.get(status, None)
+
+        if subdirectory is None:
+            raise ValueError(f"Unknown configuration file status: {status}")
+
+        return f"{Constants.RL_CONFIGURATIONS}/{subdirectory}"
+
+    @staticmethod
+    def _get_new_configuration_file_directory(filename: str) -> str:
+        directory = JsonConfigurationFileGateway._get_configuration_file_directories(filename,
+                                                                                    Constants.RL_CONFIGURATIONS)[0]
+        if Constants.RL_CONFIGURATIONS_SHARDED:
+            sharded_layout.ensure_directory(directory)
+
+        return directory
+
+    @staticmethod
+    def _get_configuration_file_directories(filename: str, status_directory: str) -> List[str]:
+        # Directories where configuration file with given status can be, the one it is saved in goes first.
+        # Files without a parsable name are never sharded.
+        if not Constants.RL_CONFIGURATIONS_SHARDED:
+            return [status_directory]
+
+        configuration_file_name = ConfigurationFileGateway._parse_configuration_file_name(filename)
+        if configuration_file_name is None:
+            return [status_directory]
+
+        shard_directory = sharded_layout.get_shard_directory(status_directory, filename,
+                                                             configuration_file_name.submitted_at)
+
+        # files not migrated yet are still in the status directory, and migration can move them to the shard
+        # between the first two attempts
+        return [shard_directory, status_directory, shard_directory]
+
+    @staticmethod
+    def _get_status_directories(status_directory: str, query: Optional[ConfigurationFileQuery] = None) -> List[str]:
+        # The status directory is always included, as it keeps files not migrated yet and files not named by the gateway
+        if not Constants.RL_CONFIGURATIONS_SHARDED:
+            return [status_directory]
+
+        first_date = None if query is None or query.submitted_after is None else query.submitted_after.date()
+        last_date = None if query is None or query.submitted_before is None else query.submitted_before.date()
+
+        return [status_directory] + sharded_layout.get_shard_directories(status_directory, first_date, last_date)
+
+    def _get_filenames_and_data_loader(self, status_directory: str, query: Optional[ConfigurationFileQuery] = None) \
+            -> Tuple[List[str], Callable[[str], Optional[Dict]], Callable[[str], Optional[Hashable]]]:
+        # Returns sorted filenames, function loading data of a file and function returning key of the loaded version
+        # of a file: (path, inode, mtime, size) for files, (archive directory, filename) for archived files
+        directories = self._get_status_directories(status_directory, query)
+        archive = self._get_archive(status_directory)
+
+        filename_lists = [self._get_sorted_filenames_in_directory(directory) for directory in directories]
+        if archive is not None:
+            filename_lists.append(archive.get_sorted_filenames())
+
+        filenames = self._merge_sorted_filenames(status_directory, query, filename_lists)
+        keys = {}
+
+        def load_data(filename: str) -> Optional[Dict]:
+            for directory in self._get_configuration_file_directories(filename, status_directory):
+                loaded_configuration_file = self._load_configuration_file(filename, directory)
+                if loaded_configuration_file is not None:
+                    keys[filename], configuration_file_data = loaded_configuration_file
+                    return configuration_file_data
+
+            if archive is not None:
+                configuration_file_data = archive.get_data(filename)
+                if configuration_file_data is not None:
+                    keys[filename] = (archive.directory, filename)
+                    return configuration_file_data
+
+            return None
+
+        return filenames, load_data, keys.get
+
+    def _merge_sorted_filenames(self, status_directory: str, query: Optional[ConfigurationFileQuery],
+                                filename_lists: List[List[str]]) -> List[str]:
+        if len(filename_lists) == 1:
+            return filename_lists[0]
+
+        # A file moved to its shard or archived while listing is listed twice
+        filenames = None
+        if query is None or not query.has_time_range:
+            # directory indices and archives return the same list objects until they change, so the last merged list
+            # is reused while all merged lists are the same objects
+            merged_filename_lists, filenames = self._merged_filenames.get(status_directory, ([], None))
+            if len(merged_filename_lists) != len(filename_lists) or \
+                    any(merged is not current for merged, current in zip(merged_filename_lists, filename_lists)):
+                filenames = None
+
+        if filenames is None:
+            filenames = sorted(set().union(*filename_lists))
+            if query is None or not query.has_time_range:
+                self._merged_filenames[status_directory] = (filename_lists, filenames)
+
+        return filenames
+
+    def _get_sorted_filenames_in_directory(self, directory: str) -> List[str]:
+        if Constants.RL_CONFIGURATIONS_INDEXED:
+            return self._get_directory_index(directory).get_filenames()
+
+        return sorted(self._get_all_files_with_json_extension_in_directory(directory))
+
+    def _load_configuration_file(self, filename: str, directory: str) -> Optional[Tuple[Hashable, Dict]]:
+        path = self._get_configuration_dir_absolute_path(filename, directory)
+
+        if Constants.RL_CONFIGURATIONS_INDEXED:
+            entry = self._get_directory_index(directory).get_entry(filename)
+            if entry is None:
+                return None
+
+            return (path, entry.inode, entry.mtime_ns, entry.size), entry.data
+
+        stat_and_data = load_json_file_with_stat(path)
+        if stat_and_data is None:
+            return None
+
+        stat, configuration_file_data = stat_and_data
+        return (path, stat.st_ino, stat.st_mtime_ns, stat.st_size), configuration_file_data
+
+    def _get_all_configuration_files_data_in_directory(self, status_directory: str) -> List[Dict]:
+        assert isinstance(status_directory, str), "status_directory parameter must be a string"
+
+        directories = self._get_status_directories(status_directory)
+
+        if Constants.RL_CONFIGURATIONS_INDEXED:
+            filenames_and_data = [(entry.filename, entry.data) for directory in directories
+                                  for entry in self._get_directory_index(directory).get_all_entries()]
+        else:
+            filenames_and_paths = [(file, self._get_configuration_dir_absolute_path(file, directory))
+                                   for directory in directories
+                                   for file in self._get_all_files_with_json_extension_in_directory(directory)]
+            configuration_files_data = bulk_loader.map(load_json_file, [path for _, path in filenames_and_paths])
+            filenames_and_data = [(filename, configuration_file_data) for (filename, _), configuration_file_data
+                                  in zip(filenames_and_paths, configuration_files_data)]
+
+        archive = self._get_archive(status_directory)
+        if archive is not None:
+            filenames_and_data.extend(archive.iterate_data())
+
+        configuration_files_data = {}
+        for filename, configuration_file_data in filenames_and_data:
+            # a file moved to its shard or archived while listing can be read twice
+            if configuration_file_data is not None:
+                configuration_files_data.setdefault(filename, configuration_file_data)
 
-        return f"{env_name}_{configuration_file.algorithm}_{random_id}_{timestamp}.json"
+        return list(configuration_files_data.values())
+
+    def _get_archive(self, status_directory: str) -> Optional[ConfigurationFileArchive]:
+        # only statuses which never change again are archived
+        if status_directory not in {self._get_status_directory(status) for status in Constants.ARCHIVED_STATUSES}:
+            return None
+
+        archive = self._archives.get(status_directory, None)
+        if archive is None:
+            with self._archives_lock:
+                archive = self._archives.setdefault(status_directory, ConfigurationFileArchive(
+                    self._get_archive_directory(status_directory), Constants.RL_CONFIGURATIONS_ARCHIVE_BLOCK_SIZE))
+
+        return archive
+
+    @staticmethod
+    def _get_archive_directory(status_directory: str) -> str:
+        return f"{status_directory}/{Constants.RL_CONFIGURATIONS_ARCHIVE_SUBDIRECTORY}"
+
+    def _get_paths_of_files_changed_before(self, status_directory: str, changed_before: float) -> List[str]:
+        # Renames keep the mtime (submission time) of a file but update its ctime, so ctime is the time the file was
+        # moved to its status directory (or later, e.g. when moved to its shard)
+        paths = []
+
+        for directory in self._get_status_directories(status_directory):
+            try:
+                with os.scandir(directory) as directory_entries:
+                    paths.extend(directory_entry.path for directory_entry in directory_entries
+                                 if directory_entry.name.endswith('.json') and directory_entry.is_file()
+                                 and directory_entry.stat().st_ctime < changed_before)
+            except FileNotFoundError:
+                continue
+
+        return paths
+
+    @staticmethod
+    def _archive_files(archive: ConfigurationFileArchive, archived_filenames: set, paths: List[str]) -> int:
+        # Files are removed only after a segment with them is written, files archived before are only removed
+        def load_data(path: str) -> Optional[Dict]:
+            try:
+                return load_json_file(path)
+            except ValueError:
+                logger.warning(f"Could not parse {path}, it is not archived")
+                return None
+
+        paths_to_archive = [path for path in paths if os.path.basename(path) not in archived_filenames]
+        configuration_files_data = bulk_loader.map(load_data, paths_to_archive)
+
+        filenames_and_data = [(os.path.basename(path), configuration_file_data)
+                              for path, configuration_file_data in zip(paths_to_archive, configuration_files_data)
+                              if configuration_file_data is not None]
+        archive.add(filenames_and_data)
+        archived_filenames.update(filename for filename, _ in filenames_and_data)
+
+        for path in paths:
+            if os.path.basename(path) in archived_filenames:
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+
+        return len(filenames_and_data)
+
+    def _archive_periodically(self):
+        while True:
+            time.sleep(Constants.RL_CONFIGURATIONS_ARCHIVE_INTERVAL_S)
+
+            try:
+                archived = self.archive_configuration_files(Constants.RL_CONFIGURATIONS_ARCHIVE_AFTER_DAYS * 24 * 3600)
+                logger.info(f"Archived {archived} configuration files")
+            except Exception:
+                logger.exception("Archiving configuration files failed")
+
+    def _get_directory_index(self, directory: str) -> DirectoryIndex:
+        directory_index = self._directory_indices.get(directory, None)
+
+        if directory_index is None:
+            with self._directory_indices_lock:
+                directory_index = self._directory_indices.setdefault(directory, DirectoryIndex(directory, '.json'))
+
+        return directory_index
 
     @staticmethod
     def _get_configuration_dir_absolute_path(filename: str, directory: str):
@@ -106,12 +987,433 @@ class JsonConfigurationFileGateway(ConfigurationFileGateway):
         return get_all_files_with_extension_in_directory(directory, '.json')
 
 
+class SqlConfigurationFileGateway(ConfigurationFileGateway):
+
+    def __init__(self):
+        super().__init__()
+        # last seen changed_at, and (filename, status, changed_at) of changes seen since it minus the lookback
+        self._watched_changed_at: Optional[datetime] = None
+        self._watched_changes = set()
+
+    def save(self, configuration_file: ConfigurationFile) -> Dict:
+        return self.save_many([configuration_file])[0]
+
+    def save_many(self, configuration_files: List[ConfigurationFile]) -> List[Dict]:
+        for attempt in range(Constants.CONFIGURATION_FILE_NAME_ATTEMPTS):
+            metadata, changes = self._add_records(configuration_files)
+
+            try:
+                db.session.commit()
+                break
+            except IntegrityError as error:
+                # e.g. other process generated the same id, the whole batch is added again under new ids
+                db.session.rollback()
+                if attempt == Constants.CONFIGURATION_FILE_NAME_ATTEMPTS - 1:
+                    logger.warning(f"Could not save {len(configuration_files)} configuration files: {error.orig}")
+                    return [{'error': f"Configuration file could not be saved: {error.orig}"}
+                            for _ in configuration_files]
+            except Exception:
+                db.session.rollback()
+                raise
+
+        self._remember_own_changes(changes)
+
+        for configuration_file in configuration_files:
+            self._statistics.add(Constants.UNPROCESSED_STATUS, configuration_file.algorithm,
+                                 configuration_file.get_environment_name())
+        self._publish_changes([(item['filename'], Constants.UNPROCESSED_STATUS) for item in metadata])
+
+        return metadata
+
+    def _add_records(self, configuration_files: List[ConfigurationFile]) -> Tuple[List[Dict], List[Tuple]]:
+        # adds records of the configuration files under newly generated filenames to the session, returns their
+        # metadata and changes
+        metadata = []
+        changes = []
+
+        for configuration_file in configuration_files:
+            filename = self._get_configuration_file_name(configuration_file)
+            configuration_file_as_dict = configuration_file.to_dict()
+            created_at = datetime.now()
+
+            db.session.add(ConfigurationFileRecord(
+                filename=filename,
+                status=Constants.UNPROCESSED_STATUS,
+                algorithm=configuration_file.algorithm,
+                environment=configuration_file.get_environment_name(),
+                created_at=created_at,
+                payload=json_codec.dumps(configuration_file.to_stored_dict(created_at)),
+                priority=configuration_file.priority,
+                changed_at=created_at
+            ))
+            metadata.append({
+                'id': self._get_configuration_file_id(filename),
+                'filename': filename,
+                'configuration': configuration_file_as_dict
+            })
+            changes.append((filename, Constants.UNPROCESSED_STATUS, created_at))
+
+        return metadata, changes
+
+    def get_all_unprocessed_configuration_files_data(self) -> List[Dict]:
+        return self._get_all_configuration_files_data_with_status(Constants.UNPROCESSED_STATUS)
+
+    def get_all_processing_configuration_files_data(self) -> List[Dict]:
+        return self._get_all_configuration_files_data_with_status(Constants.PROCESSING_STATUS)
+
+    def get_all_done_configuration_files_data(self) -> List[Dict]:
+        return self._get_all_configuration_files_data_with_status(Constants.DONE_STATUS)
+
+    def get_all_failed_configuration_files_data(self) -> List[Dict]:
+        return self._get_all_configuration_files_data_with_status(Constants.FAILED_STATUS)
+
+    def get_configuration_files_data_page(self, status: str, query: ConfigurationFileQuery) -> ConfigurationFilesPage:
+        records_query = db.session.query(
+            ConfigurationFileRecord.id, ConfigurationFileRecord.filename, ConfigurationFileRecord.payload
+        ).filter(ConfigurationFileRecord.status == status)
+
+        if query.cursor is not None:
+            records_query = records_query.filter(ConfigurationFileRecord.id > int(decode_cursor(query.cursor)))
+        if query.algorithm is not None:
+            records_query = records_query.filter(ConfigurationFileRecord.algorithm == query.algorithm)
+        if query.environment is not None:
+            records_query = records_query.filter(ConfigurationFileRecord.environment == query.environment)
+        if query.submitted_after is not None:
+            records_query = records_query.filter(ConfigurationFileRecord.created_at >= query.submitted_after)
+        if query.submitted_before is not None:
+            records_query = records_query.filter(ConfigurationFileRecord.created_at <= query.submitted_before)
+
+        records_query = records_query.order_by(ConfigurationFileRecord.id)
+        if query.limit is not None:
+            # one more row tells if there is a next page
+            records_query = records_query.limit(query.limit + 1)
+
+        records = records_query.all()
+
+        next_cursor = None
+        if query.limit is not None and len(records) > query.limit:
+            records = records[:query.limit]
+            next_cursor = encode_cursor(str(records[-1].id))
+
+        # payloads are never updated, so a row is identified by its id and filename
+        return ConfigurationFilesPage(
+            [json_codec.loads(record.payload) for record in records],
+            next_cursor,
+            [(ConfigurationFileRecord.__tablename__, record.id, record.filename) for record in records]
+        )
+
+    def change_status(self, filename: str, status_from: str, status_to: str) -> bool:
+        return self._update_status(filename, status_from, status_to)
+
+    def claim(self, count: int, lease_duration: float, worker: Optional[str] = None) -> List[Dict]:
+        # Leases are stored in the rows. A row is claimed by a conditional UPDATE of its status, so concurrent claimers
+        # in any process never claim the same row, and databases supporting SKIP LOCKED (e.g. PostgreSQL) let them
+        # skip candidates locked by each other instead of racing for them.
+        self._requeue_expired_leases_if_needed()
+        claimed = []
+
+        while len(claimed) < count:
+            records = db.session.query(
+                ConfigurationFileRecord.id, ConfigurationFileRecord.filename, ConfigurationFileRecord.algorithm,
+                ConfigurationFileRecord.environment, ConfigurationFileRecord.payload
+            ).filter(
+                ConfigurationFileRecord.status == Constants.UNPROCESSED_STATUS
+            ).order_by(
+                ConfigurationFileRecord.priority.desc(), ConfigurationFileRecord.created_at, ConfigurationFileRecord.id
+            ).limit(count - len(claimed)).with_for_update(skip_locked=True).all()
+
+            if not records:
+                db.session.commit()
+                break
+
+            claimed_records = []
+            changed_at = datetime.now()
+            for record in records:
+                lease = Lease(record.filename, uuid.uuid4().hex, worker, time.time() + lease_duration)
+                updated_rows = ConfigurationFileRecord.query.filter(
+                    ConfigurationFileRecord.id == record.id,
+                    ConfigurationFileRecord.status == Constants.UNPROCESSED_STATUS
+                ).update({
+                    ConfigurationFileRecord.status: Constants.PROCESSING_STATUS,
+                    ConfigurationFileRecord.lease_token: lease.token,
+                    ConfigurationFileRecord.lease_worker: worker,
+                    ConfigurationFileRecord.lease_expires_at: lease.expires_at,
+                    ConfigurationFileRecord.changed_at: changed_at
+                }, synchronize_session=False)
+
+                # 0 if other claimer took the row after it was selected
+                if updated_rows == 1:
+                    claimed_records.append((record, lease))
+
+            db.session.commit()
+            self._remember_own_changes([(record.filename, Constants.PROCESSING_STATUS, changed_at)
+                                        for record, _ in claimed_records])
+
+            for record, lease in claimed_records:
+                self._statistics.move(Constants.UNPROCESSED_STATUS, Constants.PROCESSING_STATUS, record.algorithm,
+                                      record.environment)
+                configuration_file_data, metadata = configuration_file_metadata.split_metadata(
+                    json_codec.loads(record.payload))
+                claimed.append({
+                    'id': self._get_configuration_file_id(record.filename),
+                    'filename': record.filename,
+                    'configuration': configuration_file_data,
+                    'priority': self._get_priority(metadata),
+                    'lease': self._lease_to_dict(lease)
+                })
+            self._publish_changes([(record.filename, Constants.PROCESSING_STATUS) for record, _ in claimed_records])
+
+        return claimed
+
+    def renew_lease(self, filename: str, lease_token: str, lease_duration: float) -> Optional[Dict]:
+        expires_at = time.time() + lease_duration
+        updated_rows = ConfigurationFileRecord.query.filter(
+            *self._get_valid_lease_conditions(filename, lease_token)
+        ).update({ConfigurationFileRecord.lease_expires_at: expires_at}, synchronize_session=False)
+        db.session.commit()
+
+        if updated_rows != 1:
+            return None
+
+        record = db.session.query(ConfigurationFileRecord.lease_worker).filter(
+            ConfigurationFileRecord.filename == filename).first()
+
+        return self._lease_to_dict(Lease(filename, lease_token, record.lease_worker, expires_at))
+
+    def requeue_expired_leases(self) -> int:
+        expired_records = db.session.query(
+            ConfigurationFileRecord.filename, ConfigurationFileRecord.lease_token
+        ).filter(
+            ConfigurationFileRecord.status == Constants.PROCESSING_STATUS,
+            ConfigurationFileRecord.lease_expires_at < time.time()
+        ).all()
+        requeued = 0
+
+        for record in expired_records:
+            # the lease can be renewed, or requeued by other process, after it was listed
+            if self._update_status(record.filename, Constants.PROCESSING_STATUS, Constants.UNPROCESSED_STATUS,
+                                   ConfigurationFileRecord.lease_token == record.lease_token,
+                                   ConfigurationFileRecord.lease_expires_at < time.time()):
+                requeued += 1
+
+        return requeued
+
+    def _finish_claim(self, filename: str, lease_token: str, status_to: str) -> bool:
+        return self._update_status(filename, Constants.PROCESSING_STATUS, status_to,
+                                   *self._get_valid_lease_conditions(filename, lease_token))
+
+    @staticmethod
+    def _get_valid_lease_conditions(filename: str, lease_token: str) -> List:
+        return [
+            ConfigurationFileRecord.filename == filename,
+            ConfigurationFileRecord.status == Constants.PROCESSING_STATUS,
+            ConfigurationFileRecord.lease_token == lease_token,
+            ConfigurationFileRecord.lease_expires_at >= time.time()
+        ]
+
+    def _update_status(self, filename: str, status_from: str, status_to: str, *conditions) -> bool:
+        # a status change ends the lease of the configuration file
+        changed_at = datetime.now()
+        updated_rows = ConfigurationFileRecord.query.filter(
+            ConfigurationFileRecord.filename == filename,
+            ConfigurationFileRecord.status == status_from,
+            *conditions
+        ).update({
+            ConfigurationFileRecord.status: status_to,
+            ConfigurationFileRecord.lease_token: None,
+            ConfigurationFileRecord.lease_worker: None,
+            ConfigurationFileRecord.lease_expires_at: None,
+            ConfigurationFileRecord.changed_at: changed_at
+        }, synchronize_session=False)
+        db.session.commit()
+
+        if updated_rows != 1:
+            return False
+
+        self._remember_own_changes([(filename, status_to, changed_at)])
+
+        record = db.session.query(ConfigurationFileRecord.algorithm, ConfigurationFileRecord.environment).filter(
+            ConfigurationFileRecord.filename == filename).first()
+        self._statistics.move(status_from, status_to, record.algorithm, record.environment)
+        self._publish_changes([(filename, status_to)])
+
+        return True
+
+    def _count_configuration_files(self) -> Counter:
+        # reconciliation can run in a background thread, outside of the request context
+        with app.app_context():
+            rows = db.session.query(
+                ConfigurationFileRecord.status, ConfigurationFileRecord.algorithm, ConfigurationFileRecord.environment,
+                func.count(ConfigurationFileRecord.id)
+            ).group_by(
+                ConfigurationFileRecord.status, ConfigurationFileRecord.algorithm, ConfigurationFileRecord.environment
+            ).all()
+
+        return Counter({(status, algorithm, environment): count for status, algorithm, environment, count in rows})
+
+    @staticmethod
+    def _get_all_configuration_files_data_with_status(status: str) -> List[Dict]:
+        records = db.session.query(ConfigurationFileRecord.payload).filter(
+            ConfigurationFileRecord.status == status).order_by(ConfigurationFileRecord.id).all()
+
+        return [json_codec.loads(record.payload) for record in records]
+
+    def _get_configuration_file_names_and_data_loader(self, status: str) \
+            -> Tuple[List[str], Callable[[str], Optional[Dict]]]:
+        filenames = [filename for filename, in db.session.query(ConfigurationFileRecord.filename).filter(
+            ConfigurationFileRecord.status == status)]
+
+        return filenames, self._get_data_loader(status)
+
+    def _get_data_loader(self, status: str) -> Callable[[str], Optional[Dict]]:
+        def load_data(filename: str) -> Optional[Dict]:
+            record = db.session.query(ConfigurationFileRecord.payload).filter(
+                ConfigurationFileRecord.filename == filename).first()
+
+            return None if record is None else json_codec.loads(record.payload)
+
+        return load_data
+
+    def _find_external_changes(self) -> List[Tuple[str, str]]:
+        # Rows are stamped with changed_at by every insert and status change of the gateway, so changes made by other
+        # processes are found by reading rows changed since the last seen change (minus CHANGE_FEED_SQL_LOOKBACK_S)
+        # on the changed_at index, instead of listing all rows. Changes seen before, or made by this process, are
+        # skipped. Rows changed by tools which do not set changed_at are not found. The first look only remembers.
+        first_look = self._watched_changed_at is None
+        if first_look:
+            self._watched_changed_at = db.session.scalar(select(func.max(ConfigurationFileRecord.changed_at))) or \
+                datetime.now()
+
+        records = db.session.query(
+            ConfigurationFileRecord.filename, ConfigurationFileRecord.status, ConfigurationFileRecord.changed_at
+        ).filter(
+            ConfigurationFileRecord.changed_at >= self._watched_changed_at - timedelta(
+                seconds=Constants.CHANGE_FEED_SQL_LOOKBACK_S)
+        ).order_by(ConfigurationFileRecord.changed_at, ConfigurationFileRecord.id).all()
+
+        changes = [] if first_look else [(record.filename, record.status) for record in records
+                                         if tuple(record) not in self._watched_changes]
+
+        self._watched_changes = {tuple(record) for record in records}
+        if records:
+            self._watched_changed_at = max(self._watched_changed_at, records[-1].changed_at)
+
+        return changes
+
+    def _remember_own_changes(self, changes: List[Tuple[str, str, datetime]]):
+        # changes of this process are published by _publish_changes, remembered only while somebody watches
+        with self._watch_lock:
+            if time.monotonic() - self._watched_at < Constants.CHANGE_FEED_SQL_LOOKBACK_S:
+                self._watched_changes.update(changes)
+
+
+class JournalConfigurationFileGateway(ConfigurationFileGateway):
+    # Stores configuration files in an append-only journal instead of one file per configuration
+
+    def __init__(self):
+        super().__init__()
+        self._journal = ConfigurationJournal(Constants.RL_CONFIGURATIONS_JOURNAL,
+                                             Constants.JOURNAL_COMPACTION_THRESHOLD)
+
+    def save(self, configuration_file: ConfigurationFile) -> Dict:
+        return self.save_many([configuration_file])[0]
+
+    def save_many(self, configuration_files: List[ConfigurationFile]) -> List[Dict]:
+        entries = []
+
+        for configuration_file in configuration_files:
+            created_at = datetime.now()
+            entries.append(JournalEntry(
+                filename=self._get_configuration_file_name(configuration_file),
+                status=Constants.UNPROCESSED_STATUS,
+                data=configuration_file.to_stored_dict(created_at),
+                created_at=created_at.isoformat()
+            ))
+
+        self._journal.add(entries)
+
+        for configuration_file in configuration_files:
+            self._statistics.add(Constants.UNPROCESSED_STATUS, configuration_file.algorithm,
+                                 configuration_file.get_environment_name())
+        self._publish_changes([(entry.filename, Constants.UNPROCESSED_STATUS) for entry in entries])
+
+        return [{'id': self._get_configuration_file_id(entry.filename), 'filename': entry.filename,
+                 'configuration': configuration_file.to_dict()}
+                for entry, configuration_file in zip(entries, configuration_files)]
+
+    def get_all_unprocessed_configuration_files_data(self) -> List[Dict]:
+        return self._get_all_configuration_files_data_with_status(Constants.UNPROCESSED_STATUS)
+
+    def get_all_processing_configuration_files_data(self) -> List[Dict]:
+        return self._get_all_configuration_files_data_with_status(Constants.PROCESSING_STATUS)
+
+    def get_all_done_configuration_files_data(self) -> List[Dict]:
+        return self._get_all_configuration_files_data_with_status(Constants.DONE_STATUS)
+
+    def get_all_failed_configuration_files_data(self) -> List[Dict]:
+        return self._get_all_configuration_files_data_with_status(Constants.FAILED_STATUS)
+
+    def get_configuration_files_data_page(self, status: str, query: ConfigurationFileQuery) -> ConfigurationFilesPage:
+        return self._get_configuration_files_data_page_from_filenames(
+            self._journal.get_sorted_filenames(status), self._load_data, query, self._get_key
+        )
+
+    def change_status(self, filename: str, status_from: str, status_to: str) -> bool:
+        if not self._journal.change_status(filename, status_from, status_to):
+            return False
+
+        algorithm, environment = self._get_algorithm_and_environment(filename, self._load_data)
+        self._statistics.move(status_from, status_to, algorithm, environment)
+        self._publish_changes([(filename, status_to)])
+
+        return True
+
+    @staticmethod
+    def _get_leases_directory() -> str:
+        # leases are kept next to the journal, so processes sharing the journal share them
+        return f"{Constants.RL_CONFIGURATIONS_JOURNAL}/{Constants.RL_CONFIGURATIONS_LEASES_SUBDIRECTORY}"
+
+    def _count_configuration_files(self) -> Counter:
+        counters = Counter()
+
+        for entry in self._journal.get_entries():
+            algorithm, environment = self._get_algorithm_and_environment(entry.filename, self._load_data)
+            counters[(entry.status, algorithm, environment)] += 1
+
+        return counters
+
+    def _get_all_configuration_files_data_with_status(self, status: str) -> List[Dict]:
+        data = (self._load_data(filename) for filename in self._journal.get_sorted_filenames(status))
+
+        return [configuration_file_data for configuration_file_data in data if configuration_file_data is not None]
+
+    def _get_configuration_file_names_and_data_loader(self, status: str) \
+            -> Tuple[List[str], Callable[[str], Optional[Dict]]]:
+        return self._journal.get_sorted_filenames(status), self._load_data
+
+    def _load_data(self, filename: str) -> Optional[Dict]:
+        entry = self._journal.get_entry(filename)
+
+        return None if entry is None else entry.data
+
+    @staticmethod
+    def _get_key(filename: str) -> Hashable:
+        # data of a configuration file never changes in the journal
+        return Constants.RL_CONFIGURATIONS_JOURNAL, filename
+
+
 class ConfigurationFileGatewayFactory:
     CONFIGURATION_FILE_GATEWAY_MAPPING = {
         'json': JsonConfigurationFileGateway,
+        'sql': SqlConfigurationFileGateway,
+        'journal': JournalConfigurationFileGateway,
         'default': JsonConfigurationFileGateway
     }
 
+    # Gateways keep in-process state (e.g. directory indices), so one instance of each class is shared by requests
+    _gateways = {}
+    _gateways_lock = threading.Lock()
+
     @staticmethod
     def get_gateway(gateway_type: str) -> ConfigurationFileGateway:
         configuration_file_gateway_class = ConfigurationFileGatewayFactory.CONFIGURATION_FILE_GATEWAY_MAPPING.get(
@@ -120,8 +1422,17 @@ class ConfigurationFileGatewayFactory:
         if configuration_file_gateway_class is None:
             raise ValueError(f"Unknown gateway type: {gateway_type}")
 
-        return configuration_file_gateway_class()
+        gateway = ConfigurationFileGatewayFactory._gateways.get(configuration_file_gateway_class, None)
+        if gateway is None:
+            with ConfigurationFileGatewayFactory._gateways_lock:
+                gateway = ConfigurationFileGatewayFactory._gateways.get(configuration_file_gateway_class, None)
+                if gateway is None:
+                    gateway = configuration_file_gateway_class()
+                    gateway.start_statistics_reconciliation()
+                    ConfigurationFileGatewayFactory._gateways[configuration_file_gateway_class] = gateway
+
+        return gateway
 
     @staticmethod
     def get_default_gateway() -> ConfigurationFileGateway:
-        return ConfigurationFileGatewayFactory.get_gateway('default')
+        return ConfigurationFileGatewayFactory.get_gateway(Constants.CONFIGURATION_FILE_GATEWAY)
@@ -4,10 +4,91 @@ import os
 class Constants:
     SECRET_KEY = os.environ.get("FLASK_SECRET_KEY")
     SQLALCHEMY_DATABASE_URI = os.environ.get("SQLALCHEMY_DATABASE_URI")
+    # one of ConfigurationFileGatewayFactory.CONFIGURATION_FILE_GATEWAY_MAPPING keys
+    CONFIGURATION_FILE_GATEWAY = os.environ.get("CONFIGURATION_FILE_GATEWAY", "default")
     RL_CONFIGURATIONS = "/rl_configurations"
     RL_CONFIGURATIONS_FAILED_SUBDIRECTORY = 'error'
     RL_CONFIGURATIONS_DONE_SUBDIRECTORY = 'done'
     RL_CONFIGURATIONS_PROCESSING_SUBDIRECTORY = 'processing'
+    RL_CONFIGURATIONS_JOURNAL = os.environ.get("RL_CONFIGURATIONS_JOURNAL", "/rl_configurations_journal")
+    # number of journal records, after which the journal is compacted into a snapshot
+    JOURNAL_COMPACTION_THRESHOLD = 10000
+    # saves arriving within this window share fsyncs, 0 commits every save on its own
+    RL_CONFIGURATIONS_GROUP_COMMIT_WINDOW_MS = float(os.environ.get("RL_CONFIGURATIONS_GROUP_COMMIT_WINDOW_MS", "2"))
+    # groups are made durable by syncfs of the whole filesystem (Linux), instead of an fsync per file, which can cost
+    # more on filesystems with much unrelated write traffic
+    RL_CONFIGURATIONS_GROUP_COMMIT_SYNCFS = os.environ.get("RL_CONFIGURATIONS_GROUP_COMMIT_SYNCFS", "1") == "1"
+    # keep in-process indices of configuration directories, instead of reading every file on every listing
+    RL_CONFIGURATIONS_INDEXED = os.environ.get("RL_CONFIGURATIONS_INDEXED", "1") == "1"
+    # keep configuration files in {status directory}/{submission date}/{filename hash prefix} directories,
+    # existing flat directories are moved with `flask shard-configurations`
+    RL_CONFIGURATIONS_SHARDED = os.environ.get("RL_CONFIGURATIONS_SHARDED", "0") == "1"
+    # number of hex digits of filename hash naming shard directories, 2 gives 256 directories per day
+    RL_CONFIGURATIONS_SHARD_PREFIX_LENGTH = 2
+    # files which got done or failed status longer ago than this are moved to compressed archive segments, 0 disables it
+    RL_CONFIGURATIONS_ARCHIVE_AFTER_DAYS = float(os.environ.get("RL_CONFIGURATIONS_ARCHIVE_AFTER_DAYS", "0"))
+    RL_CONFIGURATIONS_ARCHIVE_SUBDIRECTORY = 'archive'
+    RL_CONFIGURATIONS_ARCHIVE_INTERVAL_S = 3600
+    # configuration files compressed together, a lookup decompresses one block
+    RL_CONFIGURATIONS_ARCHIVE_BLOCK_SIZE = 64
+    RL_CONFIGURATIONS_ARCHIVE_SEGMENT_MAX_SIZE = 10000
+    # leases of claimed configuration files, shared by all processes using the same RL_CONFIGURATIONS
+    RL_CONFIGURATIONS_LEASES_SUBDIRECTORY = '.leases'
+    LEASE_DEFAULT_DURATION_S = 3600
+    LEASE_MAX_DURATION_S = 7 * 24 * 3600
+    # expired leases are looked for by claims at most once per this interval
+    LEASE_REQUEUE_INTERVAL_S = 10
+    CLAIM_MAX_COUNT = 100
+    CONFIGURATION_FILE_NAMES_CACHE_SIZE = 100000
+    # names generated for a configuration file before giving up, when other process generated the same id
+    CONFIGURATION_FILE_NAME_ATTEMPTS = 3
+    UNPROCESSED_STATUS = 'unprocessed'
+    PROCESSING_STATUS = 'processing'
+    DONE_STATUS = 'done'
+    FAILED_STATUS = 'failed'
+    CONFIGURATION_FILE_STATUSES = {UNPROCESSED_STATUS, PROCESSING_STATUS, DONE_STATUS, FAILED_STATUS}
+    ARCHIVED_STATUSES = {DONE_STATUS, FAILED_STATUS}
+    # algorithm config keys holding environment name, depending on algorithm
+    ENVIRONMENT_NAME_KEYS = ('env_name', 'env')
     KNOWN_ALGORITHMS = {'acer', 'acerac', 'fastacer', 'fastacerax', 'PPO', 'SAC'}
     REQUIRED_CONFIG_FIELDS = {"algorithm", "algorithm_config"}
     TOKEN_EXPIRATION_TIME_IN_MINUTES = 30
+    SCHEDULE_BATCH_MAX_SIZE = 5000
+    SCHEDULE_BATCH_VALIDATION_WORKERS = 4
+    SWEEP_MAX_CONFIGURATIONS = 10000
+    SWEEP_SAVE_CHUNK_SIZE = 500
+    SWEEP_MODES = {'grid', 'random'}
+    VALIDATION_CACHE_SIZE = 10000
+    # listed configuration files kept as ConfigurationFile objects, bytes are approximated by JSON size of the files
+    CONFIGURATION_FILE_CACHE_MAX_ENTRIES = 100000
+    CONFIGURATION_FILE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+    LISTING_MAX_PAGE_SIZE = 1000
+    STREAMING_PAGE_SIZE = 100
+    RESULTS_YIELD_PER = 1000
+    RESULTS_MAX_PAGE_SIZE = 1000
+    RESULTS_BATCH_MAX_SIZE = 10000
+    REQUIRED_RESULT_FIELDS = ('best_mean_result', 'results_subdirectory', 'environment', 'configuration', 'algorithm')
+    # best results kept for every environment, algorithm and their pair
+    LEADERBOARD_SIZE = 100
+    LEADERBOARD_REFRESH_INTERVAL_S = 5
+    # serialized /results responses, per URL and results version
+    RESULTS_RESPONSE_CACHE_MAX_ENTRIES = 1000
+    RESULTS_RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+    # /results/aggregate groups results by these fields, dates by one of the buckets
+    RESULTS_AGGREGATE_GROUPS = ('environment', 'algorithm', 'date')
+    RESULTS_AGGREGATE_DATE_BUCKETS = ('hour', 'day', 'week', 'month', 'year')
+    RESULTS_AGGREGATE_DEFAULT_DATE_BUCKET = 'day'
+    RESULTS_AGGREGATE_DEFAULT_PERCENTILES = (50, 90)
+    RESULTS_AGGREGATE_MAX_PERCENTILES = 10
+    STATISTICS_RECONCILIATION_INTERVAL_S = 60
+    # changes of configuration files kept for readers of /scheduled/changes
+    CHANGE_FEED_MAX_CHANGES = 10000
+    # changes made by other processes are looked for at most once per this interval, only while somebody waits
+    CHANGE_FEED_WATCH_INTERVAL_S = 1
+    # the SQL gateway looks again at rows changed this long before the last seen change, for transactions committed
+    # after their changed_at stamp and clocks of other hosts
+    CHANGE_FEED_SQL_LOOKBACK_S = 10
+    CHANGE_FEED_DEFAULT_TIMEOUT_S = 20
+    CHANGE_FEED_MAX_TIMEOUT_S = 60
+    # threads reading configuration files in parallel
+    BULK_LOADER_WORKERS = 8
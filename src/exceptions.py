@@ -8,3 +8,7 @@ class NotValidAlgorithmConfigException(Exception):
 
 class NotAllRequiredConfigurationFields(Exception):
     pass
+
+
+class NotValidSweepException(Exception):
+    pass
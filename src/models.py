@@ -1,5 +1,5 @@
-import json
 from abc import ABC, abstractmethod
+from datetime import datetime
 from typing import Dict
 
 from sqlalchemy import ForeignKey
@@ -7,8 +7,9 @@ from sqlalchemy import ForeignKey
 from src import db, Constants
 from src.exceptions import NotValidAlgorithmConfigException, \
     NotAllRequiredConfigurationFields, UnknownAlgorithmException
+from src.utils import json_codec, configuration_file_metadata
 from src.utils.data_validators import ParserFactory
-from src.utils.utils import get_args_as_list_of_strings, generate_random_id
+from src.utils.utils import generate_random_id
 
 
 class Algorithm(db.Model):
@@ -32,6 +33,14 @@ class TrainingResults(db.Model):
     date = db.Column(db.TIMESTAMP(), nullable=False)
     algorithm = db.Column(db.Integer, ForeignKey('algorithm.id'))
 
+    # serve ORDER BY and keyset conditions of TrainingResultsRepository pages (scanned backwards for descending order),
+    # created for existing databases with `flask create-results-indexes`
+    __table_args__ = (
+        db.Index('ix_training_results_environment_best_mean_result', 'environment', 'best_mean_result', 'result_id'),
+        db.Index('ix_training_results_algorithm_environment_best_mean_result',
+                 'algorithm', 'environment', 'best_mean_result', 'result_id'),
+    )
+
     def __repr__(self):
         return f"""<TrainingResults(best_mean_result={self.best_mean_result},
                 results_subdirectory={self.results_subdirectory},
@@ -47,11 +56,29 @@ class TrainingResults(db.Model):
             "best_mean_result": self.best_mean_result,
             "results_subdirectory": self.results_subdirectory,
             "environment": self.environment,
-            "configuration": json.loads(self.algorithm_config),
+            "configuration": json_codec.loads(self.algorithm_config),
             "date": self.date,
             "algorithm": self.algorithm_object.name
         }
 
+    @staticmethod
+    def row_to_dict(row, raw_configuration: bool = False) -> Dict:
+        # to_dict of a row selected by TrainingResultsRepository._get_result_rows_query, unpacked as a tuple, which is
+        # several times faster than reading columns by name. raw_configuration embeds the stored algorithm_config JSON
+        # in responses as it is, without decoding it.
+        result_id, best_mean_result, results_subdirectory, environment, algorithm_config, date, algorithm_name = row
+
+        return {
+            "result_id": result_id,
+            "best_mean_result": best_mean_result,
+            "results_subdirectory": results_subdirectory,
+            "environment": environment,
+            "configuration": json_codec.RawJSON(algorithm_config) if raw_configuration else json_codec.loads(
+                algorithm_config),
+            "date": date,
+            "algorithm": algorithm_name
+        }
+
 
 class Users(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -61,25 +88,64 @@ class Users(db.Model):
     admin = db.Column(db.Boolean)
 
 
+class ConfigurationFileRecord(db.Model):
+    # Configuration file stored by SqlConfigurationFileGateway
+    __tablename__ = 'configuration_file'
+    id = db.Column(db.Integer, primary_key=True)
+    filename = db.Column(db.String, unique=True, nullable=False)
+    status = db.Column(db.String(16), nullable=False)
+    algorithm = db.Column(db.String(32), nullable=False)
+    environment = db.Column(db.String, nullable=False)
+    created_at = db.Column(db.TIMESTAMP(), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    # claim order and lease of a claimed configuration file (expiry as a Unix timestamp), see claim of the gateway
+    priority = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    lease_token = db.Column(db.String(32), nullable=True)
+    lease_worker = db.Column(db.String, nullable=True)
+    lease_expires_at = db.Column(db.Float, nullable=True)
+    # time of insertion or of the last status change, for finding changes made by other processes
+    changed_at = db.Column(db.TIMESTAMP(), nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_configuration_file_status_id', 'status', 'id'),
+        db.Index('ix_configuration_file_status_algorithm', 'status', 'algorithm', 'id'),
+        db.Index('ix_configuration_file_status_environment', 'status', 'environment', 'id'),
+        db.Index('ix_configuration_file_status_created_at', 'status', 'created_at'),
+        db.Index('ix_configuration_file_claim_order', 'status', 'priority', 'created_at', 'id'),
+        db.Index('ix_configuration_file_status_lease_expires_at', 'status', 'lease_expires_at'),
+        db.Index('ix_configuration_file_changed_at', 'changed_at'),
+    )
+
+    def __repr__(self):
+        return f"<ConfigurationFileRecord(filename={self.filename}, status={self.status})>"
+
+
 class ConfigurationFile(ABC):
-    def __init__(self, algorithm: str, algorithm_config: Dict, parser_factory: ParserFactory):
+    def __init__(self, algorithm: str, algorithm_config: Dict, parser_factory: ParserFactory, trusted: bool = False):
         self._algorithm = None
         self._algorithm_config = None
+        # trusted configs were already validated elsewhere, so validation is skipped while constructing the object
+        self._trusted = trusted
+        # configuration files with higher priority are claimed first, it is stored in metadata, not in to_dict()
+        self.priority = 0
 
         self.algorithm = algorithm
 
-        assert hasattr(parser_factory, 'get_parser'), "Parser Factory must have a method called 'get_parser'"
+        assert hasattr(parser_factory, 'get_validator'), "Parser Factory must have a method called 'get_validator'"
         self._parser_factory = parser_factory
 
         self.algorithm_config = algorithm_config
+        self._trusted = False
 
     @classmethod
-    def from_dict(cls, data: Dict, parser_factory: ParserFactory) -> 'ConfigurationFile':
+    def from_dict(cls, data: Dict, parser_factory: ParserFactory, trusted: bool = False) -> 'ConfigurationFile':
         if Constants.REQUIRED_CONFIG_FIELDS != set(data.keys()):
             raise NotAllRequiredConfigurationFields(f"Config must have fields: {Constants.REQUIRED_CONFIG_FIELDS}")
+        if not isinstance(data["algorithm_config"], dict):
+            raise NotValidAlgorithmConfigException("algorithm_config must be an object")
 
         configuration_file = cls(
-            data["algorithm"], data["algorithm_config"], parser_factory
+            data["algorithm"], data["algorithm_config"], parser_factory, trusted
         )
 
         return configuration_file
@@ -93,6 +159,14 @@ class ConfigurationFile(ABC):
             "algorithm_config": self.algorithm_config
         }
 
+    def to_stored_dict(self, submitted_at: datetime) -> Dict:
+        # to_dict() with metadata, which lets ConfigurationFileFactory.from_stored_dict skip validation
+        return configuration_file_metadata.add_metadata(self.to_dict(), self.get_schema_version(), submitted_at,
+                                                        self.priority)
+
+    def get_schema_version(self) -> str:
+        return self._parser_factory.get_validator(self.algorithm).schema_version
+
     @property
     def algorithm(self) -> str:
         return self._algorithm
@@ -110,13 +184,12 @@ class ConfigurationFile(ABC):
     def algorithm_config(self, config: Dict):
         assert self.algorithm is not None
 
-        parser = self._parser_factory.get_parser(self.algorithm)
-        config_as_list = get_args_as_list_of_strings(config)
-
-        parser.parse_args(config_as_list)
+        if not self._trusted:
+            validator = self._parser_factory.get_validator(self.algorithm)
+            error_message = validator.validate(config)
 
-        if parser.error_message:
-            raise NotValidAlgorithmConfigException(parser.error_message)
+            if error_message:
+                raise NotValidAlgorithmConfigException(error_message)
 
         self._algorithm_config = config
 
@@ -141,13 +214,16 @@ class AcerAceracConfigurationFile(ConfigurationFile):
 
     @ConfigurationFile.algorithm_config.setter
     def algorithm_config(self, config: Dict):
-        config = self._add_random_experiment_name(config)
-
+        # validated before a random experiment name is added, so identical submissions share a validation cache entry
         super(__class__, self.__class__).algorithm_config.__set__(self, config)
 
+        self._algorithm_config = self._add_random_experiment_name(self._algorithm_config)
+
     @staticmethod
     def _add_random_experiment_name(algorithm_config: Dict) -> Dict:
         if "experiment_name" not in algorithm_config.keys():
+            # copy, because the passed config can be shared (e.g. by the directory index of a gateway)
+            algorithm_config = dict(algorithm_config)
             random_id = generate_random_id()
             algorithm_config['experiment_name'] = random_id
 
@@ -191,16 +267,16 @@ class ConfigurationFileFactory():
 
     @staticmethod
     def get_configuration_file(algorithm: str, algorithm_data: Dict,
-                               parser_factory: ParserFactory) -> ConfigurationFile:
+                               parser_factory: ParserFactory, trusted: bool = False) -> ConfigurationFile:
         configuration_file_class = ConfigurationFileFactory.CONFIGURATION_FILE_MAPPING.get(algorithm, None)
 
         if configuration_file_class is None:
             raise UnknownAlgorithmException(
                 f"Algorithm must be one of values: {Constants.KNOWN_ALGORITHMS}, not {algorithm}")
-        return configuration_file_class(algorithm, algorithm_data, parser_factory)
+        return configuration_file_class(algorithm, algorithm_data, parser_factory, trusted)
 
     @staticmethod
-    def from_dict(data: Dict, parser_factory: ParserFactory) -> ConfigurationFile:
+    def from_dict(data: Dict, parser_factory: ParserFactory, trusted: bool = False) -> ConfigurationFile:
         algorithm = data.get("algorithm", None)
 
         if algorithm is None:
@@ -211,4 +287,23 @@ class ConfigurationFileFactory():
             raise UnknownAlgorithmException(
                 f"Algorithm must be one of values: {Constants.KNOWN_ALGORITHMS}, not {algorithm}")
 
-        return configuration_file_class.from_dict(data, parser_factory)
+        return configuration_file_class.from_dict(data, parser_factory, trusted)
+
+    @staticmethod
+    def from_stored_dict(stored_data: Dict, parser_factory: ParserFactory) -> ConfigurationFile:
+        # Reads dicts created by ConfigurationFile.to_stored_dict, configs are validated again only if they were
+        # modified or parser definitions changed since they were stored
+        data, metadata = configuration_file_metadata.split_metadata(stored_data)
+
+        algorithm = data.get("algorithm", None)
+        trusted = False
+
+        if metadata is not None and algorithm in ConfigurationFileFactory.CONFIGURATION_FILE_MAPPING:
+            schema_version = parser_factory.get_validator(algorithm).schema_version
+            trusted = configuration_file_metadata.is_trusted(data, metadata, schema_version)
+
+        configuration_file = ConfigurationFileFactory.from_dict(data, parser_factory, trusted)
+        if metadata is not None:
+            configuration_file.priority = metadata.get('priority', 0)
+
+        return configuration_file
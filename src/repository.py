@@ -1,11 +1,19 @@
+from datetime import datetime
 from functools import lru_cache
-from typing import List, Dict
+from itertools import groupby
+from typing import List, Dict, Tuple, Optional, Iterator, Hashable, Iterable
 
-from sqlalchemy import desc
+from sqlalchemy import desc, tuple_, func, select, insert
+from sqlalchemy.engine import Row
 
-from src.configuration_file_gateway import ConfigurationFileGateway
+from src import Constants, db
+from src.configuration_file_gateway import ConfigurationFileGateway, ConfigurationFileQuery
 from src.models import Algorithm, TrainingResults, Users, ConfigurationFile, ConfigurationFileFactory
+from src.utils import json_codec
+from src.utils.configuration_file_cache import ConfigurationFileCache
 from src.utils.data_validators import ParserFactory
+from src.utils.leaderboard import Leaderboard, LeaderboardRow
+from src.utils.utils import encode_cursor, decode_cursor, get_percentile
 
 
 class UsersRepository:
@@ -19,7 +27,9 @@ class UsersRepository:
 
 
 class AlgorithmRepository:
-    # There are only 4 algorithms in the database, and they never change
+    # There are only a few algorithms in the database, and they rarely change
+    _algorithm_ids_by_name: Dict[str, int] = {}
+
     @staticmethod
     @lru_cache(maxsize=4)
     def get_algorithm_by_name(name: str) -> Algorithm:
@@ -30,27 +40,311 @@ class AlgorithmRepository:
     def get_algorithm_by_id(algorithm_id: int):
         return Algorithm.query.get(algorithm_id)
 
+    @staticmethod
+    def get_algorithm_ids_by_name(names: Iterable[str] = ()) -> Dict[str, int]:
+        # ids of all algorithms, loaded again if any of names is missing, so algorithms added later are found
+        algorithm_ids_by_name = AlgorithmRepository._algorithm_ids_by_name
+
+        if not algorithm_ids_by_name or not algorithm_ids_by_name.keys() >= set(names):
+            algorithm_ids_by_name = {name: algorithm_id
+                                     for algorithm_id, name in db.session.query(Algorithm.id, Algorithm.name)}
+            AlgorithmRepository._algorithm_ids_by_name = algorithm_ids_by_name
+
+        return algorithm_ids_by_name
+
 
 class TrainingResultsRepository:
+    # best results per environment and algorithm, kept up to date from rows inserted since the last refresh
+    leaderboard = Leaderboard(Constants.LEADERBOARD_SIZE, Constants.LEADERBOARD_REFRESH_INTERVAL_S)
+
     @staticmethod
     def get_all_results():
-        return TrainingResults.query.order_by(
-            desc(TrainingResults.environment),
-            desc(TrainingResults.best_mean_result)
-        ).all()
+        return TrainingResultsRepository._get_all_results_query().all()
 
     @staticmethod
     def get_results_for_algorithm(algorithm_id: int):
-        return TrainingResults.query.filter(TrainingResults.algorithm == algorithm_id).order_by(
-            desc(TrainingResults.environment), desc(TrainingResults.best_mean_result)).all()
+        return TrainingResultsRepository._get_results_for_algorithm_query(algorithm_id).all()
 
     @staticmethod
     def get_results_for_environment(environment: str):
-        return TrainingResults.query.filter(TrainingResults.environment == environment).order_by(
-            desc(TrainingResults.best_mean_result)).all()
+        return TrainingResultsRepository._get_results_for_environment_query(environment).all()
+
+    # *_page methods return up to limit results after the after cursor, and the cursor of the next page (None for the
+    # last page). Pages continue from the last returned row (keyset pagination), so every page costs the same.
+    # Cursors are not valid between different queries, ValueError is raised for not valid cursors.
+    # *_page, iterate_* and get_leaderboard return rows of the needed columns with the algorithm name joined in the same
+    # statement (see _get_result_rows_query), serialized by TrainingResults.row_to_dict, instead of ORM objects.
+    @staticmethod
+    def get_all_results_page(limit: Optional[int], after: Optional[str]) -> Tuple[List[Row], Optional[str]]:
+        return TrainingResultsRepository._get_page(TrainingResultsRepository._get_all_results_query(
+            after, TrainingResultsRepository._get_result_rows_query()), limit)
+
+    @staticmethod
+    def get_results_for_algorithm_page(algorithm_id: int, limit: Optional[int],
+                                       after: Optional[str]) -> Tuple[List[Row], Optional[str]]:
+        return TrainingResultsRepository._get_page(TrainingResultsRepository._get_results_for_algorithm_query(
+            algorithm_id, after, TrainingResultsRepository._get_result_rows_query()), limit)
+
+    @staticmethod
+    def get_results_for_environment_page(environment: str, limit: Optional[int],
+                                         after: Optional[str]) -> Tuple[List[Row], Optional[str]]:
+        return TrainingResultsRepository._get_page(TrainingResultsRepository._get_results_for_environment_query(
+            environment, after, TrainingResultsRepository._get_result_rows_query()), limit)
+
+    @staticmethod
+    def insert_many(results: List[Dict]) -> List[int]:
+        # Results are dicts of TrainingResults column values. They are inserted in one transaction by a single
+        # INSERT ... RETURNING statement executed with many VALUES rows at a time (insertmanyvalues of SQLAlchemy, for
+        # PostgreSQL and SQLite alike), instead of a statement per row. result_ids are returned in the order of results.
+        # Nothing is inserted if inserting any of them fails.
+        if not results:
+            return []
+
+        try:
+            statement = insert(TrainingResults).returning(TrainingResults.result_id, sort_by_parameter_order=True)
+            result_ids = db.session.scalars(statement, results).all()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        return list(result_ids)
+
+    @staticmethod
+    def get_results_version() -> Tuple[Optional[int], int]:
+        # Highest result_id and number of results, both read from the primary key in one statement. Every committed
+        # insert changes the number, also when it commits after one with a higher result_id, so responses built from
+        # results change only with the version. (None, 0) for an empty table.
+        return tuple(db.session.execute(select(func.max(TrainingResults.result_id), func.count())).one())
+
+    @staticmethod
+    def get_leaderboard(environment: Optional[str], algorithm_id: Optional[int], limit: int,
+                        results_version: Optional[Hashable] = None) -> List[Row]:
+        # up to limit (at most leaderboard size) best results, environment or algorithm_id None matches all of them,
+        # results of results_version (from get_results_version) are included
+        leaderboard = TrainingResultsRepository.leaderboard
+        leaderboard.refresh(TrainingResultsRepository._get_leaderboard_rows_after,
+                            TrainingResultsRepository._count_results_up_to, results_version)
+
+        result_ids = leaderboard.get_top_result_ids(environment, algorithm_id, limit)
+        if not result_ids:
+            return []
+
+        results = {result.result_id: result for result in TrainingResultsRepository._get_result_rows_query().filter(
+            TrainingResults.result_id.in_(result_ids))}
+
+        return [results[result_id] for result_id in result_ids if result_id in results]
+
+    @staticmethod
+    def get_results_aggregates(group_by: List[str], date_bucket: str, percentiles: List[float],
+                               environment: Optional[str] = None, algorithm_id: Optional[int] = None) -> List[Dict]:
+        # Count, mean, max, min and percentiles of best_mean_result for every group of results with the same values of
+        # group_by fields (see Constants.RESULTS_AGGREGATE_GROUPS), dates truncated to the start of date_bucket.
+        # Groups are computed by the database, PostgreSQL computes percentiles too, for other databases (SQLite) they
+        # are computed from values of one group at a time, streamed in order.
+        is_postgresql = db.session.get_bind().dialect.name == 'postgresql'
+        group_columns = [TrainingResultsRepository._get_aggregate_group_column(group, date_bucket, is_postgresql)
+                         for group in group_by]
+        best_mean_result = TrainingResults.best_mean_result
+
+        aggregates = [func.count(TrainingResults.result_id), func.avg(best_mean_result), func.max(best_mean_result),
+                      func.min(best_mean_result)]
+        if is_postgresql:
+            aggregates += [func.percentile_cont(percentile / 100).within_group(best_mean_result)
+                           for percentile in percentiles]
+
+        rows = TrainingResultsRepository._get_aggregated_results_query(
+            db.session.query(*group_columns, *aggregates), group_by, environment, algorithm_id
+        ).group_by(*group_columns).order_by(*group_columns).all()
+
+        if is_postgresql or not percentiles:
+            group_percentiles = {tuple(row[:len(group_columns)]): row[len(group_columns) + 4:] for row in rows}
+        else:
+            values_query = TrainingResultsRepository._get_aggregated_results_query(
+                db.session.query(*group_columns, best_mean_result), group_by, environment, algorithm_id
+            ).order_by(*group_columns, best_mean_result)
+
+            group_percentiles = {}
+            for group, group_rows in groupby(values_query.yield_per(Constants.RESULTS_YIELD_PER),
+                                             key=lambda row: tuple(row[:-1])):
+                values = [row[-1] for row in group_rows]
+                group_percentiles[group] = [get_percentile(values, percentile) for percentile in percentiles]
+
+        aggregated_results = []
+        for row in rows:
+            group = tuple(row[:len(group_columns)])
+            count, mean, maximum, minimum = row[len(group_columns):len(group_columns) + 4]
+
+            aggregated_result = {
+                name: datetime.fromisoformat(value) if name == 'date' and isinstance(value, str) else value
+                for name, value in zip(group_by, group)
+            }
+            aggregated_result.update({
+                "count": count,
+                "mean": mean,
+                "max": maximum,
+                "min": minimum,
+                "percentiles": {
+                    f"{percentile:g}": value
+                    for percentile, value in zip(percentiles, group_percentiles.get(group, [None] * len(percentiles)))
+                }
+            })
+            aggregated_results.append(aggregated_result)
+
+        return aggregated_results
+
+    # iterate_* methods fetch rows in batches through a server side cursor, instead of loading the whole result set
+    @staticmethod
+    def iterate_all_results(after: Optional[str] = None) -> Iterator[Row]:
+        return TrainingResultsRepository._get_all_results_query(
+            after, TrainingResultsRepository._get_result_rows_query()).yield_per(Constants.RESULTS_YIELD_PER)
+
+    @staticmethod
+    def iterate_results_for_algorithm(algorithm_id: int, after: Optional[str] = None) -> Iterator[Row]:
+        return TrainingResultsRepository._get_results_for_algorithm_query(
+            algorithm_id, after, TrainingResultsRepository._get_result_rows_query()).yield_per(
+            Constants.RESULTS_YIELD_PER)
+
+    @staticmethod
+    def iterate_results_for_environment(environment: str, after: Optional[str] = None) -> Iterator[Row]:
+        return TrainingResultsRepository._get_results_for_environment_query(
+            environment, after, TrainingResultsRepository._get_result_rows_query()).yield_per(
+            Constants.RESULTS_YIELD_PER)
+
+    # result_id orders results with equal environment and best_mean_result, so every row has a unique position.
+    # Queries of ORM objects are built by default, or on top of the given query (e.g. of selected columns).
+    @staticmethod
+    def _get_all_results_query(after: Optional[str] = None, query=None):
+        query = TrainingResults.query if query is None else query
+
+        if after is not None:
+            environment, best_mean_result, result_id = TrainingResultsRepository._decode_cursor(after)
+            query = query.filter(
+                tuple_(TrainingResults.environment, TrainingResults.best_mean_result, TrainingResults.result_id) <
+                tuple_(environment, best_mean_result, result_id))
+
+        return query.order_by(
+            desc(TrainingResults.environment),
+            desc(TrainingResults.best_mean_result),
+            desc(TrainingResults.result_id)
+        )
+
+    @staticmethod
+    def _get_results_for_algorithm_query(algorithm_id: int, after: Optional[str] = None, query=None):
+        query = (TrainingResults.query if query is None else query).filter(TrainingResults.algorithm == algorithm_id)
+
+        if after is not None:
+            environment, best_mean_result, result_id = TrainingResultsRepository._decode_cursor(after)
+            query = query.filter(
+                tuple_(TrainingResults.environment, TrainingResults.best_mean_result, TrainingResults.result_id) <
+                tuple_(environment, best_mean_result, result_id))
+
+        return query.order_by(desc(TrainingResults.environment), desc(TrainingResults.best_mean_result),
+                              desc(TrainingResults.result_id))
+
+    @staticmethod
+    def _get_results_for_environment_query(environment: str, after: Optional[str] = None, query=None):
+        query = (TrainingResults.query if query is None else query).filter(TrainingResults.environment == environment)
+
+        if after is not None:
+            _, best_mean_result, result_id = TrainingResultsRepository._decode_cursor(after)
+            query = query.filter(tuple_(TrainingResults.best_mean_result, TrainingResults.result_id) <
+                                 tuple_(best_mean_result, result_id))
+
+        return query.order_by(desc(TrainingResults.best_mean_result), desc(TrainingResults.result_id))
+
+    @staticmethod
+    def _get_result_rows_query():
+        # columns in the order unpacked by TrainingResults.row_to_dict
+        return db.session.query(
+            TrainingResults.result_id,
+            TrainingResults.best_mean_result,
+            TrainingResults.results_subdirectory,
+            TrainingResults.environment,
+            TrainingResults.algorithm_config,
+            TrainingResults.date,
+            Algorithm.name.label('algorithm_name')
+        ).outerjoin(Algorithm, TrainingResults.algorithm == Algorithm.id)
+
+    @staticmethod
+    def _get_aggregate_group_column(group: str, date_bucket: str, is_postgresql: bool):
+        if group == 'environment':
+            return TrainingResults.environment
+        if group == 'algorithm':
+            return Algorithm.name
+        if is_postgresql:
+            return func.date_trunc(date_bucket, TrainingResults.date)
+
+        # SQLite, weeks start on Monday like in PostgreSQL
+        return {
+            'hour': func.strftime('%Y-%m-%d %H:00:00', TrainingResults.date),
+            'day': func.strftime('%Y-%m-%d 00:00:00', TrainingResults.date),
+            'week': func.strftime('%Y-%m-%d 00:00:00', TrainingResults.date, 'weekday 0', '-6 days'),
+            'month': func.strftime('%Y-%m-01 00:00:00', TrainingResults.date),
+            'year': func.strftime('%Y-01-01 00:00:00', TrainingResults.date)
+        }[date_bucket]
+
+    @staticmethod
+    def _get_aggregated_results_query(query, group_by: List[str], environment: Optional[str],
+                                      algorithm_id: Optional[int]):
+        query = query.select_from(TrainingResults)
+
+        if 'algorithm' in group_by:
+            query = query.outerjoin(Algorithm, TrainingResults.algorithm == Algorithm.id)
+        if environment is not None:
+            query = query.filter(TrainingResults.environment == environment)
+        if algorithm_id is not None:
+            query = query.filter(TrainingResults.algorithm == algorithm_id)
+
+        return query
+
+    @staticmethod
+    def _get_leaderboard_rows_after(result_id: Optional[int]) -> Iterator[LeaderboardRow]:
+        query = db.session.query(TrainingResults.result_id, TrainingResults.environment, TrainingResults.algorithm,
+                                 TrainingResults.best_mean_result)
+        if result_id is not None:
+            query = query.filter(TrainingResults.result_id > result_id)
+
+        return (tuple(row) for row in query.order_by(TrainingResults.result_id).yield_per(Constants.RESULTS_YIELD_PER))
+
+    @staticmethod
+    def _count_results_up_to(result_id: int) -> int:
+        # counted on the primary key index
+        return db.session.scalar(select(func.count()).where(TrainingResults.result_id <= result_id))
+
+    @staticmethod
+    def _get_page(query, limit: Optional[int]) -> Tuple[List[Row], Optional[str]]:
+        if limit is None:
+            return query.all(), None
+
+        # one more row tells if there is a next page
+        results = query.limit(limit + 1).all()
+        if len(results) <= limit:
+            return results, None
+
+        results = results[:limit]
+        last_result = results[-1]
+
+        return results, encode_cursor(json_codec.dumps(
+            [last_result.environment, last_result.best_mean_result, last_result.result_id]))
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[str, float, int]:
+        try:
+            environment, best_mean_result, result_id = json_codec.loads(decode_cursor(cursor))
+        except (TypeError, ValueError):
+            raise ValueError(f"Not valid cursor: {cursor}")
+
+        if not isinstance(environment, str) or not isinstance(best_mean_result, (int, float)) or \
+                not isinstance(result_id, int):
+            raise ValueError(f"Not valid cursor: {cursor}")
+
+        return environment, best_mean_result, result_id
 
 
 class ConfigurationFileRepository:
+    # ConfigurationFile objects of listed files, shared by all listings, so unchanged files are not validated again
+    configuration_file_cache = ConfigurationFileCache()
 
     @staticmethod
     def save(configuration_file: ConfigurationFile, configuration_file_gateway: ConfigurationFileGateway) -> Dict:
@@ -58,6 +352,13 @@ class ConfigurationFileRepository:
 
         return metadata
 
+    @staticmethod
+    def save_many(configuration_files: List[ConfigurationFile],
+                  configuration_file_gateway: ConfigurationFileGateway) -> List[Dict]:
+        metadata = configuration_file_gateway.save_many(configuration_files)
+
+        return metadata
+
     @staticmethod
     def get_all_unprocessed_configuration_files(configuration_file_gateway: ConfigurationFileGateway,
                                                 parser_factory: ParserFactory) -> List[ConfigurationFile]:
@@ -94,11 +395,50 @@ class ConfigurationFileRepository:
             configuration_files_data, parser_factory
         )
 
+    @staticmethod
+    def get_configuration_files_page(status: str, query: ConfigurationFileQuery,
+                                     configuration_file_gateway: ConfigurationFileGateway,
+                                     parser_factory: ParserFactory
+                                     ) -> Tuple[List[ConfigurationFile], Optional[str]]:
+        configuration_files_page = configuration_file_gateway.get_configuration_files_data_page(status, query)
+
+        configuration_files = ConfigurationFileRepository._map_list_of_dicts_to_configuration_files(
+            configuration_files_page.data, parser_factory, configuration_files_page.keys
+        )
+
+        return configuration_files, configuration_files_page.next_cursor
+
+    @staticmethod
+    def iterate_configuration_files(status: str, query: ConfigurationFileQuery,
+                                    configuration_file_gateway: ConfigurationFileGateway,
+                                    parser_factory: ParserFactory) -> Iterator[ConfigurationFile]:
+        for configuration_files_page in configuration_file_gateway.iterate_configuration_files_data_pages(status,
+                                                                                                          query):
+            yield from ConfigurationFileRepository._map_list_of_dicts_to_configuration_files(
+                configuration_files_page.data, parser_factory, configuration_files_page.keys
+            )
+
     @staticmethod
     def _map_list_of_dicts_to_configuration_files(configuration_files_data: List[Dict],
-                                                  parser_factory: ParserFactory
+                                                  parser_factory: ParserFactory,
+                                                  keys: Optional[List[Optional[Hashable]]] = None
                                                   ) -> List[ConfigurationFile]:
-        return list(
-            map(lambda x: ConfigurationFileFactory.from_dict(data=x, parser_factory=parser_factory),
-                configuration_files_data)
-        )
+        # keys identify stored versions of the files, objects of files without a key are not cached
+        if keys is None:
+            keys = [None] * len(configuration_files_data)
+
+        configuration_file_cache = ConfigurationFileRepository.configuration_file_cache
+        configuration_files = []
+
+        for configuration_file_data, key in zip(configuration_files_data, keys):
+            configuration_file = None if key is None else configuration_file_cache.get(key)
+
+            if configuration_file is None:
+                configuration_file = ConfigurationFileFactory.from_stored_dict(configuration_file_data, parser_factory)
+                if key is not None:
+                    configuration_file_cache.put(key, configuration_file,
+                                                 len(json_codec.dumps(configuration_file_data)))
+
+            configuration_files.append(configuration_file)
+
+        return configuration_files
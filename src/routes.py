@@ -1,14 +1,315 @@
-from flask import request, make_response, jsonify
+import hashlib
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Dict, List, Tuple, Optional, Iterator
+
+from flask import request, make_response, jsonify, json, Response, stream_with_context, g
 from werkzeug.security import check_password_hash
 
 from src import app, Constants
-from src.configuration_file_gateway import ConfigurationFileGatewayFactory
+from src.configuration_file_gateway import ConfigurationFileGatewayFactory, ConfigurationFileQuery
 from src.exceptions import NotAllRequiredConfigurationFields, UnknownAlgorithmException, \
-    NotValidAlgorithmConfigException
-from src.models import ConfigurationFileFactory
+    NotValidAlgorithmConfigException, NotValidSweepException
+from src.models import ConfigurationFileFactory, ConfigurationFile, TrainingResults
 from src.repository import AlgorithmRepository, TrainingResultsRepository, UsersRepository, ConfigurationFileRepository
+from src.sweep import SweepExpander
+from src.utils import json_codec
 from src.utils.authorization import Auth, token_required
 from src.utils.data_validators import ParserFactory
+from src.utils.response_cache import ResponseCache
+from src.utils.utils import decode_cursor
+
+validation_executor = ThreadPoolExecutor(max_workers=Constants.SCHEDULE_BATCH_VALIDATION_WORKERS)
+results_response_cache = ResponseCache(Constants.RESULTS_RESPONSE_CACHE_MAX_ENTRIES,
+                                       Constants.RESULTS_RESPONSE_CACHE_MAX_BYTES)
+
+
+def get_configuration_file_or_error(data: Dict,
+                                    parser_factory: ParserFactory) -> Tuple[Optional[ConfigurationFile], Optional[str]]:
+    configuration_file = None
+    error = None
+
+    try:
+        if not isinstance(data, dict):
+            raise NotAllRequiredConfigurationFields()
+
+        priority, error = get_priority_or_error(data)
+        if error is not None:
+            return None, error
+
+        data = {key: value for key, value in data.items() if key != 'priority'}
+        configuration_file = ConfigurationFileFactory.from_dict(data, parser_factory)
+        configuration_file.priority = priority
+    except NotAllRequiredConfigurationFields:
+        error = f"Config must have fields: {Constants.REQUIRED_CONFIG_FIELDS}"
+    except UnknownAlgorithmException:
+        error = f"Algorithm must be one of values: {Constants.KNOWN_ALGORITHMS}"
+    except NotValidAlgorithmConfigException as e:
+        error = str(e)
+
+    return configuration_file, error
+
+
+def get_priority_or_error(data: Dict) -> Tuple[Optional[int], Optional[str]]:
+    priority = data.get('priority', 0)
+
+    if not isinstance(priority, int) or isinstance(priority, bool):
+        return None, "priority must be an integer"
+
+    return priority, None
+
+
+def get_lease_duration_or_error(data: Dict) -> Tuple[Optional[float], Optional[str]]:
+    lease_duration = data.get('lease_seconds', Constants.LEASE_DEFAULT_DURATION_S)
+
+    if not isinstance(lease_duration, (int, float)) or isinstance(lease_duration, bool) or \
+            not 0 < lease_duration <= Constants.LEASE_MAX_DURATION_S:
+        return None, f"lease_seconds must be a number between 0 and {Constants.LEASE_MAX_DURATION_S}"
+
+    return lease_duration, None
+
+
+def get_lease_or_error(data: Dict) -> Tuple[Optional[Tuple[str, str]], Optional[str]]:
+    if not isinstance(data, dict) or not isinstance(data.get('filename', None), str) or \
+            not isinstance(data.get('lease_token', None), str):
+        return None, "Request must have string fields: filename, lease_token"
+
+    filename = data['filename']
+    if os.path.basename(filename) != filename or filename.startswith('.') or not filename.endswith('.json'):
+        return None, "filename is not a valid configuration file name"
+
+    return (filename, data['lease_token']), None
+
+
+def get_configuration_file_query_or_error(args: Dict) -> Tuple[Optional[ConfigurationFileQuery], Optional[str]]:
+    limit = args.get('limit', None)
+    cursor = args.get('cursor', None)
+
+    try:
+        if limit is not None:
+            limit = int(limit)
+            if not 0 < limit <= Constants.LISTING_MAX_PAGE_SIZE:
+                raise ValueError()
+    except ValueError:
+        return None, f"limit must be an integer between 1 and {Constants.LISTING_MAX_PAGE_SIZE}"
+
+    try:
+        if cursor is not None:
+            decode_cursor(cursor)
+    except ValueError:
+        return None, "cursor is not valid"
+
+    try:
+        submitted_after, submitted_before = (
+            None if args.get(name, None) is None else datetime.fromisoformat(args[name])
+            for name in ('submitted_after', 'submitted_before')
+        )
+    except ValueError:
+        return None, "submitted_after and submitted_before must be ISO 8601 datetimes"
+
+    # submission times are naive local times, like the ones in filenames
+    submitted_after, submitted_before = (
+        value if value is None or value.tzinfo is None else value.astimezone().replace(tzinfo=None)
+        for value in (submitted_after, submitted_before)
+    )
+
+    query = ConfigurationFileQuery(
+        limit=limit,
+        cursor=cursor,
+        algorithm=args.get('algorithm', None),
+        environment=args.get('environment', None),
+        submitted_after=submitted_after,
+        submitted_before=submitted_before
+    )
+
+    return query, None
+
+
+def get_training_result_or_error(data: Dict,
+                                 algorithm_ids: Dict[str, int]) -> Tuple[Optional[Dict], Optional[str]]:
+    # column values of a TrainingResults row, dates without time zone are UTC like the served ones
+    if not isinstance(data, dict) or not set(Constants.REQUIRED_RESULT_FIELDS).issubset(data.keys()):
+        return None, f"Result must have fields: {Constants.REQUIRED_RESULT_FIELDS}"
+
+    best_mean_result = data['best_mean_result']
+    if not isinstance(best_mean_result, (int, float)) or isinstance(best_mean_result, bool) or \
+            not math.isfinite(best_mean_result):
+        return None, "best_mean_result must be a finite number"
+
+    if not all(isinstance(data[field], str) and data[field] for field in ('results_subdirectory', 'environment')):
+        return None, "results_subdirectory and environment must be non-empty strings"
+
+    if not isinstance(data['configuration'], dict):
+        return None, "configuration must be an object"
+
+    if not isinstance(data['algorithm'], str) or data['algorithm'] not in algorithm_ids:
+        return None, f"Algorithm must be one of values: {sorted(algorithm_ids)}"
+
+    try:
+        date = datetime.now(timezone.utc) if data.get('date', None) is None else datetime.fromisoformat(data['date'])
+    except (TypeError, ValueError):
+        return None, "date must be an ISO 8601 datetime"
+
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc).replace(tzinfo=None)
+
+    return {
+        'best_mean_result': best_mean_result,
+        'results_subdirectory': data['results_subdirectory'],
+        'environment': data['environment'],
+        'algorithm_config': json_codec.dumps(data['configuration']),
+        'date': date,
+        'algorithm': algorithm_ids[data['algorithm']]
+    }, None
+
+
+def get_results_page_or_error(args: Dict) -> Tuple[Optional[Tuple[Optional[int], Optional[str]]], Optional[str]]:
+    # limit and after cursor of a /results page, all results are returned without limit
+    limit = args.get('limit', None)
+
+    try:
+        if limit is not None:
+            limit = int(limit)
+            if not 0 < limit <= Constants.RESULTS_MAX_PAGE_SIZE:
+                raise ValueError()
+    except ValueError:
+        return None, f"limit must be an integer between 1 and {Constants.RESULTS_MAX_PAGE_SIZE}"
+
+    return (limit, args.get('after', None)), None
+
+
+def get_results_aggregation_or_error(
+        args: Dict) -> Tuple[Optional[Tuple[List[str], str, List[float]]], Optional[str]]:
+    # group_by fields, date bucket and percentiles of /results/aggregate
+    group_by = args.getlist('group_by')
+    date_bucket = args.get('date_bucket', Constants.RESULTS_AGGREGATE_DEFAULT_DATE_BUCKET)
+
+    if not set(group_by) <= set(Constants.RESULTS_AGGREGATE_GROUPS) or len(set(group_by)) != len(group_by):
+        return None, f"group_by must be distinct values of: {Constants.RESULTS_AGGREGATE_GROUPS}"
+    if date_bucket not in Constants.RESULTS_AGGREGATE_DATE_BUCKETS:
+        return None, f"date_bucket must be one of values: {Constants.RESULTS_AGGREGATE_DATE_BUCKETS}"
+
+    try:
+        percentiles = [float(percentile) for percentile in args.getlist('percentile')] or \
+            list(Constants.RESULTS_AGGREGATE_DEFAULT_PERCENTILES)
+        if len(percentiles) > Constants.RESULTS_AGGREGATE_MAX_PERCENTILES or \
+                not all(0 <= percentile <= 100 for percentile in percentiles):
+            raise ValueError()
+    except ValueError:
+        return None, f"percentile must be up to {Constants.RESULTS_AGGREGATE_MAX_PERCENTILES} numbers between 0 and 100"
+
+    return (group_by, date_bucket, percentiles), None
+
+
+def is_raw_configuration_requested() -> bool:
+    # stored configurations of results are sent as they are, without decoding and encoding them again
+    return request.args.get('raw_configuration', None) == '1'
+
+
+def is_streaming_requested() -> bool:
+    if request.args.get('stream', None) == '1':
+        return True
+
+    return request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson']) == 'application/x-ndjson'
+
+
+def make_ndjson_response(records: Iterator[Dict]) -> Response:
+    # Records are serialized one by one while the response is sent, one JSON document per line
+    def generate_lines():
+        for record in records:
+            yield json.dumps(record) + "\n"
+
+    return Response(stream_with_context(generate_lines()), status=200, mimetype='application/x-ndjson')
+
+
+def conditional_results_response(f):
+    # Responses of /results routes depend only on the URL and the results version, which is used for the ETag, so
+    # clients with an up to date response get 304. Other successful, not streamed responses are cached serialized.
+    # Dates of results do not identify a version (results can be inserted with the same or older dates), so there is
+    # no Last-Modified header and If-Modified-Since is ignored.
+    @wraps(f)
+    def decorator(*args, **kwargs):
+        g.results_version = TrainingResultsRepository.get_results_version()
+        streaming = is_streaming_requested()
+
+        key = (request.path, tuple(sorted(request.args.items(multi=True))), streaming, g.results_version)
+        etag = hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            cached_response = None if streaming else results_response_cache.get(key)
+
+            if cached_response is not None:
+                response = Response(cached_response.body, status=200, mimetype=cached_response.mimetype)
+            else:
+                response = f(*args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                if not streaming:
+                    results_response_cache.put(key, response.get_data(), response.mimetype)
+
+        response.set_etag(etag)
+
+        return response
+
+    return decorator
+
+
+def get_configuration_files_listing(status: str, count_label: str, files_label: str):
+    query, error = get_configuration_file_query_or_error(request.args)
+
+    if error is not None:
+        return make_response(jsonify({'Message': error}), 400)
+
+    if is_streaming_requested():
+        configuration_files = ConfigurationFileRepository.iterate_configuration_files(
+            status,
+            query,
+            ConfigurationFileGatewayFactory.get_default_gateway(),
+            ParserFactory()
+        )
+        return make_ndjson_response(configuration_file.to_dict() for configuration_file in configuration_files)
+
+    try:
+        configuration_files, next_cursor = ConfigurationFileRepository.get_configuration_files_page(
+            status,
+            query,
+            ConfigurationFileGatewayFactory.get_default_gateway(),
+            ParserFactory()
+        )
+    except ValueError:
+        # cursor created by other gateway
+        return make_response(jsonify({'Message': "cursor is not valid"}), 400)
+
+    results = [result.to_dict() for result in configuration_files]
+    return make_response(jsonify({
+        count_label: len(results),
+        files_label: results,
+        "Next cursor": next_cursor
+    }), 200)
+
+
+def finish_claim(status: str):
+    lease, error = get_lease_or_error(request.get_json(silent=True))
+    if error is not None:
+        return make_response(jsonify({'Message': error}), 400)
+
+    filename, lease_token = lease
+    configuration_file_gateway = ConfigurationFileGatewayFactory.get_default_gateway()
+
+    if status == Constants.DONE_STATUS:
+        finished = configuration_file_gateway.complete(filename, lease_token)
+    else:
+        finished = configuration_file_gateway.fail(filename, lease_token)
+
+    if not finished:
+        return make_response(jsonify({'Message': "Lease expired or belongs to other claim"}), 409)
+
+    return make_response(jsonify({'filename': filename, 'status': status}), 200)
 
 
 @app.route('/login', methods=['POST', 'GET'])
@@ -36,17 +337,9 @@ def schedule_training(current_user):
     data = request.get_json()
     parser_factory = ParserFactory()
 
-    error = None
     error_code = 418
 
-    try:
-        configuration_file = ConfigurationFileFactory.from_dict(data, parser_factory)
-    except NotAllRequiredConfigurationFields:
-        error = f"Config must have fields: {Constants.REQUIRED_CONFIG_FIELDS}"
-    except UnknownAlgorithmException:
-        error = f"Algorithm must be one of values: {Constants.KNOWN_ALGORITHMS}"
-    except NotValidAlgorithmConfigException as e:
-        error = str(e)
+    configuration_file, error = get_configuration_file_or_error(data, parser_factory)
 
     if error is not None:
         return make_response(
@@ -61,104 +354,413 @@ def schedule_training(current_user):
     return make_response(jsonify({'message': metadata}, 201))
 
 
-@app.route('/scheduled', methods=['GET'])
+@app.route('/schedule/batch', methods=['POST'])
 @token_required
-def get_all_not_processed_configuration_files(current_user):
-    configuration_file_gateway = ConfigurationFileGatewayFactory.get_default_gateway()
+def schedule_training_batch(current_user):
+    data = request.get_json()
     parser_factory = ParserFactory()
 
-    scheduled_conf_files = ConfigurationFileRepository.get_all_unprocessed_configuration_files(
-        configuration_file_gateway,
-        parser_factory
-    )
+    if not isinstance(data, list):
+        return make_response(jsonify({'Message': "Request body must be a list of configuration files"}), 400)
+
+    if len(data) > Constants.SCHEDULE_BATCH_MAX_SIZE:
+        return make_response(jsonify({
+            'Message': f"Batch can not contain more than {Constants.SCHEDULE_BATCH_MAX_SIZE} configuration files"
+        }), 413)
+
+    validated = list(validation_executor.map(lambda x: get_configuration_file_or_error(x, parser_factory), data))
+    valid_configuration_files = [configuration_file for configuration_file, error in validated if error is None]
+
+    saved_metadata = iter(ConfigurationFileRepository.save_many(
+        valid_configuration_files,
+        ConfigurationFileGatewayFactory.get_default_gateway()
+    ))
+
+    # items which were valid, but could not be saved, have an error too
+    results = [
+        {'error': error} if error is not None else next(saved_metadata)
+        for _, error in validated
+    ]
+    scheduled = sum(1 for result in results if 'error' not in result)
 
-    results = [result.to_dict() for result in scheduled_conf_files]
     return make_response(jsonify({
-        "Number of scheduled configuration files ": len(results),
-        "Scheduled configuration files ": results
-    }), 200)
+        "Number of scheduled configuration files": scheduled,
+        "Number of rejected configuration files": len(results) - scheduled,
+        "Results": results
+    }), 201)
 
 
-@app.route('/failed', methods=['GET'])
+@app.route('/schedule/sweep', methods=['POST'])
 @token_required
-def get_all_failed_runs(current_user):
-    configuration_file_gateway = ConfigurationFileGatewayFactory.get_default_gateway()
+def schedule_training_sweep(current_user):
+    data = request.get_json()
     parser_factory = ParserFactory()
 
-    scheduled_conf_files = ConfigurationFileRepository.get_all_failed_configuration_files(
-        configuration_file_gateway,
-        parser_factory
-    )
+    error = None
+    error_code = 418
+
+    try:
+        if not isinstance(data, dict) or not {"algorithm", "algorithm_config", "sweep"}.issubset(data.keys()):
+            raise NotValidSweepException("Sweep must have fields: algorithm, algorithm_config, sweep")
+
+        sweep_expander = SweepExpander(
+            data["algorithm"], data["algorithm_config"], data["sweep"], parser_factory,
+            mode=data.get("mode", "grid"), samples=data.get("samples", None), seed=data.get("seed", None)
+        )
+    except NotAllRequiredConfigurationFields:
+        error = f"Config must have fields: {Constants.REQUIRED_CONFIG_FIELDS}"
+    except UnknownAlgorithmException:
+        error = f"Algorithm must be one of values: {Constants.KNOWN_ALGORITHMS}"
+    except (NotValidAlgorithmConfigException, NotValidSweepException) as e:
+        error = str(e)
+
+    if error is None:
+        priority, error = get_priority_or_error(data)
+
+    if error is not None:
+        return make_response(jsonify({'Message': error}), error_code)
+
+    configuration_file_gateway = ConfigurationFileGatewayFactory.get_default_gateway()
+    filenames = []
+    errors = []
+
+    for configuration_files in sweep_expander.expand_in_chunks():
+        for configuration_file in configuration_files:
+            configuration_file.priority = priority
+
+        metadata = ConfigurationFileRepository.save_many(configuration_files, configuration_file_gateway)
+        filenames.extend(item['filename'] for item in metadata if 'error' not in item)
+        errors.extend(item['error'] for item in metadata if 'error' in item)
 
-    results = [result.to_dict() for result in scheduled_conf_files]
     return make_response(jsonify({
-        "Number of failed configuration files ": len(results),
-        "Failed files ": results
+        "Number of scheduled configuration files": len(filenames),
+        "Number of not saved configuration files": len(errors),
+        "Scheduled files": filenames,
+        "Errors": errors
+    }), 201)
+
+
+@app.route('/claim', methods=['POST'])
+@token_required
+def claim_configuration_files(current_user):
+    data = request.get_json(silent=True) or {}
+
+    count = data.get('count', 1) if isinstance(data, dict) else None
+    if not isinstance(count, int) or isinstance(count, bool) or not 0 < count <= Constants.CLAIM_MAX_COUNT:
+        error = f"count must be an integer between 1 and {Constants.CLAIM_MAX_COUNT}"
+        return make_response(jsonify({'Message': error}), 400)
+
+    lease_duration, error = get_lease_duration_or_error(data)
+    if error is not None:
+        return make_response(jsonify({'Message': error}), 400)
+
+    worker = data.get('worker', None)
+    claimed = ConfigurationFileGatewayFactory.get_default_gateway().claim(
+        count, lease_duration, None if worker is None else str(worker))
+
+    return make_response(jsonify({
+        "Number of claimed configuration files": len(claimed),
+        "Claimed configuration files": claimed
     }), 200)
 
 
-@app.route('/done', methods=['GET'])
+@app.route('/renew', methods=['POST'])
 @token_required
-def get_all_done_runs(current_user):
-    configuration_file_gateway = ConfigurationFileGatewayFactory.get_default_gateway()
-    parser_factory = ParserFactory()
+def renew_lease(current_user):
+    data = request.get_json(silent=True)
+
+    lease, error = get_lease_or_error(data)
+    if error is None:
+        lease_duration, error = get_lease_duration_or_error(data)
+    if error is not None:
+        return make_response(jsonify({'Message': error}), 400)
+
+    filename, lease_token = lease
+    renewed_lease = ConfigurationFileGatewayFactory.get_default_gateway().renew_lease(filename, lease_token,
+                                                                                      lease_duration)
+    if renewed_lease is None:
+        return make_response(jsonify({'Message': "Lease expired or belongs to other claim"}), 409)
+
+    return make_response(jsonify({'filename': filename, 'lease': renewed_lease}), 200)
+
 
-    scheduled_conf_files = ConfigurationFileRepository.get_all_done_configuration_files(
-        configuration_file_gateway,
-        parser_factory
+@app.route('/complete', methods=['POST'])
+@token_required
+def complete_configuration_file(current_user):
+    return finish_claim(Constants.DONE_STATUS)
+
+
+@app.route('/fail', methods=['POST'])
+@token_required
+def fail_configuration_file(current_user):
+    return finish_claim(Constants.FAILED_STATUS)
+
+
+@app.route('/scheduled', methods=['GET'])
+@token_required
+def get_all_not_processed_configuration_files(current_user):
+    return get_configuration_files_listing(
+        Constants.UNPROCESSED_STATUS,
+        "Number of scheduled configuration files ",
+        "Scheduled configuration files "
     )
 
-    results = [result.to_dict() for result in scheduled_conf_files]
+
+@app.route('/scheduled/changes', methods=['GET'])
+@token_required
+def get_configuration_file_changes(current_user):
+    # Long poll for configuration files scheduled or moved to other status after the since token. Without since,
+    # only the token of the current state is returned, it should be taken before listing configuration files.
+    configuration_file_gateway = ConfigurationFileGatewayFactory.get_default_gateway()
+    token = request.args.get('since', None)
+
+    if token is None:
+        return make_response(jsonify({
+            "Number of changes": 0,
+            "Changes": [],
+            "Next token": configuration_file_gateway.get_changes_token()
+        }), 200)
+
+    try:
+        timeout = float(request.args.get('timeout', Constants.CHANGE_FEED_DEFAULT_TIMEOUT_S))
+        if not 0 <= timeout <= Constants.CHANGE_FEED_MAX_TIMEOUT_S:
+            raise ValueError()
+    except ValueError:
+        return make_response(jsonify({
+            'Message': f"timeout must be a number between 0 and {Constants.CHANGE_FEED_MAX_TIMEOUT_S}"
+        }), 400)
+
+    statuses = request.args.getlist('status') or None
+    if statuses is not None and not set(statuses).issubset(Constants.CONFIGURATION_FILE_STATUSES):
+        return make_response(jsonify({
+            'Message': f"status must be one of values: {Constants.CONFIGURATION_FILE_STATUSES}"
+        }), 400)
+
+    try:
+        changes_and_token = configuration_file_gateway.get_changes(token, timeout, statuses)
+    except ValueError:
+        return make_response(jsonify({'Message': "since is not a valid token"}), 400)
+
+    if changes_and_token is None:
+        return make_response(jsonify({
+            'Message': "Changes after the token are no longer kept, list configuration files again",
+            "Next token": configuration_file_gateway.get_changes_token()
+        }), 410)
+
+    changes, next_token = changes_and_token
     return make_response(jsonify({
-        "Number of processed configuration files ": len(results),
-        "Processed files ": results
+        "Number of changes": len(changes),
+        "Changes": changes,
+        "Next token": next_token
     }), 200)
 
 
+@app.route('/failed', methods=['GET'])
+@token_required
+def get_all_failed_runs(current_user):
+    return get_configuration_files_listing(
+        Constants.FAILED_STATUS,
+        "Number of failed configuration files ",
+        "Failed files "
+    )
+
+
+@app.route('/done', methods=['GET'])
+@token_required
+def get_all_done_runs(current_user):
+    return get_configuration_files_listing(
+        Constants.DONE_STATUS,
+        "Number of processed configuration files ",
+        "Processed files "
+    )
+
+
 @app.route('/processing', methods=['GET'])
 @token_required
 def get_all_processing_runs(current_user):
-    configuration_file_gateway = ConfigurationFileGatewayFactory.get_default_gateway()
-    parser_factory = ParserFactory()
-
-    scheduled_conf_files = ConfigurationFileRepository.get_all_processing_configuration_files(
-        configuration_file_gateway,
-        parser_factory
+    return get_configuration_files_listing(
+        Constants.PROCESSING_STATUS,
+        "Number of currently processed configuration files ",
+        "Processing files "
     )
 
-    results = [result.to_dict() for result in scheduled_conf_files]
-    return make_response(jsonify({
-        "Number of currently processed configuration files ": len(results),
-        "Processing files ": results
-    }), 200)
+
+@app.route('/stats', methods=['GET'])
+@token_required
+def get_statistics(current_user):
+    statistics = ConfigurationFileGatewayFactory.get_default_gateway().get_statistics()
+
+    return make_response(jsonify(statistics), 200)
 
 
 @app.route('/results', methods=['GET'])
 @token_required
+@conditional_results_response
 def get_all_results(current_user):
-    all_training_results = TrainingResultsRepository.get_all_results()
+    page, error = get_results_page_or_error(request.args)
+    if error is not None:
+        return make_response(jsonify({'Message': error}), 400)
+
+    limit, after = page
+    raw_configuration = is_raw_configuration_requested()
+
+    try:
+        if is_streaming_requested():
+            return make_ndjson_response(
+                TrainingResults.row_to_dict(result, raw_configuration)
+                for result in TrainingResultsRepository.iterate_all_results(after)
+            )
+
+        all_training_results, next_cursor = TrainingResultsRepository.get_all_results_page(limit, after)
+    except ValueError:
+        return make_response(jsonify({'Message': "after is not a valid cursor"}), 400)
+
+    results = [TrainingResults.row_to_dict(result, raw_configuration) for result in all_training_results]
+    return make_response(jsonify({"All results": results, "Next cursor": next_cursor}), 200)
+
+
+@app.route('/results/leaderboard', methods=['GET'])
+@token_required
+@conditional_results_response
+def get_results_leaderboard(current_user):
+    environment = request.args.get('environment', None)
+    algorithm = request.args.get('algorithm', None)
+
+    if algorithm is not None and algorithm not in Constants.KNOWN_ALGORITHMS:
+        return make_response(jsonify({"Message": f"Unknown algorithm: {algorithm}"}), 400)
+
+    leaderboard_size = TrainingResultsRepository.leaderboard.size
+    try:
+        limit = int(request.args.get('limit', leaderboard_size))
+        if not 0 < limit <= leaderboard_size:
+            raise ValueError()
+    except ValueError:
+        return make_response(jsonify({'Message': f"limit must be an integer between 1 and {leaderboard_size}"}), 400)
+
+    algorithm_id = None if algorithm is None else AlgorithmRepository.get_algorithm_by_name(algorithm).id
+    # the leaderboard must include results of the version the response is cached for
+    leaderboard = TrainingResultsRepository.get_leaderboard(environment, algorithm_id, limit, g.results_version)
+    raw_configuration = is_raw_configuration_requested()
 
-    results = [result.to_dict() for result in all_training_results]
-    return make_response(jsonify({"All results": results}), 200)
+    return make_response(jsonify({
+        "Environment": environment,
+        "Algorithm": algorithm,
+        "Leaderboard": [TrainingResults.row_to_dict(result, raw_configuration) for result in leaderboard]
+    }), 200)
+
+
+@app.route('/results/batch', methods=['POST'])
+@token_required
+def add_results_batch(current_user):
+    data = request.get_json()
+
+    if not isinstance(data, list):
+        return make_response(jsonify({'Message': "Request body must be a list of results"}), 400)
+
+    if len(data) > Constants.RESULTS_BATCH_MAX_SIZE:
+        return make_response(jsonify({
+            'Message': f"Batch can not contain more than {Constants.RESULTS_BATCH_MAX_SIZE} results"
+        }), 413)
+
+    algorithm_ids = AlgorithmRepository.get_algorithm_ids_by_name(
+        result['algorithm'] for result in data if isinstance(result, dict) and isinstance(result.get('algorithm'), str))
+    validated = [get_training_result_or_error(result, algorithm_ids) for result in data]
+    valid_results = [result for result, error in validated if error is None]
+
+    result_ids = iter(TrainingResultsRepository.insert_many(valid_results))
+
+    results = [
+        {'error': error} if error is not None else {'result_id': next(result_ids)}
+        for _, error in validated
+    ]
+
+    return make_response(jsonify({
+        "Number of added results": len(valid_results),
+        "Number of rejected results": len(results) - len(valid_results),
+        "Results": results
+    }), 201)
+
+
+@app.route('/results/aggregate', methods=['GET'])
+@token_required
+@conditional_results_response
+def get_results_aggregates(current_user):
+    aggregation, error = get_results_aggregation_or_error(request.args)
+    if error is not None:
+        return make_response(jsonify({'Message': error}), 400)
+
+    environment = request.args.get('environment', None)
+    algorithm = request.args.get('algorithm', None)
+
+    if algorithm is not None and algorithm not in Constants.KNOWN_ALGORITHMS:
+        return make_response(jsonify({"Message": f"Unknown algorithm: {algorithm}"}), 400)
+
+    group_by, date_bucket, percentiles = aggregation
+    algorithm_id = None if algorithm is None else AlgorithmRepository.get_algorithm_by_name(algorithm).id
+    aggregates = TrainingResultsRepository.get_results_aggregates(group_by, date_bucket, percentiles, environment,
+                                                                  algorithm_id)
+
+    return make_response(jsonify({"Number of groups": len(aggregates), "Groups": aggregates}), 200)
 
 
 @app.route('/results/environment/<environment>', methods=['GET'])
 @token_required
+@conditional_results_response
 def get_results_for_environment(current_user, environment):
-    results_for_environment = TrainingResultsRepository.get_results_for_environment(environment)
+    page, error = get_results_page_or_error(request.args)
+    if error is not None:
+        return make_response(jsonify({'Message': error}), 400)
 
-    results_as_dicts = [result.to_dict() for result in results_for_environment]
-    return make_response(jsonify({f"Results for {environment} environment": results_as_dicts}), 200)
+    limit, after = page
+    raw_configuration = is_raw_configuration_requested()
+
+    try:
+        if is_streaming_requested():
+            return make_ndjson_response(
+                TrainingResults.row_to_dict(result, raw_configuration)
+                for result in TrainingResultsRepository.iterate_results_for_environment(environment, after)
+            )
+
+        results_for_environment, next_cursor = TrainingResultsRepository.get_results_for_environment_page(
+            environment, limit, after)
+    except ValueError:
+        return make_response(jsonify({'Message': "after is not a valid cursor"}), 400)
+
+    results_as_dicts = [TrainingResults.row_to_dict(result, raw_configuration)
+                        for result in results_for_environment]
+    return make_response(jsonify({
+        f"Results for {environment} environment": results_as_dicts,
+        "Next cursor": next_cursor
+    }), 200)
 
 
 @app.route('/results/algorithm/<algorithm>', methods=['GET'])
 @token_required
+@conditional_results_response
 def get_results_for_algorithm(current_user, algorithm):
     if algorithm not in Constants.KNOWN_ALGORITHMS:
         make_response(jsonify({"Message": f"Unknown algorithm: {algorithm}"}), 400)
 
     algorithm_id = AlgorithmRepository.get_algorithm_by_name(algorithm).id
-    results_for_algorithm = TrainingResultsRepository.get_results_for_algorithm(algorithm_id)
 
-    results = [result.to_dict() for result in results_for_algorithm]
-    return make_response(jsonify({f"Results for {algorithm} algorithm": results}), 200)
+    page, error = get_results_page_or_error(request.args)
+    if error is not None:
+        return make_response(jsonify({'Message': error}), 400)
+
+    limit, after = page
+    raw_configuration = is_raw_configuration_requested()
+
+    try:
+        if is_streaming_requested():
+            return make_ndjson_response(
+                TrainingResults.row_to_dict(result, raw_configuration)
+                for result in TrainingResultsRepository.iterate_results_for_algorithm(algorithm_id, after)
+            )
+
+        results_for_algorithm, next_cursor = TrainingResultsRepository.get_results_for_algorithm_page(
+            algorithm_id, limit, after)
+    except ValueError:
+        return make_response(jsonify({'Message': "after is not a valid cursor"}), 400)
+
+    results = [TrainingResults.row_to_dict(result, raw_configuration) for result in results_for_algorithm]
+    return make_response(jsonify({f"Results for {algorithm} algorithm": results, "Next cursor": next_cursor}), 200)
@@ -0,0 +1,183 @@
+import copy
+import itertools
+import math
+import random
+from typing import Dict, List, Any, Iterator, Optional
+
+from src import Constants
+from src.exceptions import NotValidSweepException
+from src.models import ConfigurationFile, ConfigurationFileFactory
+from src.utils.data_validators import ParserFactory
+
+
+class SweepExpander:
+    # Expands a sweep specification into configuration files. Values of every swept key can be given as a list,
+    # or as a range: {"min": 0.0001, "max": 0.01, "num": 5, "log": true}. In grid mode ranges are split into "num"
+    # evenly spaced values, in random mode values are sampled from the whole range.
+    # The base config is fully validated once, later only swept values are checked against the compiled parser.
+
+    def __init__(self, algorithm: str, algorithm_config: Dict, sweep: Dict, parser_factory: ParserFactory,
+                 mode: str = 'grid', samples: Optional[int] = None, seed: Optional[int] = None):
+        if not isinstance(algorithm_config, dict):
+            raise NotValidSweepException("algorithm_config must be a dict")
+        if not isinstance(sweep, dict) or len(sweep) == 0:
+            raise NotValidSweepException("sweep must be a non empty dict of swept keys")
+        if mode not in Constants.SWEEP_MODES:
+            raise NotValidSweepException(f"Sweep mode must be one of values: {Constants.SWEEP_MODES}, not {mode}")
+        if mode == 'random' and (not self._is_int(samples) or samples <= 0):
+            raise NotValidSweepException("Random sweep requires positive integer 'samples' field")
+        if seed is not None and not self._is_int(seed):
+            raise NotValidSweepException("seed must be an integer")
+
+        self._algorithm = algorithm
+        self._base_config = copy.deepcopy(algorithm_config)
+        self._parser_factory = parser_factory
+        self._mode = mode
+        self._samples = samples
+        self._seed = seed
+
+        # raises the same exceptions as /schedule if the base config is not valid
+        ConfigurationFileFactory.get_configuration_file(algorithm, copy.deepcopy(algorithm_config), parser_factory)
+
+        self._validator = parser_factory.get_validator(algorithm)
+        self._sweep = {key: self._get_values_spec(key, values) for key, values in sweep.items()}
+
+        if self.size > Constants.SWEEP_MAX_CONFIGURATIONS:
+            raise NotValidSweepException(
+                f"Sweep can not expand to more than {Constants.SWEEP_MAX_CONFIGURATIONS} configuration files")
+
+        # random points are drawn up front, so no invalid value is found after saving has started
+        self._random_points = self._get_random_points() if mode == 'random' else None
+
+    @property
+    def size(self) -> int:
+        if self._mode == 'random':
+            return self._samples
+
+        return math.prod(len(values) for values in self._sweep.values())
+
+    def expand(self) -> Iterator[ConfigurationFile]:
+        for point in self._get_points():
+            algorithm_config = copy.deepcopy(self._base_config)
+            algorithm_config.update(point)
+
+            yield ConfigurationFileFactory.get_configuration_file(
+                self._algorithm, algorithm_config, self._parser_factory, trusted=True
+            )
+
+    def expand_in_chunks(self, chunk_size: int = Constants.SWEEP_SAVE_CHUNK_SIZE) -> Iterator[List[ConfigurationFile]]:
+        configuration_files = self.expand()
+
+        chunk = list(itertools.islice(configuration_files, chunk_size))
+        while chunk:
+            yield chunk
+            chunk = list(itertools.islice(configuration_files, chunk_size))
+
+    def _get_points(self) -> Iterator[Dict]:
+        keys = list(self._sweep.keys())
+
+        if self._mode == 'grid':
+            for values in itertools.product(*self._sweep.values()):
+                yield dict(zip(keys, values))
+        else:
+            yield from self._random_points
+
+    def _get_random_points(self) -> List[Dict]:
+        rng = random.Random(self._seed)
+        points = []
+
+        for _ in range(self._samples):
+            point = {key: self._sample(rng, key, values) for key, values in self._sweep.items()}
+            for key, value in point.items():
+                self._check_value(key, value)
+            points.append(point)
+
+        return points
+
+    def _get_values_spec(self, key: str, values: Any):
+        if isinstance(values, list):
+            if len(values) == 0:
+                raise NotValidSweepException(f"Values list of swept key {key} can not be empty")
+            for value in values:
+                self._check_value(key, value)
+            return values
+
+        if not isinstance(values, dict) or not {'min', 'max'}.issubset(values.keys()):
+            raise NotValidSweepException(f"Values of swept key {key} must be a list or a dict with 'min' and 'max'")
+
+        low, high = values['min'], values['max']
+        if not all(isinstance(x, (int, float)) and not isinstance(x, bool) for x in (low, high)) or low > high:
+            raise NotValidSweepException(f"Range of swept key {key} must have numeric 'min' <= 'max'")
+        if values.get('log', False) and low <= 0:
+            raise NotValidSweepException(f"Logarithmic range of swept key {key} must have positive 'min'")
+        if self._is_int_argument(key) and math.ceil(low) > math.floor(high):
+            raise NotValidSweepException(f"Range of integer swept key {key} must contain an integer")
+
+        # range ends are checked, values in between have the same type
+        self._check_value(key, self._cast(key, low, low, high))
+        self._check_value(key, self._cast(key, high, low, high))
+
+        if self._mode == 'random':
+            return values
+
+        num = values.get('num', None)
+        if not self._is_int(num) or num <= 0:
+            raise NotValidSweepException(f"Range of swept key {key} requires positive integer 'num' in grid mode")
+        # checked before the values are generated, a sweep with more values of one key is too large anyway
+        if num > Constants.SWEEP_MAX_CONFIGURATIONS:
+            raise NotValidSweepException(
+                f"Sweep can not expand to more than {Constants.SWEEP_MAX_CONFIGURATIONS} configuration files")
+
+        grid_values = sorted(set(self._cast(key, x, low, high)
+                                 for x in self._linspace(low, high, num, values.get('log', False))))
+        for value in grid_values:
+            self._check_value(key, value)
+
+        return grid_values
+
+    def _check_value(self, key: str, value: Any):
+        if not self._validator.is_valid_value(key, value):
+            raise NotValidSweepException(f"Value {value} is not valid for swept key {key}")
+
+    def _sample(self, rng: random.Random, key: str, values):
+        if isinstance(values, list):
+            return rng.choice(values)
+
+        low, high = values['min'], values['max']
+
+        if self._is_int_argument(key):
+            if values.get('log', False):
+                return self._cast(key, math.exp(rng.uniform(math.log(low), math.log(high))), low, high)
+            return rng.randint(math.ceil(low), math.floor(high))
+
+        if values.get('log', False):
+            return math.exp(rng.uniform(math.log(low), math.log(high)))
+        return rng.uniform(low, high)
+
+    def _cast(self, key: str, value: float, low: float, high: float):
+        # rounded integers are kept in the range, e.g. ends 1.4 and 3.6 would be rounded to 1 and 4 otherwise
+        if self._is_int_argument(key):
+            return min(max(int(round(value)), math.ceil(low)), math.floor(high))
+
+        return float(value)
+
+    @staticmethod
+    def _is_int(value: Any) -> bool:
+        return isinstance(value, int) and not isinstance(value, bool)
+
+    def _is_int_argument(self, key: str) -> bool:
+        argument = self._validator.get_argument(key)
+        return argument is not None and argument.type is int
+
+    @staticmethod
+    def _linspace(low: float, high: float, num: int, log: bool) -> List[float]:
+        if num == 1:
+            return [low]
+
+        if not log:
+            return [low + (high - low) * i / (num - 1) for i in range(num)]
+
+        log_low, log_high = math.log(low), math.log(high)
+        inner_values = [math.exp(log_low + (log_high - log_low) * i / (num - 1)) for i in range(1, num - 1)]
+
+        return [low] + inner_values + [high]
@@ -0,0 +1,211 @@
+import fcntl
+import heapq
+import itertools
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, NamedTuple, Optional, Tuple, Any, Iterator
+
+from src.utils import json_codec
+
+
+class ArchiveSegment(NamedTuple):
+    path: str
+    blocks: List[Tuple[int, int]]
+    sorted_filenames: List[str]
+    positions: Dict[str, Tuple[int, int]]
+
+
+class ConfigurationFileArchive:
+    # Keeps cold configuration files in immutable segment files. A segment is a sequence of zlib compressed blocks,
+    # each holding a JSON list of up to block_size configuration files. A sidecar index lists the blocks and the block
+    # and position of every file, so listings need only the indices and a lookup decompresses a single block.
+    # A segment is visible once its index is renamed into place, which happens after the segment file is fsynced.
+    # Segments written by other processes are picked up on the next listing, lookups of files which are not in known
+    # segments look for new segments at most once per MISSING_FILE_REFRESH_INTERVAL_S.
+    # Returned data objects are shared between callers and must not be modified.
+    SEGMENT_FILENAME_PATTERN = re.compile(r'^segment-(\d{10})\.idx$')
+    LOCK_FILENAME = 'archive.lock'
+    DECOMPRESSED_BLOCKS_CACHE_SIZE = 16
+    MISSING_FILE_REFRESH_INTERVAL_S = 1
+
+    def __init__(self, directory: str, block_size: int):
+        assert block_size > 0, "block_size must be a positive integer"
+
+        self._directory = directory
+        self._block_size = block_size
+        self._segments: Dict[str, ArchiveSegment] = {}
+        self._segments_by_filename: Dict[str, ArchiveSegment] = {}
+        self._sorted_filenames: List[str] = []
+        self._refreshed_at = float('-inf')
+        self._decompressed_blocks = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    def get_sorted_filenames(self) -> List[str]:
+        with self._lock:
+            self._refresh()
+
+            return self._sorted_filenames
+
+    def get_data(self, filename: str) -> Optional[Any]:
+        with self._lock:
+            segment = self._segments_by_filename.get(filename, None)
+            if segment is None and time.monotonic() - self._refreshed_at >= self.MISSING_FILE_REFRESH_INTERVAL_S:
+                self._refresh()
+                segment = self._segments_by_filename.get(filename, None)
+
+        if segment is None:
+            return None
+
+        block_number, position = segment.positions[filename]
+
+        return self._get_block(segment, block_number)[position]
+
+    def iterate_data(self) -> Iterator[Tuple[str, Any]]:
+        with self._lock:
+            self._refresh()
+            segments = list(self._segments.values())
+
+        for segment in segments:
+            # blocks hold consecutive sorted filenames, so every block is decompressed once
+            for filename in segment.sorted_filenames:
+                block_number, position = segment.positions[filename]
+                yield filename, self._get_block(segment, block_number)[position]
+
+    def add(self, filenames_and_data: List[Tuple[str, Any]]):
+        # Writes a new segment, must be called with archive lock held (see locked)
+        if not filenames_and_data:
+            return
+
+        os.makedirs(self._directory, exist_ok=True)
+        filenames_and_data = sorted(filenames_and_data, key=lambda filename_and_data: filename_and_data[0])
+
+        segment_number = max([number for number, _ in self._get_segment_index_paths()], default=0) + 1
+        segment_path = self._get_segment_path(segment_number)
+        index_path = f"{segment_path[:-len('.seg')]}.idx"
+
+        blocks = []
+        files = []
+        with open(segment_path, 'wb') as f:
+            for start in range(0, len(filenames_and_data), self._block_size):
+                block = filenames_and_data[start:start + self._block_size]
+                compressed_block = zlib.compress(json_codec.dumps([data for _, data in block]).encode())
+
+                blocks.append((f.tell(), len(compressed_block)))
+                files.extend((filename, len(blocks) - 1, position) for position, (filename, _) in enumerate(block))
+                f.write(compressed_block)
+
+            f.flush()
+            os.fsync(f.fileno())
+
+        temporary_index_path = f"{index_path}.tmp"
+        with open(temporary_index_path, 'w') as f:
+            f.write(json_codec.dumps({'blocks': blocks, 'files': files}))
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(temporary_index_path, index_path)
+        self._sync_directory()
+
+    @contextmanager
+    def locked(self, blocking: bool = True) -> Iterator[bool]:
+        # Serializes archiving between processes, yields False if blocking is False and other process holds the lock
+        os.makedirs(self._directory, exist_ok=True)
+
+        with open(os.path.join(self._directory, self.LOCK_FILENAME), 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _refresh(self):
+        # must be called with _lock held
+        index_paths = {index_path for _, index_path in self._get_segment_index_paths()}
+        self._refreshed_at = time.monotonic()
+        if index_paths == self._segments.keys():
+            return
+
+        segments = {index_path: segment for index_path, segment in self._segments.items() if index_path in index_paths}
+        for index_path in index_paths - segments.keys():
+            segment = self._read_segment(index_path)
+            if segment is not None:
+                segments[index_path] = segment
+
+        self._segments = segments
+        self._segments_by_filename = {filename: segment for segment in segments.values()
+                                      for filename in segment.sorted_filenames}
+        # a file is archived twice if archiving stopped between writing a segment and removing the archived files
+        sorted_filenames = heapq.merge(*(segment.sorted_filenames for segment in segments.values()))
+        self._sorted_filenames = [filename for filename, _ in itertools.groupby(sorted_filenames)]
+
+    def _get_block(self, segment: ArchiveSegment, block_number: int) -> List[Any]:
+        key = (segment.path, block_number)
+
+        with self._lock:
+            block = self._decompressed_blocks.get(key, None)
+            if block is not None:
+                self._decompressed_blocks.move_to_end(key)
+                return block
+
+        offset, length = segment.blocks[block_number]
+        with open(segment.path, 'rb') as f:
+            f.seek(offset)
+            block = json_codec.loads(zlib.decompress(f.read(length)))
+
+        with self._lock:
+            self._decompressed_blocks[key] = block
+            if len(self._decompressed_blocks) > self.DECOMPRESSED_BLOCKS_CACHE_SIZE:
+                self._decompressed_blocks.popitem(last=False)
+
+        return block
+
+    def _read_segment(self, index_path: str) -> Optional[ArchiveSegment]:
+        try:
+            with open(index_path, 'rb') as f:
+                index = json_codec.load(f)
+        except FileNotFoundError:
+            return None
+
+        positions = {filename: (block_number, position) for filename, block_number, position in index['files']}
+        sorted_filenames = [filename for filename, _, _ in index['files']]
+
+        return ArchiveSegment(f"{index_path[:-len('.idx')]}.seg", [tuple(block) for block in index['blocks']],
+                              sorted_filenames, positions)
+
+    def _get_segment_index_paths(self) -> List[Tuple[int, str]]:
+        try:
+            filenames = os.listdir(self._directory)
+        except FileNotFoundError:
+            return []
+
+        index_paths = []
+        for filename in filenames:
+            match = self.SEGMENT_FILENAME_PATTERN.match(filename)
+            if match is not None:
+                index_paths.append((int(match.group(1)), os.path.join(self._directory, filename)))
+
+        return sorted(index_paths)
+
+    def _get_segment_path(self, segment_number: int) -> str:
+        return os.path.join(self._directory, f"segment-{segment_number:010d}.seg")
+
+    def _sync_directory(self):
+        directory_fd = os.open(self._directory, os.O_RDONLY)
+        try:
+            os.fsync(directory_fd)
+        finally:
+            os.close(directory_fd)
@@ -0,0 +1,42 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple, TypeVar
+
+from src.constants import Constants
+from src.utils import json_codec
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+class BulkLoader:
+    # Runs blocking loads (e.g. file reads, which are round trips on network filesystems) on a bounded thread pool.
+    # Results are returned in the order of the items.
+
+    def __init__(self, max_workers: int):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='bulk-loader')
+
+    def map(self, load: Callable[[T], R], items: List[T]) -> List[R]:
+        if len(items) < 2:
+            return [load(item) for item in items]
+
+        return list(self._executor.map(load, items))
+
+
+def load_json_file(path: str) -> Optional[Any]:
+    # None is returned for files removed in the meantime
+    stat_and_data = load_json_file_with_stat(path)
+
+    return None if stat_and_data is None else stat_and_data[1]
+
+
+def load_json_file_with_stat(path: str) -> Optional[Tuple[os.stat_result, Any]]:
+    # Stat is taken from the opened file, so it always describes the version of the file that was read
+    try:
+        with open(path, 'rb') as f:
+            return os.fstat(f.fileno()), json_codec.load(f)
+    except FileNotFoundError:
+        return None
+
+
+bulk_loader = BulkLoader(Constants.BULK_LOADER_WORKERS)
@@ -0,0 +1,97 @@
+import itertools
+import threading
+import time
+import uuid
+from collections import deque
+from typing import List, NamedTuple, Optional, Tuple, Collection
+
+
+class ConfigurationFileChange(NamedTuple):
+    sequence: int
+    filename: str
+    status: str
+
+
+class ChangeFeed:
+    # In-process feed of configuration file changes (new files and status transitions), numbered by a sequence.
+    # Readers pass a token of the last change they have seen and wait until newer changes are published. Only the last
+    # max_changes changes are kept, readers which fell further behind must list configuration files again. Sequences
+    # exist only in the process which published them, so tokens include a random id of the feed.
+
+    def __init__(self, max_changes: int):
+        assert max_changes > 0, "max_changes must be a positive integer"
+
+        self._feed_id = uuid.uuid4().hex[:12]
+        self._changes = deque(maxlen=max_changes)
+        self._sequence = 0
+        self._condition = threading.Condition()
+
+    def get_token(self) -> str:
+        # token of the newest change, readers using it get only changes published later
+        with self._condition:
+            return self._encode_token(self._sequence)
+
+    def publish(self, filenames_and_statuses: List[Tuple[str, str]]):
+        if not filenames_and_statuses:
+            return
+
+        with self._condition:
+            for filename, status in filenames_and_statuses:
+                self._sequence += 1
+                self._changes.append(ConfigurationFileChange(self._sequence, filename, status))
+
+            self._condition.notify_all()
+
+    def wait_for_changes(self, token: str, timeout: float, limit: int,
+                         statuses: Optional[Collection[str]] = None) \
+            -> Optional[Tuple[List[ConfigurationFileChange], str]]:
+        # Returns up to limit changes published after the token (waiting up to timeout seconds for at least one) and
+        # the token to pass next time. None is returned if the token was created by other feed or changes after it
+        # are no longer kept. Raises ValueError for tokens that were not created by a ChangeFeed.
+        feed_id, sequence = self._decode_token(token)
+        deadline = time.monotonic() + timeout
+
+        with self._condition:
+            if feed_id != self._feed_id or sequence > self._sequence:
+                return None
+
+            while True:
+                if self._changes and sequence < self._changes[0].sequence - 1:
+                    return None
+
+                changes, sequence = self._get_changes_after(sequence, limit, statuses)
+                remaining = deadline - time.monotonic()
+
+                if changes or remaining <= 0:
+                    return changes, self._encode_token(sequence)
+
+                self._condition.wait(remaining)
+
+    def _get_changes_after(self, sequence: int, limit: int, statuses: Optional[Collection[str]]) \
+            -> Tuple[List[ConfigurationFileChange], int]:
+        # must be called with _condition held, returned sequence is the last examined one
+        if not self._changes or sequence >= self._sequence:
+            return [], sequence
+
+        changes = []
+        for change in itertools.islice(self._changes, sequence - self._changes[0].sequence + 1, None):
+            if len(changes) == limit:
+                break
+
+            sequence = change.sequence
+            if statuses is None or change.status in statuses:
+                changes.append(change)
+
+        return changes, sequence
+
+    def _encode_token(self, sequence: int) -> str:
+        return f"{self._feed_id}-{sequence}"
+
+    @staticmethod
+    def _decode_token(token: str) -> Tuple[str, int]:
+        feed_id, separator, sequence = token.rpartition('-')
+
+        if not separator or not feed_id or not sequence.isdigit():
+            raise ValueError(f"Not valid changes token: {token}")
+
+        return feed_id, int(sequence)
@@ -0,0 +1,77 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, NamedTuple, Optional
+
+from src.constants import Constants
+
+
+class CachedConfigurationFile(NamedTuple):
+    configuration_file: Any
+    size: int
+
+
+class ConfigurationFileCache:
+    # Bounded LRU cache of ConfigurationFile objects built from stored configuration files, safe to share between
+    # threads. Keys identify the stored version of a file (e.g. path, inode, mtime and size for JSON files), so
+    # a changed file gets a new key and its old object is evicted like any other unused entry.
+    # Size of an entry is approximated by the JSON size of its configuration file.
+    # Cached objects are shared between callers and must not be modified.
+
+    def __init__(self, max_entries: int = Constants.CONFIGURATION_FILE_CACHE_MAX_ENTRIES,
+                 max_bytes: int = Constants.CONFIGURATION_FILE_CACHE_MAX_BYTES):
+        assert max_entries > 0, "max_entries must be a positive integer"
+        assert max_bytes > 0, "max_bytes must be a positive integer"
+
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            self._hits += 1
+            self._entries.move_to_end(key)
+
+            return entry.configuration_file
+
+    def put(self, key: Hashable, configuration_file: Any, size: int):
+        if size > self._max_bytes:
+            return
+
+        with self._lock:
+            old_entry = self._entries.pop(key, None)
+            if old_entry is not None:
+                self._bytes -= old_entry.size
+
+            self._entries[key] = CachedConfigurationFile(configuration_file, size)
+            self._bytes += size
+
+            while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+                _, evicted_entry = self._entries.popitem(last=False)
+                self._bytes -= evicted_entry.size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._hits = 0
+            self._misses = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'size': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self._max_entries,
+                'max_bytes': self._max_bytes
+            }
@@ -0,0 +1,47 @@
+import hashlib
+import json
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+# Stored configuration files keep metadata under this key, next to the fields of ConfigurationFile.to_dict()
+METADATA_KEY = 'metadata'
+
+
+def get_checksum(configuration_file_data: Dict) -> str:
+    # standard library json gives the same canonical form regardless of the JSON codec in use
+    canonical_data = json.dumps(configuration_file_data, sort_keys=True, separators=(',', ':'), default=str)
+
+    return hashlib.blake2b(canonical_data.encode(), digest_size=16).hexdigest()
+
+
+def add_metadata(configuration_file_data: Dict, schema_version: str, submitted_at: datetime,
+                 priority: int = 0) -> Dict:
+    # configuration_file_data must already be valid for parser definitions of schema_version
+    return {
+        **configuration_file_data,
+        METADATA_KEY: {
+            'schema_version': schema_version,
+            'checksum': get_checksum(configuration_file_data),
+            'submitted_at': submitted_at.isoformat(timespec='seconds'),
+            'priority': priority
+        }
+    }
+
+
+def split_metadata(stored_data: Dict) -> Tuple[Dict, Optional[Dict]]:
+    # Files stored before metadata was added, or by other tools, have no metadata
+    if METADATA_KEY not in stored_data:
+        return stored_data, None
+
+    configuration_file_data = {key: value for key, value in stored_data.items() if key != METADATA_KEY}
+    metadata = stored_data[METADATA_KEY]
+
+    return configuration_file_data, metadata if isinstance(metadata, dict) else None
+
+
+def is_trusted(configuration_file_data: Dict, metadata: Optional[Dict], schema_version: str) -> bool:
+    # Data can be trusted if it was validated with the current parser definitions and was not modified since
+    if metadata is None or metadata.get('schema_version', None) != schema_version:
+        return False
+
+    return metadata.get('checksum', None) == get_checksum(configuration_file_data)
@@ -1,4 +1,13 @@
 import argparse
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Callable, Any, FrozenSet
+
+from src.constants import Constants
+from src.utils.utils import get_args_as_list_of_strings
 
 
 class ArgumentParserWithoutSystemExit(argparse.ArgumentParser):
@@ -315,6 +324,228 @@ class FastAcerAceraxParser(ArgumentParserWithoutSystemExit):
         self.add_argument('--dump', help='Dump memory and models on given timesteps', nargs='*', type=int)
 
 
+class ArgumentSpec(NamedTuple):
+    dest: str
+    is_flag: bool
+    type: Optional[Callable[[str], Any]]
+    choices: Optional[Any]
+    nargs: Optional[str]
+    required: bool
+
+
+class ValidationCache:
+    # Bounded LRU cache of validation results (error messages, '' for valid configs), safe to share between threads
+
+    def __init__(self, maxsize: int = Constants.VALIDATION_CACHE_SIZE):
+        assert maxsize > 0, "maxsize must be a positive integer"
+
+        self._maxsize = maxsize
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def get_key(schema_version: str, config: Dict) -> bytes:
+        # keys are not sorted, argparse reports the first offending argument in the order of the config
+        canonical_config = json.dumps(config, default=str)
+
+        return hashlib.blake2b(f"{schema_version}:{canonical_config}".encode(), digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[str]:
+        with self._lock:
+            result = self._results.get(key, None)
+            if result is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+                self._results.move_to_end(key)
+
+            return result
+
+    def put(self, key: bytes, error_message: str):
+        with self._lock:
+            self._results[key] = error_message
+            self._results.move_to_end(key)
+
+            if len(self._results) > self._maxsize:
+                self._results.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'size': len(self._results),
+                'maxsize': self._maxsize
+            }
+
+
+class CompiledParserValidator:
+    # Validates algorithm config dicts directly against argument definitions compiled once from a parser class.
+    # Only configs the compiled schema can not accept with certainty (errors, abbreviated keys, values that look like
+    # options) are passed to a freshly built argparse parser, so accept/reject decisions and error messages are the
+    # same as in ArgumentParserWithoutSystemExit. Instances are immutable after construction and safe to share.
+    SUPPORTED_NARGS = {None, '+', '*'}
+    NEGATIVE_NUMBER_PATTERN = re.compile(r'^-\d+$|^-\d*\.\d+$')
+
+    def __init__(self, parser_class: type, cache: Optional[ValidationCache] = None):
+        self._parser_class = parser_class
+        self._cache = cache
+
+        parser = parser_class()
+        self._arguments = self._compile_arguments(parser)
+        self._required_keys = self._get_required_keys(self._arguments)
+        # argparse treats negative numbers as options if any option looks like a negative number
+        self._negative_numbers_are_values = not parser._has_negative_number_optionals
+        self._schema_version = self._get_schema_version(parser_class, parser)
+
+    @property
+    def schema_version(self) -> str:
+        return self._schema_version
+
+    @property
+    def arguments(self) -> Dict[str, ArgumentSpec]:
+        return dict(self._arguments)
+
+    def get_argument(self, key: str) -> Optional[ArgumentSpec]:
+        return self._arguments.get(key, None)
+
+    def validate(self, config: Dict) -> str:
+        if self._cache is None:
+            return self._validate(config)
+
+        key = ValidationCache.get_key(self._schema_version, config)
+        error_message = self._cache.get(key)
+
+        if error_message is None:
+            error_message = self._validate(config)
+            self._cache.put(key, error_message)
+
+        return error_message
+
+    def _validate(self, config: Dict) -> str:
+        if self._is_valid(config):
+            return ''
+
+        parser = self._parser_class()
+        parser.parse_args(get_args_as_list_of_strings(config))
+
+        return parser.error_message
+
+    def is_valid_value(self, key: str, value: Any) -> bool:
+        argument = self._arguments.get(key, None)
+        if argument is None:
+            return False
+
+        return self._is_valid_value(argument, value)
+
+    def _is_valid(self, config: Dict) -> bool:
+        present_keys = set()
+
+        for key, value in config.items():
+            if value is None or value == '' or value is False:
+                # skipped by get_args_as_list_of_strings, so never seen by argparse
+                continue
+
+            argument = self._arguments.get(key, None)
+            if argument is None or not self._is_valid_value(argument, value):
+                return False
+
+            present_keys.add(key)
+
+        return self._required_keys.issubset(present_keys)
+
+    def _is_valid_value(self, argument: ArgumentSpec, value: Any) -> bool:
+        if value is None or value == '' or value is False:
+            return not argument.required
+
+        if argument.is_flag:
+            return value is True
+
+        if isinstance(value, bool):
+            return False
+
+        if isinstance(value, (list, tuple)):
+            if argument.nargs is None or len(value) == 0:
+                return False
+            return all(self._is_valid_single_value(argument, sub_value) for sub_value in value)
+
+        return self._is_valid_single_value(argument, value)
+
+    def _is_valid_single_value(self, argument: ArgumentSpec, value: Any) -> bool:
+        arg_string = f"{value}"
+
+        if arg_string == '':
+            return False
+
+        if arg_string[0] == '-':
+            if not self._negative_numbers_are_values or not self.NEGATIVE_NUMBER_PATTERN.match(arg_string):
+                return False
+
+        converted = arg_string
+        if argument.type is not None:
+            try:
+                converted = argument.type(arg_string)
+            except Exception:
+                return False
+
+        if argument.choices is not None and converted not in argument.choices:
+            return False
+
+        return True
+
+    @staticmethod
+    def _compile_arguments(parser: argparse.ArgumentParser) -> Dict[str, ArgumentSpec]:
+        arguments = {}
+
+        for action in parser._actions:
+            if isinstance(action, argparse._StoreTrueAction):
+                is_flag = True
+            elif type(action) is argparse._StoreAction and action.nargs in CompiledParserValidator.SUPPORTED_NARGS:
+                is_flag = False
+            else:
+                # Every other action is left to argparse
+                continue
+
+            for option_string in action.option_strings:
+                if not option_string.startswith('--'):
+                    continue
+
+                arguments[option_string[2:]] = ArgumentSpec(
+                    dest=action.dest,
+                    is_flag=is_flag,
+                    type=None if is_flag else action.type,
+                    choices=action.choices,
+                    nargs=action.nargs,
+                    required=action.required
+                )
+
+        return arguments
+
+    @staticmethod
+    def _get_schema_version(parser_class: type, parser: argparse.ArgumentParser) -> str:
+        # Changes whenever argument definitions of the parser change, so cached results of old definitions never match
+        definitions = [parser_class.__qualname__]
+
+        for action in parser._actions:
+            choices = None if action.choices is None else sorted(repr(choice) for choice in action.choices)
+            definitions.append(repr((type(action).__name__, action.option_strings, action.dest, action.nargs,
+                                     getattr(action.type, '__name__', repr(action.type)), choices, action.required)))
+
+        return hashlib.sha1("\n".join(definitions).encode()).hexdigest()
+
+    @staticmethod
+    def _get_required_keys(arguments: Dict[str, ArgumentSpec]) -> FrozenSet[str]:
+        return frozenset(key for key, argument in arguments.items() if argument.required)
+
+
 class ParserFactory:
     PARSER_ALGORITHM_MAPPING = {
         'acer': AcerAceracParser,
@@ -328,3 +559,28 @@ class ParserFactory:
     @staticmethod
     def get_parser(algorithm: str) -> ArgumentParserWithoutSystemExit:
         return ParserFactory.PARSER_ALGORITHM_MAPPING[algorithm]()
+
+    _validators = {}
+    _validators_lock = threading.Lock()
+    validation_cache = ValidationCache()
+
+    @staticmethod
+    def get_validator(algorithm: str) -> CompiledParserValidator:
+        parser_class = ParserFactory.PARSER_ALGORITHM_MAPPING[algorithm]
+
+        validator = ParserFactory._validators.get(parser_class, None)
+        if validator is None:
+            with ParserFactory._validators_lock:
+                validator = ParserFactory._validators.get(parser_class, None)
+                if validator is None:
+                    validator = CompiledParserValidator(parser_class, ParserFactory.validation_cache)
+                    ParserFactory._validators[parser_class] = validator
+
+        return validator
+
+    @staticmethod
+    def reset_validators():
+        # Needed after parser definitions are changed at runtime
+        with ParserFactory._validators_lock:
+            ParserFactory._validators.clear()
+            ParserFactory.validation_cache.clear()
@@ -0,0 +1,152 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, NamedTuple, Any, Optional
+
+from src.utils import json_codec
+from src.utils.bulk_loader import bulk_loader
+
+logger = logging.getLogger(__name__)
+
+
+class IndexEntry(NamedTuple):
+    filename: str
+    inode: int
+    size: int
+    mtime_ns: int
+    data: Any
+
+
+class DirectoryIndex:
+    # In-process index of files in one directory. A refresh costs one os.stat of the directory when nothing
+    # changed, and one os.scandir pass (without per file stat calls) otherwise. Files are parsed lazily, the first time
+    # their data is requested. Every lookup of a parsed file costs one os.stat, the file is parsed again if its inode,
+    # size or mtime changed, so files replaced (renamed) and files modified in place are both seen. Returned data
+    # objects are shared between callers and must not be modified.
+
+    # Directory mtime resolution can hide changes made right after a scan, so a recently modified directory
+    # is rescanned even if its mtime did not change
+    RACY_INTERVAL_NS = 2 * 10 ** 9
+
+    def __init__(self, directory: str, extension: str = '.json'):
+        assert isinstance(directory, str), "directory parameter must be a string"
+        assert isinstance(extension, str), "extension parameter must be a string"
+
+        self._directory = directory
+        self._extension = extension
+        self._inodes: Dict[str, int] = {}
+        self._sorted_filenames: List[str] = []
+        self._entries: Dict[str, IndexEntry] = {}
+        self._directory_mtime_ns: Optional[int] = None
+        self._scanned_at_ns: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    def get_filenames(self) -> List[str]:
+        with self._lock:
+            self._refresh()
+
+            return self._sorted_filenames
+
+    def get_entry(self, filename: str) -> Optional[IndexEntry]:
+        # None is returned for files that were removed or can not be parsed (e.g. are not fully written yet)
+        entry = self._get_cached_entry(filename)
+
+        if entry is None:
+            entry = self._read_entry(filename)
+            self._cache_entry(entry)
+
+        return entry
+
+    def get_all_entries(self) -> List[IndexEntry]:
+        filenames = self.get_filenames()
+        entries = [self._get_cached_entry(filename) for filename in filenames]
+
+        not_cached_filenames = [filename for filename, entry in zip(filenames, entries) if entry is None]
+        read_entries = iter(bulk_loader.map(self._read_entry, not_cached_filenames))
+
+        for position, entry in enumerate(entries):
+            if entry is None:
+                entry = next(read_entries)
+                self._cache_entry(entry)
+                entries[position] = entry
+
+        return [entry for entry in entries if entry is not None]
+
+    def get_all_data(self) -> List[Any]:
+        return [entry.data for entry in self.get_all_entries()]
+
+    def invalidate(self):
+        with self._lock:
+            self._directory_mtime_ns = None
+
+    def _get_cached_entry(self, filename: str) -> Optional[IndexEntry]:
+        with self._lock:
+            entry = self._entries.get(filename, None)
+
+            if entry is None or entry.inode != self._inodes.get(filename, None):
+                return None
+
+        try:
+            stat = os.stat(os.path.join(self._directory, filename))
+        except FileNotFoundError:
+            return None
+
+        if (stat.st_ino, stat.st_size, stat.st_mtime_ns) != (entry.inode, entry.size, entry.mtime_ns):
+            return None
+
+        return entry
+
+    def _cache_entry(self, entry: Optional[IndexEntry]):
+        if entry is None:
+            return
+
+        with self._lock:
+            if self._inodes.get(entry.filename, None) == entry.inode:
+                self._entries[entry.filename] = entry
+
+    def _refresh(self):
+        directory_mtime_ns = os.stat(self._directory).st_mtime_ns
+
+        if directory_mtime_ns == self._directory_mtime_ns and not self._is_racy(directory_mtime_ns):
+            return
+
+        scan_started_ns = time.time_ns()
+        inodes = {}
+
+        with os.scandir(self._directory) as directory_entries:
+            for directory_entry in directory_entries:
+                if directory_entry.name.endswith(self._extension) and directory_entry.is_file():
+                    inodes[directory_entry.name] = directory_entry.inode()
+
+        if inodes.keys() != self._inodes.keys():
+            self._sorted_filenames = sorted(inodes.keys())
+            self._entries = {filename: entry for filename, entry in self._entries.items() if filename in inodes}
+
+        self._inodes = inodes
+        self._directory_mtime_ns = directory_mtime_ns
+        self._scanned_at_ns = scan_started_ns
+
+    def _is_racy(self, directory_mtime_ns: int) -> bool:
+        return directory_mtime_ns >= self._scanned_at_ns - self.RACY_INTERVAL_NS
+
+    def _read_entry(self, filename: str) -> Optional[IndexEntry]:
+        path = os.path.join(self._directory, filename)
+
+        try:
+            with open(path, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                data = json_codec.load(f)
+        except FileNotFoundError:
+            # file was moved to other directory in the meantime
+            return None
+        except ValueError:
+            # not fully written yet, it will be read again next time
+            logger.warning(f"Could not parse {path}, skipping it")
+            return None
+
+        return IndexEntry(filename, stat.st_ino, stat.st_size, stat.st_mtime_ns, data)
@@ -0,0 +1,180 @@
+import ctypes
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple, IO
+
+
+def _get_syncfs() -> Optional[Callable[[int], int]]:
+    # syncfs(2) writes back all data and metadata of the filesystem containing the given file descriptor, Linux only
+    try:
+        syncfs = ctypes.CDLL(None, use_errno=True).syncfs
+    except (OSError, AttributeError):
+        return None
+
+    syncfs.argtypes = [ctypes.c_int]
+    syncfs.restype = ctypes.c_int
+
+    return syncfs
+
+
+class PendingWrite:
+    __slots__ = ('path', 'temporary_path', 'temporary_file', 'error', 'done')
+
+    def __init__(self, path: str, temporary_path: str, temporary_file: IO):
+        self.path = path
+        self.temporary_path = temporary_path
+        self.temporary_file = temporary_file
+        self.error: Optional[Exception] = None
+        self.done = threading.Event()
+
+
+class GroupCommitFileWriter:
+    # Writes files atomically: content goes to a hidden temporary file in the target directory, which is made durable
+    # and then linked under the final name, so readers never see partially written files and a crash leaves only
+    # temporary files behind. Linking fails with FileExistsError like open(path, 'x').
+    # Writes arriving within commit_window seconds of each other are committed together, with two barriers per group
+    # and filesystem instead of an fsync per file: one syncfs makes the data of all temporary files durable before they
+    # are linked, and one more makes the new names durable. syncfs also writes back unrelated dirty data of the
+    # filesystem, so where it is not available, or use_syncfs is False, every file and directory is fsynced instead.
+    # With commit_window <= 0 every write is committed on its own.
+
+    def __init__(self, commit_window: float, use_syncfs: bool = True):
+        self._commit_window = commit_window
+        self._syncfs = _get_syncfs() if use_syncfs else None
+        self._pending: List[PendingWrite] = []
+        self._leader_waiting = False
+        self._lock = threading.Lock()
+
+    def write(self, path: str, content: str):
+        pending_write = self._write_temporary_file(path, content)
+
+        if self._commit_window <= 0:
+            self._commit([pending_write])
+        else:
+            with self._lock:
+                self._pending.append(pending_write)
+                is_leader = not self._leader_waiting
+                self._leader_waiting = True
+
+            if is_leader:
+                # first writer of a group waits for others and commits the whole group
+                time.sleep(self._commit_window)
+                with self._lock:
+                    pending_writes, self._pending = self._pending, []
+                    self._leader_waiting = False
+                self._commit(pending_writes)
+            else:
+                pending_write.done.wait()
+
+        if pending_write.error is not None:
+            raise pending_write.error
+
+    def write_many(self, paths_and_contents: List[Tuple[str, str]]) -> List[Optional[Exception]]:
+        # Commits all files as one group without waiting for the commit window, returns error of every write
+        pending_writes = [self._write_temporary_file(path, content) for path, content in paths_and_contents]
+        self._commit(pending_writes)
+
+        return [pending_write.error for pending_write in pending_writes]
+
+    @staticmethod
+    def _write_temporary_file(path: str, content: str) -> PendingWrite:
+        directory, filename = os.path.split(path)
+        temporary_path = os.path.join(directory, f".{filename}.{uuid.uuid4().hex}.tmp")
+
+        temporary_file = open(temporary_path, 'x')
+        try:
+            temporary_file.write(content)
+            temporary_file.flush()
+        except BaseException:
+            temporary_file.close()
+            os.unlink(temporary_path)
+            raise
+
+        return PendingWrite(path, temporary_path, temporary_file)
+
+    def _commit(self, pending_writes: List[PendingWrite]):
+        for pending_write in pending_writes:
+            try:
+                if self._syncfs is None:
+                    os.fsync(pending_write.temporary_file.fileno())
+            except OSError as e:
+                pending_write.error = e
+            finally:
+                pending_write.temporary_file.close()
+
+        if self._syncfs is not None:
+            self._sync_filesystems(pending_writes)
+
+        committed_directories = set()
+        for pending_write in pending_writes:
+            try:
+                if pending_write.error is None:
+                    os.link(pending_write.temporary_path, pending_write.path)
+                    committed_directories.add(os.path.dirname(pending_write.path))
+            except OSError as e:
+                pending_write.error = e
+            finally:
+                try:
+                    os.unlink(pending_write.temporary_path)
+                except FileNotFoundError:
+                    pass
+
+        if self._syncfs is not None:
+            self._sync_filesystems([pending_write for pending_write in pending_writes if pending_write.error is None])
+        else:
+            directory_errors = {}
+            for directory in committed_directories:
+                try:
+                    self._sync_directory(directory)
+                except OSError as e:
+                    directory_errors[directory] = e
+
+            for pending_write in pending_writes:
+                if pending_write.error is None:
+                    pending_write.error = directory_errors.get(os.path.dirname(pending_write.path), None)
+
+        for pending_write in pending_writes:
+            pending_write.done.set()
+
+    def _sync_filesystems(self, pending_writes: List[PendingWrite]):
+        # one syncfs per filesystem holding the directories of pending writes, which fail if it fails
+        pending_writes = [pending_write for pending_write in pending_writes if pending_write.error is None]
+        directories_by_device: Dict[int, str] = {}
+        devices: Dict[str, int] = {}
+
+        for directory in {os.path.dirname(pending_write.path) for pending_write in pending_writes}:
+            try:
+                devices[directory] = os.stat(directory).st_dev
+                directories_by_device.setdefault(devices[directory], directory)
+            except OSError:
+                continue
+
+        device_errors = {}
+        for device, directory in directories_by_device.items():
+            try:
+                directory_fd = os.open(directory, os.O_RDONLY)
+                try:
+                    if self._syncfs(directory_fd) != 0:
+                        error_number = ctypes.get_errno()
+                        raise OSError(error_number, os.strerror(error_number), directory)
+                finally:
+                    os.close(directory_fd)
+            except OSError as e:
+                device_errors[device] = e
+
+        for pending_write in pending_writes:
+            device = devices.get(os.path.dirname(pending_write.path), None)
+            if device is None:
+                pending_write.error = FileNotFoundError(f"Directory of {pending_write.path} does not exist")
+            else:
+                pending_write.error = device_errors.get(device, None)
+
+    @staticmethod
+    def _sync_directory(directory: str):
+        directory_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(directory_fd)
+        finally:
+            os.close(directory_fd)
@@ -0,0 +1,235 @@
+import logging
+import os
+import re
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from src.utils import json_codec
+
+logger = logging.getLogger(__name__)
+
+
+class JournalEntry(NamedTuple):
+    filename: str
+    status: str
+    data: Dict
+    created_at: str
+
+
+class ConfigurationJournal:
+    # Keeps configuration files and their statuses in memory, recording every change as a line in an append-only
+    # journal file. Writers block until their lines are fsynced, and one fsync covers every line written before it
+    # (writers waiting for a running fsync share the next one). State is rebuilt at startup from the last snapshot and
+    # the journal files written after it. Compaction switches writers to a new journal file and writes a snapshot of
+    # the state in a background thread, after which older journal files are removed.
+    # Returned data objects are shared between callers and must not be modified.
+    SNAPSHOT_FILENAME = 'snapshot.json'
+    JOURNAL_FILENAME_PATTERN = re.compile(r'^journal-(\d{10})\.log$')
+
+    def __init__(self, directory: str, compaction_threshold: int):
+        assert compaction_threshold > 0, "compaction_threshold must be a positive integer"
+
+        os.makedirs(directory, exist_ok=True)
+
+        self._directory = directory
+        self._compaction_threshold = compaction_threshold
+        self._entries: Dict[str, JournalEntry] = {}
+        self._filenames_by_status: Dict[str, Dict[str, None]] = {}
+        self._sorted_filenames_by_status: Dict[str, List[str]] = {}
+        # lock order is always _sync_lock first, then _lock
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._written_records = 0
+        self._synced_records = 0
+        self._records_since_snapshot = 0
+        self._compacting = False
+
+        self._generation = self._load()
+        # appending after a line torn by a crash would corrupt the next record, so every start uses a new file
+        self._generation += 1
+        self._journal_file = open(self._get_journal_path(self._generation), 'a')
+
+    def get_entry(self, filename: str) -> Optional[JournalEntry]:
+        return self._entries.get(filename, None)
+
+    def get_entries(self) -> List[JournalEntry]:
+        with self._lock:
+            return list(self._entries.values())
+
+    def get_sorted_filenames(self, status: str) -> List[str]:
+        with self._lock:
+            sorted_filenames = self._sorted_filenames_by_status.get(status, None)
+
+            if sorted_filenames is None:
+                sorted_filenames = sorted(self._filenames_by_status.get(status, {}).keys())
+                self._sorted_filenames_by_status[status] = sorted_filenames
+
+            return sorted_filenames
+
+    def add(self, entries: List[JournalEntry]):
+        records = [{'op': 'add', 'filename': entry.filename, 'status': entry.status, 'data': entry.data,
+                    'created_at': entry.created_at} for entry in entries]
+
+        self._append(records)
+
+    def change_status(self, filename: str, status_from: str, status_to: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(filename, None)
+            if entry is None or entry.status != status_from:
+                return False
+
+            sequence = self._write([{'op': 'status', 'filename': filename, 'status': status_to}])
+
+        self._wait_for_sync(sequence)
+        self._compact_if_needed()
+
+        return True
+
+    def compact(self):
+        with self._sync_lock, self._lock:
+            os.fsync(self._journal_file.fileno())
+            self._synced_records = self._written_records
+            self._journal_file.close()
+
+            self._generation += 1
+            snapshot_generation = self._generation
+            self._journal_file = open(self._get_journal_path(snapshot_generation), 'a')
+
+            entries = list(self._entries.values())
+            self._records_since_snapshot = 0
+
+        try:
+            self._write_snapshot(entries, snapshot_generation)
+            self._remove_journals_older_than(snapshot_generation)
+        finally:
+            self._compacting = False
+
+    def _append(self, records: List[Dict]):
+        with self._lock:
+            sequence = self._write(records)
+
+        self._wait_for_sync(sequence)
+        self._compact_if_needed()
+
+    def _write(self, records: List[Dict]) -> int:
+        # must be called with _lock held
+        for record in records:
+            self._journal_file.write(json_codec.dumps(record) + "\n")
+            self._apply(record)
+
+        self._journal_file.flush()
+        self._written_records += len(records)
+        self._records_since_snapshot += len(records)
+
+        return self._written_records
+
+    def _wait_for_sync(self, sequence: int):
+        with self._sync_lock:
+            if self._synced_records >= sequence:
+                # fsync of other writer already covered this record
+                return
+
+            with self._lock:
+                written_records = self._written_records
+
+            # writers are not blocked during fsync, their records are covered by the next one
+            os.fsync(self._journal_file.fileno())
+            self._synced_records = written_records
+
+    def _compact_if_needed(self):
+        with self._lock:
+            if self._compacting or self._records_since_snapshot < self._compaction_threshold:
+                return
+            self._compacting = True
+
+        threading.Thread(target=self.compact, daemon=True).start()
+
+    def _apply(self, record: Dict):
+        filename = record['filename']
+
+        if record['op'] == 'add':
+            entry = JournalEntry(filename, record['status'], record['data'], record['created_at'])
+        else:
+            entry = self._entries.get(filename, None)
+            if entry is None:
+                return
+            entry = entry._replace(status=record['status'])
+
+        old_entry = self._entries.get(filename, None)
+        if old_entry is not None:
+            self._filenames_by_status[old_entry.status].pop(filename, None)
+            self._sorted_filenames_by_status.pop(old_entry.status, None)
+
+        self._entries[filename] = entry
+        self._filenames_by_status.setdefault(entry.status, {})[filename] = None
+        self._sorted_filenames_by_status.pop(entry.status, None)
+
+    def _load(self) -> int:
+        snapshot_generation = 0
+        snapshot_path = os.path.join(self._directory, self.SNAPSHOT_FILENAME)
+
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, 'r') as f:
+                snapshot = json_codec.load(f)
+
+            snapshot_generation = snapshot['generation']
+            for filename, status, data, created_at in snapshot['entries']:
+                self._apply({'op': 'add', 'filename': filename, 'status': status, 'data': data,
+                             'created_at': created_at})
+
+        last_generation = snapshot_generation
+        for generation, path in self._get_journals():
+            if generation < snapshot_generation:
+                continue
+
+            with open(path, 'r') as f:
+                for line in f:
+                    try:
+                        record = json_codec.loads(line)
+                    except ValueError:
+                        # last line of a journal can be torn by a crash
+                        logger.warning(f"Skipping not valid journal record in {path}")
+                        continue
+                    self._apply(record)
+                    self._records_since_snapshot += 1
+
+            last_generation = generation
+
+        return last_generation
+
+    def _write_snapshot(self, entries: List[JournalEntry], generation: int):
+        snapshot_path = os.path.join(self._directory, self.SNAPSHOT_FILENAME)
+        temporary_path = f"{snapshot_path}.tmp"
+
+        with open(temporary_path, 'w') as f:
+            f.write(json_codec.dumps({'generation': generation, 'entries': [list(entry) for entry in entries]}))
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(temporary_path, snapshot_path)
+        self._sync_directory()
+
+    def _remove_journals_older_than(self, generation: int):
+        for journal_generation, path in self._get_journals():
+            if journal_generation < generation:
+                os.remove(path)
+
+    def _get_journals(self) -> List[Tuple[int, str]]:
+        journals = []
+
+        for filename in os.listdir(self._directory):
+            match = self.JOURNAL_FILENAME_PATTERN.match(filename)
+            if match is not None:
+                journals.append((int(match.group(1)), os.path.join(self._directory, filename)))
+
+        return sorted(journals)
+
+    def _get_journal_path(self, generation: int) -> str:
+        return os.path.join(self._directory, f"journal-{generation:010d}.log")
+
+    def _sync_directory(self):
+        directory_fd = os.open(self._directory, os.O_RDONLY)
+        try:
+            os.fsync(directory_fd)
+        finally:
+            os.close(directory_fd)
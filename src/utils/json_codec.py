@@ -0,0 +1,146 @@
+import json
+import math
+import re
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional, Union, IO
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Faster JSON library is used if installed, standard library json module otherwise
+CODEC_NAME = 'json' if orjson is None else 'orjson'
+
+# RawJSON values are serialized as placeholder strings first, NUL is escaped the same way by both libraries
+RAW_JSON_PLACEHOLDER_PATTERN = re.compile(r'"\\u0000RawJSON-([0-9a-f]{32})-(\d+)"')
+# orjson parses integers not fitting in 64 bits as floats, texts with such long runs of digits are left to the standard
+# library
+LONG_DIGITS_PATTERN = re.compile(r'\d{19}')
+LONG_DIGITS_BYTES_PATTERN = re.compile(rb'\d{19}')
+
+
+class RawJSON:
+    # JSON text which dumps writes as it is, so e.g. stored JSON documents are sent without decoding and encoding them
+    # again. The text is not validated.
+    __slots__ = ('text',)
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None, sort_keys: bool = False) -> str:
+    raw_texts = []
+    # placeholders include a random nonce, so strings in obj can not be taken for them
+    nonce = []
+
+    def default_with_raw_json(value: Any) -> Any:
+        if isinstance(value, RawJSON):
+            if not nonce:
+                nonce.append(uuid.uuid4().hex)
+            raw_texts.append(value.text)
+            return f"\u0000RawJSON-{nonce[0]}-{len(raw_texts) - 1}"
+
+        if default is None:
+            raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+        return default(value)
+
+    serialized = _dumps(obj, default_with_raw_json, sort_keys)
+    if not raw_texts:
+        return serialized
+
+    return RAW_JSON_PLACEHOLDER_PATTERN.sub(
+        lambda match: raw_texts[int(match.group(2))] if match.group(1) == nonce[0] else match.group(0), serialized)
+
+
+def _dumps(obj: Any, default: Callable[[Any], Any], sort_keys: bool) -> str:
+    if orjson is not None:
+        # datetimes go through default, so they are serialized the same way as by the standard library
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+
+        try:
+            serialized = orjson.dumps(obj, default=default, option=option)
+        except TypeError:
+            # e.g. integers not fitting in 64 bits, the standard library decides whether obj can be serialized
+            serialized = None
+
+        # orjson writes NaN and infinities as null, the standard library as NaN, Infinity and -Infinity
+        if serialized is not None and (b'null' not in serialized or not _has_non_finite_float(obj)):
+            return serialized.decode()
+
+    return json.dumps(obj, default=default, sort_keys=sort_keys)
+
+
+def _has_non_finite_float(obj: Any) -> bool:
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(_has_non_finite_float(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(_has_non_finite_float(value) for value in obj)
+
+    return False
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    if orjson is not None:
+        pattern = LONG_DIGITS_BYTES_PATTERN if isinstance(data, (bytes, bytearray)) else LONG_DIGITS_PATTERN
+        if pattern.search(data) is None:
+            try:
+                return orjson.loads(data)
+            except orjson.JSONDecodeError:
+                # e.g. NaN and Infinity, the standard library decides whether data is valid
+                pass
+
+    return json.loads(data)
+
+
+def load(file: IO) -> Any:
+    return loads(file.read())
+
+
+class CodecJSONProvider(DefaultJSONProvider):
+    # Flask JSON provider serializing compact responses with the codec, with the same defaults as DefaultJSONProvider
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs and kwargs != {'separators': (',', ':')}:
+            # e.g. indented responses in debug mode
+            return super().dumps(obj, **kwargs)
+
+        return dumps(obj, default=self.default, sort_keys=self.sort_keys)
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+
+        return loads(s)
+
+    @staticmethod
+    def default(o: Any) -> Any:
+        if isinstance(o, datetime):
+            return format_http_date(o)
+        if isinstance(o, RawJSON):
+            # used by super().dumps, which does not write RawJSON as it is
+            return loads(o.text)
+
+        return DefaultJSONProvider.default(o)
+
+
+HTTP_DATE_WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+HTTP_DATE_MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+
+def format_http_date(value: datetime) -> str:
+    # Same result as werkzeug.http.http_date, which DefaultJSONProvider uses for datetimes (naive ones are taken as
+    # UTC), without going through time tuples and email.utils, which dominates serializing lists of results
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+
+    return f"{HTTP_DATE_WEEKDAYS[value.weekday()]}, {value.day:02d} {HTTP_DATE_MONTHS[value.month - 1]} " \
+           f"{value.year:04d} {value.hour:02d}:{value.minute:02d}:{value.second:02d} GMT"
@@ -0,0 +1,91 @@
+import heapq
+import math
+import threading
+import time
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+# (result_id, environment, algorithm id, best_mean_result) of a training result
+LeaderboardRow = Tuple[int, str, Optional[int], float]
+
+
+class Leaderboard:
+    # Top size training results by best_mean_result (ties broken by higher result_id, like results listings) for every
+    # environment, algorithm, (environment, algorithm) pair and overall, kept in min-heaps of (best_mean_result,
+    # result_id). Heaps are built from all rows on the first refresh, later refreshes read only rows with result_id
+    # greater than the highest one seen. Rows inserted by concurrent transactions can be committed out of id order, so
+    # every refresh first counts rows with result_id up to the highest one seen. If the count differs from the number
+    # of rows read, a row was committed below it (or removed), and heaps are built again from all rows.
+    # Rows are expected to be only inserted, updated results keep their old position until heaps are built again.
+
+    def __init__(self, size: int, refresh_interval: float):
+        assert size > 0, "size must be a positive integer"
+
+        self._size = size
+        self._refresh_interval = refresh_interval
+        self._heaps: Dict[Hashable, List[Tuple[float, int]]] = {}
+        self._result_ids: Dict[Hashable, Set[int]] = {}
+        self._last_result_id: Optional[int] = None
+        # number of rows read with result_id up to _last_result_id
+        self._rows = 0
+        self._version: Optional[Hashable] = None
+        self._refreshed_at = float('-inf')
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def refresh(self, load_rows_after: Callable[[Optional[int]], Iterable[LeaderboardRow]],
+                count_rows_up_to: Callable[[int], int], version: Optional[Hashable] = None):
+        # load_rows_after(result_id) returns rows with greater result_id (all rows for None), count_rows_up_to(result_id)
+        # counts rows with result_id not greater than it. Refreshes at most once per refresh_interval seconds, unless
+        # version (of the table, read before) differs from the last refresh one.
+        with self._lock:
+            is_up_to_date = version is None or version == self._version
+            if is_up_to_date and time.monotonic() - self._refreshed_at < self._refresh_interval:
+                return
+
+            if self._last_result_id is not None and count_rows_up_to(self._last_result_id) != self._rows:
+                self._heaps = {}
+                self._result_ids = {}
+                self._last_result_id = None
+                self._rows = 0
+
+            for row in load_rows_after(self._last_result_id):
+                self._add(row)
+
+            self._refreshed_at = time.monotonic()
+            if version is not None:
+                self._version = version
+
+    def get_top_result_ids(self, environment: Optional[str], algorithm: Optional[int], limit: int) -> List[int]:
+        # best first, environment or algorithm None matches all of them
+        with self._lock:
+            heap = list(self._heaps.get((environment, algorithm), ()))
+
+        return [result_id for _, result_id in heapq.nlargest(limit, heap)]
+
+    def _add(self, row: LeaderboardRow):
+        result_id, environment, algorithm, best_mean_result = row
+
+        if self._last_result_id is None or result_id > self._last_result_id:
+            self._last_result_id = result_id
+        self._rows += 1
+        if best_mean_result is None or math.isnan(best_mean_result):
+            return
+
+        for key in ((environment, algorithm), (environment, None), (None, algorithm), (None, None)):
+            result_ids = self._result_ids.setdefault(key, set())
+            if result_id in result_ids:
+                continue
+
+            heap = self._heaps.setdefault(key, [])
+            entry = (best_mean_result, result_id)
+
+            if len(heap) < self._size:
+                heapq.heappush(heap, entry)
+                result_ids.add(result_id)
+            elif entry > heap[0]:
+                _, removed_result_id = heapq.heapreplace(heap, entry)
+                result_ids.discard(removed_result_id)
+                result_ids.add(result_id)
@@ -0,0 +1,148 @@
+import os
+import time
+import uuid
+from typing import List, NamedTuple, Optional, Tuple
+
+from src.utils import json_codec
+
+
+class Lease(NamedTuple):
+    filename: str
+    token: str
+    worker: Optional[str]
+    expires_at: float
+
+
+class LeaseStore:
+    # Time-limited leases of configuration files, one small file per leased configuration file, so leases are shared
+    # by all processes using the same directory. Creating a lease file is exclusive (open(path, 'x')), which makes
+    # acquiring a lease the atomic step of a claim. Leases do not expire by themselves, expired leases are found with
+    # get_expired and broken (see break_expired) by whoever returns their configuration files to the queue.
+    # Changes of an existing lease first rename its file to a private path (see take), which only one caller can do,
+    # so a lease can not be broken, renewed and finished at the same time.
+
+    def __init__(self, directory: str):
+        self._directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def acquire(self, filename: str, worker: Optional[str], duration: float) -> Optional[Lease]:
+        # None is returned if configuration file is already leased
+        lease = Lease(filename, uuid.uuid4().hex, worker, time.time() + duration)
+
+        try:
+            with open(self._get_lease_path(filename), 'x') as f:
+                f.write(json_codec.dumps(lease._asdict()))
+        except FileExistsError:
+            return None
+
+        return lease
+
+    def get(self, filename: str) -> Optional[Lease]:
+        # None is also returned for lease files which are still being written
+        return self._read(self._get_lease_path(filename))
+
+    def get_valid(self, filename: str, token: str) -> Optional[Lease]:
+        lease = self.get(filename)
+
+        if lease is None or lease.token != token or lease.expires_at < time.time():
+            return None
+
+        return lease
+
+    def renew(self, filename: str, token: str, duration: float) -> Optional[Lease]:
+        # None is returned if the lease expired or belongs to other worker
+        taken = self.take(filename, token)
+        if taken is None:
+            return None
+
+        lease, taken_path = taken
+        lease = lease._replace(expires_at=time.time() + duration)
+        with open(taken_path, 'w') as f:
+            f.write(json_codec.dumps(lease._asdict()))
+
+        return lease if self.restore(filename, taken_path) else None
+
+    def take(self, filename: str, token: str, include_expired: bool = False) -> Optional[Tuple[Lease, str]]:
+        # Atomically moves the lease with the token (if it did not expire, unless include_expired) to a private path
+        # and returns it with the path. Nobody else can break, renew or finish the lease until the caller restores or
+        # discards it.
+        taken_path = self._take_lease_file(filename, 'taken')
+        if taken_path is None:
+            return None
+
+        lease = self._read(taken_path)
+        if lease is None or lease.token != token or (lease.expires_at < time.time() and not include_expired):
+            self.restore(filename, taken_path)
+            return None
+
+        return lease, taken_path
+
+    def restore(self, filename: str, taken_path: str) -> bool:
+        # Puts a taken lease back, unless a new lease was acquired in the meantime, returns True if it was put back
+        try:
+            os.link(taken_path, self._get_lease_path(filename))
+            restored = True
+        except FileExistsError:
+            restored = False
+
+        self.discard(taken_path)
+
+        return restored
+
+    @staticmethod
+    def discard(taken_path: str):
+        os.unlink(taken_path)
+
+    def break_expired(self, filename: str) -> Optional[Lease]:
+        # Atomically removes the lease if it is expired and returns it, so only one caller acts on an expired lease
+        taken_path = self._take_lease_file(filename, 'expired')
+        if taken_path is None:
+            return None
+
+        lease = self._read(taken_path)
+        if lease is None or lease.expires_at >= time.time():
+            # renewed or still being written
+            self.restore(filename, taken_path)
+            return None
+
+        self.discard(taken_path)
+
+        return lease
+
+    def release(self, filename: str, token: str):
+        # removes the lease only if it still has the token
+        taken = self.take(filename, token, include_expired=True)
+        if taken is not None:
+            self.discard(taken[1])
+
+    def get_expired(self) -> List[Lease]:
+        now = time.time()
+        leases = (self.get(filename[:-len('.lease')]) for filename in os.listdir(self._directory)
+                  if filename.endswith('.lease'))
+
+        return [lease for lease in leases if lease is not None and lease.expires_at < now]
+
+    def _take_lease_file(self, filename: str, suffix: str) -> Optional[str]:
+        lease_path = self._get_lease_path(filename)
+        taken_path = os.path.join(self._directory, f".{filename}.{uuid.uuid4().hex}.{suffix}")
+
+        try:
+            os.rename(lease_path, taken_path)
+        except FileNotFoundError:
+            return None
+
+        return taken_path
+
+    @staticmethod
+    def _read(path: str) -> Optional[Lease]:
+        try:
+            with open(path, 'rb') as f:
+                return Lease(**json_codec.load(f))
+        except (FileNotFoundError, ValueError, TypeError):
+            return None
+
+    def _get_lease_path(self, filename: str) -> str:
+        if os.path.basename(filename) != filename or filename.startswith('.'):
+            raise ValueError(f"Not valid configuration file name: {filename}")
+
+        return os.path.join(self._directory, f"{filename}.lease")
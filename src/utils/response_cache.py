@@ -0,0 +1,72 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, NamedTuple, Optional
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    mimetype: str
+
+
+class ResponseCache:
+    # Bounded LRU cache of serialized response bodies, safe to share between threads. Keys must identify everything
+    # the body depends on (e.g. URL, query parameters and version of the data), so entries are never invalidated, only
+    # evicted. Bodies larger than max_bytes are not cached.
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        assert max_entries > 0, "max_entries must be a positive integer"
+        assert max_bytes > 0, "max_bytes must be a positive integer"
+
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        with self._lock:
+            cached_response = self._entries.get(key, None)
+            if cached_response is None:
+                self._misses += 1
+                return None
+
+            self._hits += 1
+            self._entries.move_to_end(key)
+
+            return cached_response
+
+    def put(self, key: Hashable, body: bytes, mimetype: str):
+        if len(body) > self._max_bytes:
+            return
+
+        with self._lock:
+            old_response = self._entries.pop(key, None)
+            if old_response is not None:
+                self._bytes -= len(old_response.body)
+
+            self._entries[key] = CachedResponse(body, mimetype)
+            self._bytes += len(body)
+
+            while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+                _, evicted_response = self._entries.popitem(last=False)
+                self._bytes -= len(evicted_response.body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._hits = 0
+            self._misses = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'size': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self._max_entries,
+                'max_bytes': self._max_bytes
+            }
@@ -0,0 +1,89 @@
+import os
+import re
+import threading
+import zlib
+from datetime import date, datetime
+from typing import List, Optional
+
+from src.constants import Constants
+
+
+class ShardedLayout:
+    # Places configuration files in {status directory}/{submission date}/{filename hash prefix}/ instead of directly
+    # in the status directory, so no directory grows past the files submitted in one day divided by the number of
+    # hash prefixes. Listings limited to a time range only scan the date directories of that range.
+    DATE_FORMAT = '%Y-%m-%d'
+    DATE_DIRECTORY_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+    def __init__(self, prefix_length: int):
+        assert 0 < prefix_length <= 8, "prefix_length must be between 1 and 8"
+
+        self._prefix_length = prefix_length
+        self._existing_directories = set()
+        self._lock = threading.Lock()
+
+    def get_shard_directory(self, status_directory: str, filename: str, submitted_at: datetime) -> str:
+        prefix = f"{zlib.crc32(filename.encode()):08x}"[:self._prefix_length]
+
+        return f"{status_directory}/{submitted_at.strftime(self.DATE_FORMAT)}/{prefix}"
+
+    def get_shard_directories(self, status_directory: str, first_date: Optional[date] = None,
+                              last_date: Optional[date] = None) -> List[str]:
+        # Existing shard directories with files submitted between first_date and last_date (inclusive), sorted
+        first_date_directory = None if first_date is None else first_date.strftime(self.DATE_FORMAT)
+        last_date_directory = None if last_date is None else last_date.strftime(self.DATE_FORMAT)
+        shard_directories = []
+
+        for date_directory in self._get_subdirectories(status_directory):
+            if not self.DATE_DIRECTORY_PATTERN.match(date_directory):
+                continue
+            if first_date_directory is not None and date_directory < first_date_directory:
+                continue
+            if last_date_directory is not None and date_directory > last_date_directory:
+                continue
+
+            date_directory_path = f"{status_directory}/{date_directory}"
+            shard_directories.extend(f"{date_directory_path}/{prefix}"
+                                     for prefix in self._get_subdirectories(date_directory_path)
+                                     if len(prefix) == self._prefix_length)
+
+        return shard_directories
+
+    def ensure_directory(self, directory: str):
+        # Creates missing shard directories, the new directory entries are fsynced like the files saved in them
+        if directory in self._existing_directories:
+            return
+
+        if not os.path.isdir(directory):
+            parent_directory = os.path.dirname(directory)
+            self.ensure_directory(parent_directory)
+
+            try:
+                os.mkdir(directory)
+            except FileExistsError:
+                pass
+            else:
+                self._sync_directory(parent_directory)
+
+        with self._lock:
+            self._existing_directories.add(directory)
+
+    @staticmethod
+    def _get_subdirectories(directory: str) -> List[str]:
+        try:
+            with os.scandir(directory) as directory_entries:
+                return sorted(directory_entry.name for directory_entry in directory_entries
+                              if directory_entry.is_dir())
+        except FileNotFoundError:
+            return []
+
+    @staticmethod
+    def _sync_directory(directory: str):
+        directory_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(directory_fd)
+        finally:
+            os.close(directory_fd)
+
+
+sharded_layout = ShardedLayout(Constants.RL_CONFIGURATIONS_SHARD_PREFIX_LENGTH)
@@ -0,0 +1,82 @@
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+# ULID-style identifiers: 48 bit millisecond timestamp followed by 80 random bits, in Crockford's base32 (10 + 16
+# characters). Identifiers sort lexicographically in the order they were generated, identifiers generated by one
+# process within the same millisecond increment the random part, so they stay unique and ordered.
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+TIMESTAMP_LENGTH = 10
+RANDOMNESS_LENGTH = 16
+ID_LENGTH = TIMESTAMP_LENGTH + RANDOMNESS_LENGTH
+ID_PATTERN = re.compile(f'^[0-7][{ALPHABET}]{{{ID_LENGTH - 1}}}$')
+
+_RANDOMNESS_BITS = 5 * RANDOMNESS_LENGTH
+_last_timestamp_ms = -1
+_last_randomness = 0
+_lock = threading.Lock()
+
+
+def generate_sortable_id() -> str:
+    global _last_timestamp_ms, _last_randomness
+
+    with _lock:
+        timestamp_ms = time.time_ns() // 1_000_000
+
+        if timestamp_ms <= _last_timestamp_ms:
+            # same millisecond, or the clock went back
+            timestamp_ms = _last_timestamp_ms
+            randomness = _last_randomness + 1
+
+            if randomness >> _RANDOMNESS_BITS:
+                timestamp_ms += 1
+                randomness = _get_randomness()
+        else:
+            randomness = _get_randomness()
+
+        _last_timestamp_ms = timestamp_ms
+        _last_randomness = randomness
+
+    return _encode(timestamp_ms, TIMESTAMP_LENGTH) + _encode(randomness, RANDOMNESS_LENGTH)
+
+
+def is_sortable_id(value: str) -> bool:
+    return ID_PATTERN.match(value) is not None
+
+
+def get_sortable_id_time(sortable_id: str) -> Optional[datetime]:
+    # local time of generating the identifier, None for other strings
+    if not is_sortable_id(sortable_id):
+        return None
+
+    return datetime.fromtimestamp(_decode(sortable_id[:TIMESTAMP_LENGTH]) / 1000)
+
+
+def get_sortable_id_lower_bound(moment: datetime) -> str:
+    # every identifier generated at moment or later sorts after the returned string, naive datetimes are local time
+    return _encode(max(0, int(moment.timestamp() * 1000)), TIMESTAMP_LENGTH)
+
+
+def _get_randomness() -> int:
+    # the top bit is left clear, so increments within a millisecond practically never overflow
+    return int.from_bytes(os.urandom(10), 'big') >> 1
+
+
+def _encode(value: int, length: int) -> str:
+    characters = []
+    for _ in range(length):
+        value, remainder = divmod(value, 32)
+        characters.append(ALPHABET[remainder])
+
+    return ''.join(reversed(characters))
+
+
+def _decode(value: str) -> int:
+    result = 0
+    for character in value:
+        result = result * 32 + ALPHABET.index(character)
+
+    return result
@@ -0,0 +1,119 @@
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Dict, Callable, Optional
+
+from src.constants import Constants
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigurationFileStatistics:
+    # Counters of configuration files keyed by (status, algorithm, environment), updated by gateways on every change.
+    # Changes made outside of the gateway (e.g. files moved by Airflow) are fixed by reconciliation, which recounts
+    # all configuration files at most once per reconciliation_interval seconds, in a background thread.
+    # Counters are first counted in the background when the gateway is created (see start_reconciliation), requests
+    # made before the first count finishes wait for it. Changes made while counting can be missed until the next
+    # reconciliation.
+
+    def __init__(self, reconciliation_interval: float):
+        self._reconciliation_interval = reconciliation_interval
+        self._counters: Counter = Counter()
+        self._reconciled_at: Optional[float] = None
+        self._invalidated = False
+        self._reconciling = False
+        self._lock = threading.Lock()
+        self._reconciliation_finished = threading.Condition(self._lock)
+
+    def add(self, status: str, algorithm: str, environment: str, count: int = 1):
+        with self._lock:
+            self._counters[(status, algorithm, environment)] += count
+
+    def move(self, status_from: str, status_to: str, algorithm: str, environment: str):
+        with self._lock:
+            self._counters[(status_from, algorithm, environment)] -= 1
+            self._counters[(status_to, algorithm, environment)] += 1
+
+    def invalidate(self):
+        # counters are kept until the recount started by the next request finishes
+        with self._lock:
+            self._invalidated = True
+
+    def start_reconciliation(self, count_configuration_files: Callable[[], Counter]):
+        with self._lock:
+            start_reconciliation = self._start_reconciliation()
+
+        if start_reconciliation:
+            threading.Thread(target=self._reconcile_in_background, args=(count_configuration_files,),
+                             daemon=True).start()
+
+    def get_statistics(self, count_configuration_files: Callable[[], Counter]) -> Dict:
+        with self._lock:
+            # counters were never counted, so they would be zeros
+            while self._reconciled_at is None and self._reconciling:
+                self._reconciliation_finished.wait()
+
+            is_reconciled = self._reconciled_at is not None
+            start_reconciliation = self._start_reconciliation()
+
+        if start_reconciliation and not is_reconciled:
+            # the first count failed, or was not started
+            self.reconcile(count_configuration_files)
+        elif start_reconciliation:
+            threading.Thread(target=self._reconcile_in_background, args=(count_configuration_files,),
+                             daemon=True).start()
+
+        return self.to_dict()
+
+    def reconcile(self, count_configuration_files: Callable[[], Counter]):
+        # must be started by _start_reconciliation
+        try:
+            counters = count_configuration_files()
+
+            with self._lock:
+                self._counters = Counter(counters)
+                self._reconciled_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._reconciling = False
+                self._reconciliation_finished.notify_all()
+
+    def _reconcile_in_background(self, count_configuration_files: Callable[[], Counter]):
+        try:
+            self.reconcile(count_configuration_files)
+        except Exception:
+            logger.exception("Counting configuration files failed")
+
+    def _start_reconciliation(self) -> bool:
+        # must be called with _lock held, returns True if the caller has to run reconcile
+        reconciliation_needed = self._reconciled_at is None or self._invalidated or \
+            time.monotonic() - self._reconciled_at > self._reconciliation_interval
+        if not reconciliation_needed or self._reconciling:
+            return False
+
+        self._reconciling = True
+        self._invalidated = False
+
+        return True
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            counters = list(self._counters.items())
+
+        statistics = {
+            status: {'count': 0, 'algorithms': {}, 'environments': {}}
+            for status in sorted(Constants.CONFIGURATION_FILE_STATUSES)
+        }
+
+        for (status, algorithm, environment), count in counters:
+            if count <= 0:
+                continue
+
+            status_statistics = statistics.setdefault(status, {'count': 0, 'algorithms': {}, 'environments': {}})
+            status_statistics['count'] += count
+            status_statistics['algorithms'][algorithm] = status_statistics['algorithms'].get(algorithm, 0) + count
+            status_statistics['environments'][environment] = \
+                status_statistics['environments'].get(environment, 0) + count
+
+        return statistics
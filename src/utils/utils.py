@@ -1,8 +1,12 @@
+import base64
+import math
 import os
 import random
 import string
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Sequence
+
+TIME_STRING_FORMAT = "%d-%m-%Y_%H-%M-%S"
 
 
 def get_args_as_list_of_strings(data: Dict) -> List[str]:
@@ -30,7 +34,31 @@ def generate_random_id(size=6, chars=string.ascii_uppercase + string.digits):
 
 
 def get_current_time_as_string() -> str:
-    return datetime.now().strftime("%d-%m-%Y_%H-%M-%S")
+    return datetime.now().strftime(TIME_STRING_FORMAT)
+
+
+def parse_time_string(time_string: str) -> datetime:
+    return datetime.strptime(time_string, TIME_STRING_FORMAT)
+
+
+def encode_cursor(value: str) -> str:
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> str:
+    # raises ValueError for cursors that were not created by encode_cursor
+    return base64.urlsafe_b64decode(cursor.encode()).decode()
+
+
+def get_percentile(sorted_values: Sequence[float], percentile: float) -> float:
+    # linear interpolation between the closest values, like percentile_cont of SQL databases
+    assert sorted_values, "sorted_values must not be empty"
+
+    position = percentile / 100 * (len(sorted_values) - 1)
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
 
 
 def get_all_files_with_extension_in_directory(directory: str, extension: str = '.json'):
@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+# src reads its configuration from the environment when it is imported, an in-memory database is shared by threads
+os.environ.setdefault("SQLALCHEMY_DATABASE_URI", "sqlite://")
+os.environ.setdefault("FLASK_SECRET_KEY", "secret key used only by the tests")
+
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from src import app, db, Constants  # noqa: E402
+from src.configuration_file_gateway import ConfigurationFileGatewayFactory  # noqa: E402
+from src.models import Algorithm, Users  # noqa: E402
+from src.repository import AlgorithmRepository, TrainingResultsRepository  # noqa: E402
+from src.routes import results_response_cache  # noqa: E402
+from src.utils.authorization import Auth  # noqa: E402
+from src.utils.leaderboard import Leaderboard  # noqa: E402
+
+
+@pytest.fixture
+def rl_configurations(tmp_path, monkeypatch):
+    # every test gets its own configuration directories and new gateways using them
+    for subdirectory in (Constants.RL_CONFIGURATIONS_PROCESSING_SUBDIRECTORY,
+                         Constants.RL_CONFIGURATIONS_DONE_SUBDIRECTORY,
+                         Constants.RL_CONFIGURATIONS_FAILED_SUBDIRECTORY):
+        (tmp_path / subdirectory).mkdir()
+
+    monkeypatch.setattr(Constants, 'RL_CONFIGURATIONS', str(tmp_path))
+    monkeypatch.setattr(Constants, 'RL_CONFIGURATIONS_JOURNAL', str(tmp_path / 'journal'))
+    monkeypatch.setattr(ConfigurationFileGatewayFactory, '_gateways', {})
+
+    return tmp_path
+
+
+@pytest.fixture
+def database(monkeypatch):
+    # ids start again in every test, so nothing built from rows of other tests can be kept
+    monkeypatch.setattr(AlgorithmRepository, '_algorithm_ids_by_name', {})
+    monkeypatch.setattr(TrainingResultsRepository, 'leaderboard', Leaderboard(
+        Constants.LEADERBOARD_SIZE, Constants.LEADERBOARD_REFRESH_INTERVAL_S))
+    results_response_cache.clear()
+
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([Algorithm(name=name) for name in sorted(Constants.KNOWN_ALGORITHMS)])
+        db.session.add(Users(public_id='test-user', name='test', password=generate_password_hash('test'), admin=True))
+        db.session.commit()
+
+        yield db
+
+        db.session.remove()
+        db.drop_all()
+
+    AlgorithmRepository.get_algorithm_by_name.cache_clear()
+    AlgorithmRepository.get_algorithm_by_id.cache_clear()
+
+
+@pytest.fixture
+def client(rl_configurations, database):
+    return app.test_client()
+
+
+@pytest.fixture
+def headers(database):
+    return {'x-access-tokens': Auth.encode_auth_token('test-user')}
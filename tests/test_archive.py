@@ -0,0 +1,67 @@
+import os
+import time
+
+from src import Constants
+from src.configuration_file_gateway import JsonConfigurationFileGateway, ConfigurationFileQuery
+from src.utils.archive import ConfigurationFileArchive
+from tests.test_json_configuration_file_gateway import make_configuration_file
+
+
+def count_listdir_calls(monkeypatch):
+    calls = []
+    listdir = os.listdir
+    monkeypatch.setattr(os, 'listdir', lambda path: calls.append(path) or listdir(path))
+
+    return calls
+
+
+def test_lookups_do_not_list_archive_directory(tmp_path, monkeypatch):
+    archive = ConfigurationFileArchive(str(tmp_path), block_size=2)
+    archive.add([(f'{i}.json', {"i": i}) for i in range(5)])
+    archive.add([('5.json', {"i": 5})])
+    assert archive.get_sorted_filenames() == [f'{i}.json' for i in range(6)]
+
+    calls = count_listdir_calls(monkeypatch)
+
+    assert [archive.get_data(f'{i}.json') for i in range(6)] == [{"i": i} for i in range(6)]
+    assert archive.get_data('missing.json') is None
+    assert archive.get_data('missing.json') is None
+    assert len(calls) <= 1
+
+
+def test_segments_added_by_other_archive_are_listed(tmp_path, monkeypatch):
+    archive = ConfigurationFileArchive(str(tmp_path), block_size=2)
+    assert archive.get_sorted_filenames() == []
+
+    ConfigurationFileArchive(str(tmp_path), block_size=2).add([('a.json', {"a": 1})])
+
+    assert archive.get_sorted_filenames() == ['a.json']
+    assert archive.get_data('a.json') == {"a": 1}
+
+
+def test_missing_file_is_looked_up_in_new_segments_after_refresh_interval(tmp_path, monkeypatch):
+    monkeypatch.setattr(ConfigurationFileArchive, 'MISSING_FILE_REFRESH_INTERVAL_S', 0)
+    archive = ConfigurationFileArchive(str(tmp_path), block_size=2)
+    assert archive.get_data('a.json') is None
+
+    ConfigurationFileArchive(str(tmp_path), block_size=2).add([('a.json', {"a": 1})])
+
+    assert archive.get_data('a.json') == {"a": 1}
+
+
+def test_files_are_archived_by_the_time_they_got_their_status(rl_configurations):
+    gateway = JsonConfigurationFileGateway()
+    saved, = gateway.save_many([make_configuration_file()])
+    filename = saved['filename']
+    path = rl_configurations / filename
+    submitted_long_ago = time.time() - 10 * 24 * 3600
+    os.utime(path, (submitted_long_ago, submitted_long_ago))
+
+    assert gateway.change_status(filename, Constants.UNPROCESSED_STATUS, Constants.PROCESSING_STATUS)
+    assert gateway.change_status(filename, Constants.PROCESSING_STATUS, Constants.DONE_STATUS)
+
+    assert gateway.archive_configuration_files(24 * 3600) == 0
+    assert gateway.archive_configuration_files(0) == 1
+
+    page = gateway.get_configuration_files_data_page(Constants.DONE_STATUS, ConfigurationFileQuery(limit=10))
+    assert [data['algorithm_config']['experiment_name'] for data in page.data] == ['test']
@@ -0,0 +1,27 @@
+import os
+
+VALID_CONFIGURATION_FILE = {
+    "algorithm": "acerac",
+    "algorithm_config": {"env_name": "HalfCheetah-v2", "actor_lr": 0.001, "gamma": 0.99, "actor_layers": [256, 256]}
+}
+
+
+def test_schedule_batch_rejects_only_invalid_items(client, headers, rl_configurations):
+    response = client.post('/schedule/batch', headers=headers, json=[
+        VALID_CONFIGURATION_FILE,
+        {"algorithm": "acer", "algorithm_config": 5},
+        {"algorithm": "acerac"},
+        VALID_CONFIGURATION_FILE
+    ])
+
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body["Number of scheduled configuration files"] == 2
+    assert body["Number of rejected configuration files"] == 2
+
+    first, not_a_dict, missing_config, last = body["Results"]
+    assert first["configuration"]["algorithm_config"]["env_name"] == "HalfCheetah-v2"
+    assert not_a_dict == {"error": "algorithm_config must be an object"}
+    assert "error" in missing_config
+    assert os.path.isfile(rl_configurations / first["filename"])
+    assert os.path.isfile(rl_configurations / last["filename"])
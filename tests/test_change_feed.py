@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+from src import Constants
+from src.configuration_file_gateway import SqlConfigurationFileGateway
+from src.utils.change_feed import ChangeFeed
+from tests.test_batch_routes import VALID_CONFIGURATION_FILE
+from tests.test_json_configuration_file_gateway import make_configuration_file
+
+
+def test_changes_after_token_are_returned_once():
+    change_feed = ChangeFeed(10)
+    token = change_feed.get_token()
+    change_feed.publish([('a.json', 'unprocessed'), ('b.json', 'unprocessed')])
+
+    changes, token = change_feed.wait_for_changes(token, 0, 1)
+    assert [change.filename for change in changes] == ['a.json']
+    changes, token = change_feed.wait_for_changes(token, 0, 10)
+    assert [change.filename for change in changes] == ['b.json']
+    assert change_feed.wait_for_changes(token, 0, 10) == ([], token)
+
+
+def test_changes_of_other_statuses_are_skipped():
+    change_feed = ChangeFeed(10)
+    token = change_feed.get_token()
+    change_feed.publish([('a.json', 'processing'), ('a.json', 'done'), ('b.json', 'processing')])
+
+    changes, token = change_feed.wait_for_changes(token, 0, 10, {'done'})
+
+    assert [(change.filename, change.status) for change in changes] == [('a.json', 'done')]
+    assert change_feed.wait_for_changes(token, 0, 10, {'done'}) == ([], change_feed.get_token())
+
+
+def test_tokens_of_dropped_changes_and_other_feeds_are_rejected():
+    change_feed = ChangeFeed(2)
+    token = change_feed.get_token()
+    change_feed.publish([(f'{i}.json', 'unprocessed') for i in range(3)])
+
+    assert change_feed.wait_for_changes(token, 0, 10) is None
+    assert change_feed.wait_for_changes(ChangeFeed(2).get_token(), 0, 10) is None
+    with pytest.raises(ValueError):
+        change_feed.wait_for_changes('not a token', 0, 10)
+
+
+def test_waiting_reader_is_woken_by_publish():
+    change_feed = ChangeFeed(10)
+    token = change_feed.get_token()
+    publisher = threading.Timer(0.05, change_feed.publish, args=([('a.json', 'unprocessed')],))
+    publisher.start()
+
+    changes, _ = change_feed.wait_for_changes(token, 5, 10)
+    publisher.join()
+
+    assert [change.filename for change in changes] == ['a.json']
+
+
+def test_scheduled_changes_returns_files_scheduled_after_token(client, headers):
+    token = client.get('/scheduled/changes', headers=headers).get_json()["Next token"]
+    scheduled = client.post('/schedule/batch', headers=headers, json=[VALID_CONFIGURATION_FILE]).get_json()
+
+    response = client.get('/scheduled/changes', headers=headers, query_string={'since': token, 'timeout': 0})
+
+    assert response.status_code == 200
+    assert [(change['filename'], change['status']) for change in response.get_json()["Changes"]] == \
+        [(scheduled["Results"][0]["filename"], 'unprocessed')]
+
+
+@pytest.mark.parametrize('args', [{'since': 'not a token'}, {'since': 'x-0', 'timeout': 'nan'},
+                                  {'since': 'x-0', 'status': 'archived'}])
+def test_scheduled_changes_rejects_not_valid_arguments(client, headers, args):
+    assert client.get('/scheduled/changes', headers=headers, query_string=args).status_code == 400
+
+
+def test_sql_gateway_finds_changes_of_other_processes_without_listing(rl_configurations, database, monkeypatch):
+    monkeypatch.setattr(Constants, 'CHANGE_FEED_WATCH_INTERVAL_S', 0)
+    gateway, other_process_gateway = SqlConfigurationFileGateway(), SqlConfigurationFileGateway()
+    own_filename = gateway.save(make_configuration_file(experiment_name='own'))['filename']
+    token = gateway.get_changes_token()
+
+    listed = []
+    monkeypatch.setattr(gateway, '_get_configuration_file_names_and_data_loader', lambda status: listed.append(status))
+    other_filename = other_process_gateway.save(make_configuration_file(experiment_name='other'))['filename']
+    assert other_process_gateway.change_status(own_filename, Constants.UNPROCESSED_STATUS, Constants.DONE_STATUS)
+    changes, token = gateway.get_changes(token, 0)
+    own_change = gateway.save(make_configuration_file(experiment_name='own again'))
+    next_changes, _ = gateway.get_changes(token, 0)
+
+    assert [(change['filename'], change['status']) for change in changes] == \
+        [(other_filename, Constants.UNPROCESSED_STATUS), (own_filename, Constants.DONE_STATUS)]
+    assert changes[0]['configuration']['algorithm_config']['experiment_name'] == 'other'
+    assert [change['filename'] for change in next_changes] == [own_change['filename']]
+    assert listed == []
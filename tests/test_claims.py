@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+
+import pytest
+
+from src import Constants
+from src.configuration_file_gateway import JsonConfigurationFileGateway, SqlConfigurationFileGateway, \
+    JournalConfigurationFileGateway
+from tests.test_json_configuration_file_gateway import make_configuration_file
+
+
+def save(gateway, experiment_names, priorities=None):
+    configuration_files = [make_configuration_file(experiment_name=name) for name in experiment_names]
+    for configuration_file, priority in zip(configuration_files, priorities or []):
+        configuration_file.priority = priority
+
+    return [item['filename'] for item in gateway.save_many(configuration_files)]
+
+
+def get_experiment_names(claimed):
+    return [item['configuration']['algorithm_config']['experiment_name'] for item in claimed]
+
+
+@pytest.fixture(params=['json', 'sql', 'journal'])
+def gateway(request, rl_configurations, database):
+    gateway_class = {
+        'json': JsonConfigurationFileGateway,
+        'sql': SqlConfigurationFileGateway,
+        'journal': JournalConfigurationFileGateway
+    }[request.param]
+
+    return gateway_class()
+
+
+def test_claims_are_leased_in_priority_order_and_finished_once(gateway):
+    save(gateway, ['low', 'high', 'normal'], [-1, 5, 0])
+
+    first = gateway.claim(2, 60, 'worker-1')
+    second = gateway.claim(2, 60, 'worker-2')
+
+    assert get_experiment_names(first) == ['high', 'normal']
+    assert get_experiment_names(second) == ['low']
+    assert gateway.claim(1, 60) == []
+    assert first[0]['lease']['worker'] == 'worker-1'
+
+    filename, token = first[0]['filename'], first[0]['lease']['token']
+    assert gateway.renew_lease(filename, 'other token', 60) is None
+    assert gateway.renew_lease(filename, token, 120)['token'] == token
+    assert not gateway.complete(filename, second[0]['lease']['token'])
+    assert gateway.complete(filename, token)
+    assert not gateway.complete(filename, token)
+    assert gateway.fail(second[0]['filename'], second[0]['lease']['token'])
+
+    statistics = gateway.get_statistics()
+    assert [statistics[status]['count'] for status in (Constants.UNPROCESSED_STATUS, Constants.PROCESSING_STATUS,
+                                                       Constants.DONE_STATUS, Constants.FAILED_STATUS)] == [0, 1, 1, 1]
+
+
+def test_expired_leases_are_requeued(gateway):
+    save(gateway, ['a', 'b'])
+    expiring = gateway.claim(1, 0.01)
+    kept = gateway.claim(1, 60)
+    time.sleep(0.05)
+
+    assert gateway.renew_lease(expiring[0]['filename'], expiring[0]['lease']['token'], 60) is None
+    assert gateway.requeue_expired_leases() == 1
+    assert gateway.requeue_expired_leases() == 0
+    assert not gateway.complete(expiring[0]['filename'], expiring[0]['lease']['token'])
+
+    reclaimed = gateway.claim(2, 60)
+    assert [item['filename'] for item in reclaimed] == [expiring[0]['filename']]
+    assert gateway.complete(kept[0]['filename'], kept[0]['lease']['token'])
+
+
+@pytest.mark.parametrize('gateway_class', [JsonConfigurationFileGateway, JournalConfigurationFileGateway])
+def test_lease_expiring_while_the_claim_is_completed_is_not_claimed_again(gateway_class, rl_configurations, database,
+                                                                         monkeypatch):
+    gateway = gateway_class()
+    save(gateway, ['a'])
+    claimed = gateway.claim(1, 0.2)
+    change_status = gateway.change_status
+    during_completion = {}
+
+    def expire_and_change_status(filename, status_from, status_to):
+        if status_to == Constants.DONE_STATUS:
+            time.sleep(0.3)
+            during_completion['requeued'] = gateway.requeue_expired_leases()
+            during_completion['claimed'] = gateway.claim(1, 60, 'worker-2')
+        return change_status(filename, status_from, status_to)
+
+    monkeypatch.setattr(gateway, 'change_status', expire_and_change_status)
+
+    assert gateway.complete(claimed[0]['filename'], claimed[0]['lease']['token'])
+    assert during_completion == {'requeued': 0, 'claimed': []}
+    assert gateway.get_statistics()[Constants.DONE_STATUS]['count'] == 1
+    assert gateway.requeue_expired_leases() == 0
+    assert gateway.claim(1, 60) == []
+
+
+def test_sql_leases_are_stored_in_rows(rl_configurations, database):
+    gateway = SqlConfigurationFileGateway()
+    save(gateway, ['a'])
+
+    claimed = gateway.claim(1, 60)
+
+    assert len(claimed) == 1
+    assert not os.path.exists(rl_configurations / Constants.RL_CONFIGURATIONS_LEASES_SUBDIRECTORY)
+
+
+def test_journal_leases_are_stored_next_to_the_journal(rl_configurations, database):
+    gateway = JournalConfigurationFileGateway()
+    save(gateway, ['a'])
+
+    claimed = gateway.claim(1, 60)
+
+    assert len(claimed) == 1
+    assert os.listdir(rl_configurations / 'journal' / Constants.RL_CONFIGURATIONS_LEASES_SUBDIRECTORY) == \
+        [f"{claimed[0]['filename']}.lease"]
+    assert not os.path.exists(rl_configurations / Constants.RL_CONFIGURATIONS_LEASES_SUBDIRECTORY)
+
+
+def test_concurrent_claims_never_return_the_same_file(rl_configurations):
+    gateway = JsonConfigurationFileGateway()
+    filenames = save(gateway, [f'e{i}' for i in range(40)])
+    barrier = threading.Barrier(8)
+    claimed = []
+
+    def claim():
+        barrier.wait()
+        while True:
+            items = gateway.claim(3, 60)
+            if not items:
+                return
+            claimed.extend(item['filename'] for item in items)
+
+    threads = [threading.Thread(target=claim) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == sorted(filenames)
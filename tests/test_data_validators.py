@@ -0,0 +1,78 @@
+import random
+
+import pytest
+
+from src.utils.data_validators import ParserFactory, CompiledParserValidator, ValidationCache
+from src.utils.utils import get_args_as_list_of_strings
+
+CONFIGS = [
+    # valid
+    {},
+    {"env_name": "HalfCheetah-v2", "n_step": 2, "gamma": 0.9},
+    {"algo": "acerac", "gamma": "-0.5", "b": ".5"},
+    {"env": "Ant-v2", "algo": "SAC", "fcnet_hiddens": [64, 64]},
+    {"algo": "fastacer", "actor_layers": (10, 20), "standardize_obs": True, "use_v": False, "dump": [1, 2]},
+    {"algo": "fastacerax", "memory_size": 100, "log_dir": "", "record_time_steps": None},
+    # invalid type
+    {"n_step": 1.5},
+    {"gamma": "fast"},
+    {"fcnet_hiddens": [64, "wide"], "algo": "PPO"},
+    {"actor_layers": [], "algo": "fastacer"},
+    {"standardize_obs": "yes"},
+    {"n_step": True},
+    # out of choices
+    {"algo": "dqn"},
+    {"noise_type": "gaussian", "algo": "acerac"},
+    {"fcnet_activation": "sigmoid", "algo": "PPO"},
+    # missing required
+    {"env": "Ant-v2"},
+    {"algo": None},
+    # unknown or abbreviated
+    {"learning_rate": 0.1},
+    {"gam": 0.9},
+    {"env_name": "--gamma"},
+    {"n_step": "x", "gamma": "y"},
+]
+
+
+def validate_with_argparse(algorithm, config):
+    parser = ParserFactory.get_parser(algorithm)
+    parser.parse_args(get_args_as_list_of_strings(config))
+
+    return parser.error_message
+
+
+def make_random_config(validator, rng):
+    values = [None, '', True, False, 0, 1, -3, 2.5, "-1.5", "abc", "--x", [], [1, 2], [1, "b"], "acer", "PPO",
+              "autocor", "relu"]
+    keys = list(validator.arguments) + ["unknown", "gam"]
+
+    return {rng.choice(keys): rng.choice(values) for _ in range(rng.randint(0, 4))}
+
+
+@pytest.mark.parametrize('algorithm', ['acerac', 'PPO', 'fastacer'])
+@pytest.mark.parametrize('config', CONFIGS)
+def test_compiled_validator_matches_argparse(algorithm, config):
+    validator = CompiledParserValidator(ParserFactory.PARSER_ALGORITHM_MAPPING[algorithm])
+
+    assert validator.validate(config) == validate_with_argparse(algorithm, config)
+
+
+@pytest.mark.parametrize('algorithm', ['acerac', 'PPO', 'fastacer'])
+def test_compiled_validator_matches_argparse_for_random_configs(algorithm):
+    rng = random.Random(algorithm)
+    validator = CompiledParserValidator(ParserFactory.PARSER_ALGORITHM_MAPPING[algorithm])
+
+    for _ in range(500):
+        config = make_random_config(validator, rng)
+        assert validator.validate(config) == validate_with_argparse(algorithm, config), config
+
+
+def test_cached_error_message_names_the_first_offending_argument():
+    validator = CompiledParserValidator(ParserFactory.PARSER_ALGORITHM_MAPPING['acerac'], ValidationCache())
+    n_step_first = {"n_step": "x", "gamma": "y"}
+    gamma_first = {"gamma": "y", "n_step": "x"}
+
+    assert "--n_step" in validator.validate(n_step_first)
+    assert "--gamma" in validator.validate(gamma_first)
+    assert validator.validate(gamma_first) == validate_with_argparse('acerac', gamma_first)
@@ -0,0 +1,50 @@
+import os
+
+from src.utils import json_codec
+from src.utils.directory_index import DirectoryIndex
+
+
+def write_json(path, data):
+    with open(path, 'w') as f:
+        f.write(json_codec.dumps(data))
+
+
+def test_file_modified_in_place_is_read_again(tmp_path):
+    path = tmp_path / 'a.json'
+    write_json(path, {"value": 1})
+    directory_index = DirectoryIndex(str(tmp_path))
+    assert directory_index.get_filenames() == ['a.json']
+    assert directory_index.get_entry('a.json').data == {"value": 1}
+
+    inode = os.stat(path).st_ino
+    write_json(path, {"value": 22})
+    assert os.stat(path).st_ino == inode
+
+    assert directory_index.get_entry('a.json').data == {"value": 22}
+    assert [entry.data for entry in directory_index.get_all_entries()] == [{"value": 22}]
+
+
+def test_file_with_same_size_and_new_mtime_is_read_again(tmp_path):
+    path = tmp_path / 'a.json'
+    write_json(path, {"value": 1})
+    directory_index = DirectoryIndex(str(tmp_path))
+    assert directory_index.get_filenames() == ['a.json']
+    assert directory_index.get_entry('a.json').data == {"value": 1}
+
+    write_json(path, {"value": 2})
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+    assert directory_index.get_entry('a.json').data == {"value": 2}
+
+
+def test_not_changed_file_is_not_parsed_again(tmp_path, monkeypatch):
+    write_json(tmp_path / 'a.json', {"value": 1})
+    directory_index = DirectoryIndex(str(tmp_path))
+    assert directory_index.get_filenames() == ['a.json']
+    first = directory_index.get_entry('a.json')
+
+    monkeypatch.setattr(json_codec, 'load', lambda f: (_ for _ in ()).throw(AssertionError("parsed again")))
+
+    assert directory_index.get_entry('a.json') is first
+    assert directory_index.get_all_entries() == [first]
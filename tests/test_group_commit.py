@@ -0,0 +1,89 @@
+import os
+import threading
+
+import pytest
+
+from src.utils.group_commit import GroupCommitFileWriter
+
+
+def count_syncs(monkeypatch, writer: GroupCommitFileWriter):
+    calls = {'fsync': 0, 'syncfs': 0}
+    fsync = os.fsync
+
+    def counted_fsync(fd):
+        calls['fsync'] += 1
+        fsync(fd)
+
+    def counted_syncfs(fd):
+        calls['syncfs'] += 1
+        return 0
+
+    monkeypatch.setattr(os, 'fsync', counted_fsync)
+    if writer._syncfs is not None:
+        monkeypatch.setattr(writer, '_syncfs', counted_syncfs)
+
+    return calls
+
+
+def test_write_many_creates_files_without_leaving_temporary_files(tmp_path):
+    writer = GroupCommitFileWriter(0)
+    (tmp_path / 'existing.json').write_text('old')
+
+    errors = writer.write_many([(str(tmp_path / 'a.json'), 'a'), (str(tmp_path / 'existing.json'), 'new'),
+                                (str(tmp_path / 'b.json'), 'b')])
+
+    assert errors[0] is None and errors[2] is None
+    assert isinstance(errors[1], FileExistsError)
+    assert (tmp_path / 'a.json').read_text() == 'a'
+    assert (tmp_path / 'existing.json').read_text() == 'old'
+    assert sorted(os.listdir(tmp_path)) == ['a.json', 'b.json', 'existing.json']
+
+
+def test_write_raises_file_exists_error(tmp_path):
+    writer = GroupCommitFileWriter(0)
+    writer.write(str(tmp_path / 'a.json'), 'a')
+
+    with pytest.raises(FileExistsError):
+        writer.write(str(tmp_path / 'a.json'), 'b')
+
+    assert (tmp_path / 'a.json').read_text() == 'a'
+
+
+def test_group_is_made_durable_by_two_syncfs_calls(tmp_path, monkeypatch):
+    writer = GroupCommitFileWriter(0)
+    if writer._syncfs is None:
+        pytest.skip("syncfs is not available")
+    calls = count_syncs(monkeypatch, writer)
+
+    writer.write_many([(str(tmp_path / f'{i}.json'), str(i)) for i in range(50)])
+
+    assert calls == {'fsync': 0, 'syncfs': 2}
+
+
+def test_without_syncfs_every_file_and_directory_is_fsynced(tmp_path, monkeypatch):
+    writer = GroupCommitFileWriter(0, use_syncfs=False)
+    calls = count_syncs(monkeypatch, writer)
+
+    writer.write_many([(str(tmp_path / f'{i}.json'), str(i)) for i in range(50)])
+
+    assert calls == {'fsync': 51, 'syncfs': 0}
+
+
+def test_concurrent_writes_are_committed_in_groups(tmp_path, monkeypatch):
+    writer = GroupCommitFileWriter(0.05, use_syncfs=False)
+    calls = count_syncs(monkeypatch, writer)
+    barrier = threading.Barrier(8)
+
+    def write(i: int):
+        barrier.wait()
+        writer.write(str(tmp_path / f'{i}.json'), str(i))
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(os.listdir(tmp_path)) == sorted(f'{i}.json' for i in range(8))
+    # one directory fsync per group, fewer groups than writes
+    assert calls['fsync'] < 16
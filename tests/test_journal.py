@@ -0,0 +1,77 @@
+import os
+import threading
+
+from src.utils.journal import ConfigurationJournal, JournalEntry
+
+
+def make_entry(filename: str, status: str = 'unprocessed') -> JournalEntry:
+    return JournalEntry(filename, status, {"name": filename}, '2026-01-01T10:00:00')
+
+
+def test_state_is_rebuilt_from_journal(tmp_path):
+    journal = ConfigurationJournal(str(tmp_path), 1000)
+    journal.add([make_entry('a.json'), make_entry('b.json')])
+    assert journal.change_status('a.json', 'unprocessed', 'processing')
+    assert not journal.change_status('a.json', 'unprocessed', 'processing')
+
+    reloaded = ConfigurationJournal(str(tmp_path), 1000)
+
+    assert reloaded.get_sorted_filenames('unprocessed') == ['b.json']
+    assert reloaded.get_sorted_filenames('processing') == ['a.json']
+    assert reloaded.get_entry('a.json').data == {"name": "a.json"}
+
+
+def test_torn_last_record_is_skipped(tmp_path):
+    journal = ConfigurationJournal(str(tmp_path), 1000)
+    journal.add([make_entry('a.json')])
+    journal_path = journal._get_journal_path(journal._generation)
+    with open(journal_path, 'a') as f:
+        f.write('{"op": "add", "filename": "b.js')
+
+    reloaded = ConfigurationJournal(str(tmp_path), 1000)
+    reloaded.add([make_entry('c.json')])
+
+    assert ConfigurationJournal(str(tmp_path), 1000).get_sorted_filenames('unprocessed') == ['a.json', 'c.json']
+
+
+def test_compaction_keeps_state_and_removes_old_journals(tmp_path):
+    journal = ConfigurationJournal(str(tmp_path), 1000)
+    journal.add([make_entry(f'{i}.json') for i in range(10)])
+    journal.change_status('0.json', 'unprocessed', 'done')
+
+    journal.compact()
+    journal.change_status('1.json', 'unprocessed', 'failed')
+
+    assert sorted(os.listdir(tmp_path)) == [os.path.basename(journal._get_journal_path(journal._generation)),
+                                            ConfigurationJournal.SNAPSHOT_FILENAME]
+    reloaded = ConfigurationJournal(str(tmp_path), 1000)
+    assert reloaded.get_sorted_filenames('done') == ['0.json']
+    assert reloaded.get_sorted_filenames('failed') == ['1.json']
+    assert reloaded.get_sorted_filenames('unprocessed') == [f'{i}.json' for i in range(2, 10)]
+
+
+def test_concurrent_writers_share_fsyncs(tmp_path, monkeypatch):
+    journal = ConfigurationJournal(str(tmp_path), 1000)
+    fsyncs = []
+    fsync = os.fsync
+
+    def slow_fsync(fd):
+        fsyncs.append(fd)
+        threading.Event().wait(0.01)
+        fsync(fd)
+
+    monkeypatch.setattr(os, 'fsync', slow_fsync)
+    barrier = threading.Barrier(16)
+
+    def add(i: int):
+        barrier.wait()
+        journal.add([make_entry(f'{i}.json')])
+
+    threads = [threading.Thread(target=add, args=(i,)) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(journal.get_sorted_filenames('unprocessed')) == 16
+    assert len(fsyncs) < 16
@@ -0,0 +1,49 @@
+import json
+import math
+
+import pytest
+
+from src import app
+from src.repository import TrainingResultsRepository
+from src.utils import json_codec
+from src.utils.utils import encode_cursor
+
+DOCUMENTS = [
+    {"id": 2 ** 64, "negative": -2 ** 63 - 1, "nested": [10 ** 30, 1]},
+    {"max": 2 ** 63 - 1, "min": -2 ** 63, "unsigned": 2 ** 64 - 1},
+    {"not finite": [float('nan'), float('inf'), float('-inf')], "value": None},
+    ["Ant-v2", float('-inf'), 7],
+    {"text": "1234567890123456789012345", "value": 0.5},
+]
+
+
+@pytest.mark.parametrize('document', DOCUMENTS)
+def test_dumps_and_loads_match_standard_library(document):
+    serialized = json_codec.dumps(document)
+    # repr, so NaN compares equal and integers are not equal to floats
+    expected = repr(json.loads(json.dumps(document)))
+
+    assert repr(json.loads(serialized)) == expected
+    assert repr(json_codec.loads(serialized)) == expected
+    assert repr(json_codec.loads(serialized.encode())) == expected
+
+
+def test_non_finite_floats_are_not_written_as_null():
+    values = json.loads(json_codec.dumps([float('nan'), float('inf'), float('-inf'), None]))
+
+    assert math.isnan(values[0])
+    assert values[1:] == [float('inf'), float('-inf'), None]
+
+
+def test_request_bodies_with_non_finite_floats_and_big_integers_are_parsed():
+    body = json_codec.loads(app.json.dumps({"best": float('inf'), "id": 2 ** 70}))
+
+    assert body == {"best": float('inf'), "id": 2 ** 70}
+    assert app.json.loads(b'{"best": Infinity, "id": 1180591620717411303424}') == body
+
+
+@pytest.mark.parametrize('best_mean_result', [float('inf'), float('-inf'), 1.5, 10 ** 20])
+def test_cursors_with_any_best_mean_result_are_decoded(best_mean_result):
+    cursor = encode_cursor(json_codec.dumps(['Ant-v2', best_mean_result, 3]))
+
+    assert TrainingResultsRepository._decode_cursor(cursor) == ('Ant-v2', best_mean_result, 3)
@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+from src import Constants
+from src.configuration_file_gateway import JsonConfigurationFileGateway, ConfigurationFileQuery
+from src.models import ConfigurationFileFactory
+from src.utils import json_codec
+from src.utils.bulk_loader import bulk_loader
+from src.utils.data_validators import ParserFactory
+
+
+def make_configuration_file(environment: str = 'HalfCheetah-v2', experiment_name: str = 'test'):
+    return ConfigurationFileFactory.from_dict(
+        {"algorithm": "acerac", "algorithm_config": {"env_name": environment, "experiment_name": experiment_name}},
+        ParserFactory()
+    )
+
+
+def test_save_many_returns_errors_of_files_which_could_not_be_saved(rl_configurations, monkeypatch):
+    gateway = JsonConfigurationFileGateway()
+    taken_name = JsonConfigurationFileGateway._get_configuration_file_name(make_configuration_file())
+    (rl_configurations / taken_name).write_text('{}')
+    token = gateway.get_changes_token()
+    assert gateway.get_statistics()[Constants.UNPROCESSED_STATUS]['count'] == 1
+
+    get_configuration_file_name = JsonConfigurationFileGateway._get_configuration_file_name
+    monkeypatch.setattr(JsonConfigurationFileGateway, '_get_configuration_file_name', staticmethod(
+        lambda configuration_file: taken_name if configuration_file.get_environment_name() == 'Taken-v2'
+        else get_configuration_file_name(configuration_file)))
+
+    saved, not_saved = gateway.save_many([make_configuration_file(), make_configuration_file('Taken-v2')])
+
+    assert os.path.isfile(rl_configurations / saved['filename'])
+    assert set(not_saved) == {'error'}
+    assert gateway.get_statistics()[Constants.UNPROCESSED_STATUS]['count'] == 2
+    changes, _ = gateway.get_changes(token, 0)
+    assert [change['filename'] for change in changes] == [saved['filename']]
+    assert changes[0]['status'] == Constants.UNPROCESSED_STATUS
+
+
+def get_all_pages(gateway, query: ConfigurationFileQuery):
+    data = []
+    while True:
+        page = gateway.get_configuration_files_data_page(Constants.UNPROCESSED_STATUS, query)
+        data.extend(page.data)
+        if page.next_cursor is None:
+            return data
+        query = query._replace(cursor=page.next_cursor)
+
+
+@pytest.mark.parametrize('indexed', [True, False])
+def test_pages_list_every_matching_file_once(rl_configurations, monkeypatch, indexed):
+    monkeypatch.setattr(Constants, 'RL_CONFIGURATIONS_INDEXED', indexed)
+    gateway = JsonConfigurationFileGateway()
+    gateway.save_many([make_configuration_file(f'Env{i % 3}-v2', f'e{i}') for i in range(25)])
+    # named before sortable ids, so filtered by the loaded data
+    (rl_configurations / 'Env0-v2_acerac_ABC123_01-01-2020_10-00-00.json').write_text(json_codec.dumps(
+        {"algorithm": "acerac", "algorithm_config": {"env_name": "Env0-v2", "experiment_name": "legacy"}}))
+
+    loaded_in_parallel = []
+    bulk_loader_map = bulk_loader.map
+    monkeypatch.setattr(bulk_loader, 'map', lambda load, items: loaded_in_parallel.append(len(items)) or
+                        bulk_loader_map(load, items))
+
+    all_files = get_all_pages(gateway, ConfigurationFileQuery(limit=4))
+    env0_files = get_all_pages(gateway, ConfigurationFileQuery(limit=4, environment='Env0-v2'))
+
+    assert len(all_files) == 26
+    assert len({data['algorithm_config']['experiment_name'] for data in all_files}) == 26
+    assert sorted(data['algorithm_config']['experiment_name'] for data in env0_files) == \
+        sorted(['legacy'] + [f'e{i}' for i in range(0, 25, 3)])
+    assert bool(loaded_in_parallel) == (not indexed)
+    assert max(loaded_in_parallel, default=0) <= 4
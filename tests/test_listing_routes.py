@@ -0,0 +1,110 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src import Constants, db
+from src.commands import get_configuration_file_record
+from src.configuration_file_gateway import ConfigurationFileGatewayFactory
+from src.utils import json_codec
+from tests.test_batch_routes import VALID_CONFIGURATION_FILE
+
+# named before sortable ids ({environment}_{algorithm}_{random id}_{timestamp}) and in no known way
+LEGACY_FILENAMES = ['Env0-v2_acerac_ABC123_01-01-2020_10-00-00.json', 'Env1-v2_acerac_DEF456_01-06-2021_10-00-00.json']
+UNPARSABLE_FILENAME = 'manual-run.json'
+
+
+def count_scheduled(client, headers, **args):
+    response = client.get('/scheduled', headers=headers, query_string=args)
+    assert response.status_code == 200, response.get_json()
+
+    return response.get_json()["Number of scheduled configuration files "]
+
+
+def test_submission_times_with_time_zone_are_compared_with_local_times(client, headers):
+    client.post('/schedule/batch', headers=headers, json=[VALID_CONFIGURATION_FILE])
+    now = datetime.now(timezone.utc)
+
+    assert count_scheduled(client, headers, submitted_after=(now - timedelta(minutes=5)).isoformat()) == 1
+    assert count_scheduled(client, headers, submitted_after=(now + timedelta(minutes=5)).isoformat()) == 0
+    assert count_scheduled(client, headers, submitted_before=(now - timedelta(minutes=5)).isoformat()) == 0
+    assert count_scheduled(client, headers, submitted_after='2020-01-01T00:00:00+00:00') == 1
+
+
+def test_not_valid_submission_times_are_rejected(client, headers):
+    response = client.get('/scheduled', headers=headers, query_string={'submitted_after': 'yesterday'})
+
+    assert response.status_code == 400
+
+
+def get_experiment_names(client, headers, **args):
+    # experiment names of every page of scheduled configuration files
+    experiment_names = []
+    while True:
+        response = client.get('/scheduled', headers=headers, query_string=args)
+        assert response.status_code == 200, response.get_json()
+
+        body = response.get_json()
+        configuration_files = body["Scheduled configuration files "]
+        assert len(configuration_files) <= args.get('limit', len(configuration_files))
+        experiment_names.extend(configuration_file['algorithm_config']['experiment_name']
+                                for configuration_file in configuration_files)
+        if body["Next cursor"] is None:
+            return experiment_names
+        args['cursor'] = body["Next cursor"]
+
+
+@pytest.fixture(params=['json', 'sql'])
+def mixed_filenames(request, client, headers, rl_configurations, monkeypatch):
+    # files with sortable ids scheduled now, files with legacy names submitted in 2020 and 2021, and a file without a
+    # parsable name modified in 2019, listed by the gateway of the param
+    monkeypatch.setattr(Constants, 'CONFIGURATION_FILE_GATEWAY', request.param)
+    # waits for the first count of the new gateway, which would share the connection of the in-memory database
+    ConfigurationFileGatewayFactory.get_default_gateway().get_statistics()
+    response = client.post('/schedule/batch', headers=headers, json=[
+        {**VALID_CONFIGURATION_FILE, "algorithm_config": {**VALID_CONFIGURATION_FILE["algorithm_config"],
+                                                          "experiment_name": f"new{i}"}}
+        for i in range(5)
+    ])
+    assert response.status_code == 201
+
+    modified_at = datetime(2019, 1, 1).timestamp()
+    for filename in LEGACY_FILENAMES + [UNPARSABLE_FILENAME]:
+        data = {"algorithm": "acerac", "algorithm_config": {"env_name": filename[:7], "experiment_name": filename}}
+        if request.param == 'json':
+            (rl_configurations / filename).write_text(json_codec.dumps(data))
+            os.utime(rl_configurations / filename, (modified_at, modified_at))
+        else:
+            db.session.add(get_configuration_file_record(filename, Constants.UNPROCESSED_STATUS, data, modified_at))
+    db.session.commit()
+
+    return request.param
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3])
+def test_pages_of_mixed_filenames_list_every_file_once(client, headers, mixed_filenames, limit):
+    experiment_names = get_experiment_names(client, headers, limit=limit)
+
+    assert sorted(experiment_names) == sorted([f"new{i}" for i in range(5)] + LEGACY_FILENAMES + [UNPARSABLE_FILENAME])
+    if mixed_filenames == 'json':
+        # sortable ids start with digits up to LEGACY_FILENAMES_START, so they come first, in submission order
+        assert experiment_names == [f"new{i}" for i in range(5)] + LEGACY_FILENAMES + [UNPARSABLE_FILENAME]
+
+
+@pytest.mark.parametrize('limit', [None, 1, 2])
+def test_pages_of_mixed_filenames_are_filtered_by_submission_time(client, headers, mixed_filenames, limit):
+    limit_args = {} if limit is None else {'limit': limit}
+    # the JSON gateway does not know when files without parsable names were submitted, the SQL gateway imported them
+    # with their modification time
+    unparsable = [UNPARSABLE_FILENAME] if mixed_filenames == 'sql' else []
+
+    assert sorted(get_experiment_names(client, headers, submitted_before='2022-01-01T00:00:00', **limit_args)) == \
+        sorted(LEGACY_FILENAMES + unparsable)
+    assert sorted(get_experiment_names(client, headers, submitted_before='2020-06-01T00:00:00', **limit_args)) == \
+        sorted(LEGACY_FILENAMES[:1] + unparsable)
+    assert sorted(get_experiment_names(client, headers, submitted_after='2021-01-01T00:00:00', **limit_args)) == \
+        sorted([f"new{i}" for i in range(5)] + LEGACY_FILENAMES[1:])
+    assert get_experiment_names(client, headers, submitted_after='2020-06-01T00:00:00',
+                                submitted_before='2022-01-01T00:00:00', **limit_args) == LEGACY_FILENAMES[1:]
+    assert get_experiment_names(client, headers, submitted_after='2018-01-01T00:00:00',
+                                submitted_before='2019-06-01T00:00:00', **limit_args) == unparsable
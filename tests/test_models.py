@@ -0,0 +1,72 @@
+from datetime import datetime
+
+import pytest
+
+from src.exceptions import NotValidAlgorithmConfigException
+from src.models import ConfigurationFileFactory
+from src.utils.data_validators import ParserFactory, CompiledParserValidator
+
+
+def test_identical_configs_without_experiment_name_hit_validation_cache():
+    ParserFactory.validation_cache.clear()
+    data = {"algorithm": "acerac", "algorithm_config": {"env_name": "HalfCheetah-v2", "n_step": 2}}
+
+    first = ConfigurationFileFactory.from_dict(data, ParserFactory())
+    second = ConfigurationFileFactory.from_dict(data, ParserFactory())
+
+    assert ParserFactory.validation_cache.stats()['misses'] == 1
+    assert ParserFactory.validation_cache.stats()['hits'] == 1
+    assert first.algorithm_config['experiment_name'] != second.algorithm_config['experiment_name']
+    assert "experiment_name" not in data["algorithm_config"]
+
+
+@pytest.fixture
+def validated_configs(monkeypatch):
+    # algorithm configs passed to CompiledParserValidator.validate
+    validated = []
+    validate = CompiledParserValidator.validate
+    monkeypatch.setattr(CompiledParserValidator, 'validate',
+                        lambda self, config: validated.append(dict(config)) or validate(self, config))
+
+    return validated
+
+
+def make_stored_dict():
+    data = {"algorithm": "acerac", "algorithm_config": {"env_name": "HalfCheetah-v2", "gamma": 0.9}}
+
+    return ConfigurationFileFactory.from_dict(data, ParserFactory()).to_stored_dict(datetime(2026, 1, 1))
+
+
+def test_unchanged_stored_configs_are_not_validated_again(validated_configs):
+    stored_data = make_stored_dict()
+    validated_configs.clear()
+
+    configuration_file = ConfigurationFileFactory.from_stored_dict(stored_data, ParserFactory())
+
+    assert validated_configs == []
+    assert configuration_file.algorithm_config["gamma"] == 0.9
+
+
+@pytest.mark.parametrize('change', [
+    lambda stored_data: stored_data["algorithm_config"].update(gamma=0.5),
+    lambda stored_data: stored_data["metadata"].update(schema_version='parser definitions of an older version'),
+    lambda stored_data: stored_data["metadata"].update(checksum=None),
+    lambda stored_data: stored_data.pop("metadata"),
+])
+def test_changed_stored_configs_are_validated_again(validated_configs, change):
+    stored_data = make_stored_dict()
+    change(stored_data)
+    validated_configs.clear()
+
+    configuration_file = ConfigurationFileFactory.from_stored_dict(stored_data, ParserFactory())
+
+    assert validated_configs[0] == stored_data["algorithm_config"]
+    assert configuration_file.algorithm_config == stored_data["algorithm_config"]
+
+
+def test_not_valid_changed_stored_configs_are_rejected():
+    stored_data = make_stored_dict()
+    stored_data["algorithm_config"]["gamma"] = "not a number"
+
+    with pytest.raises(NotValidAlgorithmConfigException):
+        ConfigurationFileFactory.from_stored_dict(stored_data, ParserFactory())
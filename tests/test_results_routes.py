@@ -0,0 +1,271 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from src import Constants, db
+from src.models import Algorithm, TrainingResults
+from src.repository import TrainingResultsRepository
+from src.utils.leaderboard import Leaderboard
+from src.utils.utils import encode_cursor
+
+
+def make_result(best_mean_result: float, environment: str = 'HalfCheetah-v2', algorithm: str = 'acerac',
+                date: str = '2026-01-01T10:00:00'):
+    return {
+        "best_mean_result": best_mean_result,
+        "results_subdirectory": f"results/{best_mean_result}",
+        "environment": environment,
+        "configuration": {"env_name": environment},
+        "algorithm": algorithm,
+        "date": date
+    }
+
+
+def add_results(client, headers, results):
+    response = client.post('/results/batch', headers=headers, json=results)
+    assert response.status_code == 201
+
+    return response.get_json()
+
+
+def test_etag_changes_with_every_insert_of_the_same_second(client, headers):
+    add_results(client, headers, [make_result(1.0)])
+    first = client.get('/results', headers=headers)
+    assert client.get('/results', headers={**headers, 'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    add_results(client, headers, [make_result(2.0)])
+    second = client.get('/results', headers={**headers, 'If-None-Match': first.headers['ETag'],
+                                             'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'})
+
+    assert second.status_code == 200
+    assert len(second.get_json()["All results"]) == 2
+    assert second.headers['ETag'] != first.headers['ETag']
+
+
+def test_result_committed_after_a_higher_result_id_is_served(client, headers, database):
+    add_results(client, headers, [make_result(1.0), make_result(2.0), make_result(3.0)])
+    database.session.execute(TrainingResults.__table__.delete().where(TrainingResults.result_id == 2))
+    database.session.commit()
+
+    first = client.get('/results', headers=headers)
+    leaderboard = client.get('/results/leaderboard', headers=headers)
+    assert len(first.get_json()["All results"]) == 2
+
+    # as if the transaction inserting result 2 committed last
+    database.session.execute(TrainingResults.__table__.insert(), [{
+        'result_id': 2, 'best_mean_result': 5.0, 'results_subdirectory': 'results/late', 'environment': 'Ant-v2',
+        'algorithm_config': '{}', 'date': datetime(2025, 1, 1), 'algorithm': 1
+    }])
+    database.session.commit()
+
+    second = client.get('/results', headers={**headers, 'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    assert len(second.get_json()["All results"]) == 3
+
+    second_leaderboard = client.get('/results/leaderboard', headers={**headers,
+                                                                     'If-None-Match': leaderboard.headers['ETag']})
+    assert second_leaderboard.status_code == 200
+    assert second_leaderboard.get_json()["Leaderboard"][0]["results_subdirectory"] == 'results/late'
+
+
+def test_batch_rejects_only_not_valid_results(client, headers):
+    response = add_results(client, headers, [
+        make_result(1.0), 'not a result', make_result(2.0, algorithm=['acerac']), make_result(3.0, algorithm='other'),
+        {**make_result(4.0), 'best_mean_result': float('nan')}, make_result(5.0)
+    ])
+
+    assert response["Number of added results"] == 2
+    assert ['result_id' in result for result in response["Results"]] == [True, False, False, False, False, True]
+    assert len(client.get('/results', headers=headers).get_json()["All results"]) == 2
+
+
+def test_batch_returns_result_ids_in_the_order_of_the_results(client, headers, database):
+    values = [7.0, 3.0, 9.0, 1.0, 5.0] * 40
+    results = [make_result(value, environment) for value, environment in
+               zip(values, ['Ant-v2', 'Hopper-v2', 'Ant-v2', 'Walker2d-v2'] * 50)]
+    results.insert(3, 'not a result')
+
+    response = add_results(client, headers, results)
+
+    result_ids = [result['result_id'] for result in response["Results"] if 'result_id' in result]
+    assert 'error' in response["Results"][3]
+    assert [database.session.get(TrainingResults, result_id).best_mean_result for result_id in result_ids] == values
+
+
+def test_batch_larger_than_the_maximum_size_is_rejected(client, headers):
+    response = client.post('/results/batch', headers=headers,
+                           json=[make_result(1.0)] * (Constants.RESULTS_BATCH_MAX_SIZE + 1))
+
+    assert response.status_code == 413
+    assert response.get_json() == {
+        'Message': f"Batch can not contain more than {Constants.RESULTS_BATCH_MAX_SIZE} results"}
+    assert client.get('/results', headers=headers).get_json()["All results"] == []
+    assert add_results(client, headers, [make_result(1.0)] * 3)["Number of added results"] == 3
+
+
+def test_batch_accepts_algorithms_added_after_the_ids_were_loaded(client, headers, database):
+    add_results(client, headers, [make_result(1.0)])
+    database.session.add(Algorithm(name='new-algorithm'))
+    database.session.commit()
+
+    response = add_results(client, headers, [make_result(2.0, algorithm='new-algorithm')])
+
+    assert 'result_id' in response["Results"][0]
+
+
+def test_insert_many_inserts_nothing_if_a_result_fails(database):
+    valid_result = {'best_mean_result': 1.0, 'results_subdirectory': 'results/1', 'environment': 'Ant-v2',
+                    'algorithm_config': '{}', 'date': datetime(2026, 1, 1), 'algorithm': 1}
+
+    with pytest.raises(IntegrityError):
+        TrainingResultsRepository.insert_many([valid_result, {**valid_result, 'results_subdirectory': None}])
+
+    assert TrainingResultsRepository.get_all_results() == []
+    assert len(TrainingResultsRepository.insert_many([valid_result])) == 1
+
+
+def make_rows(result_ids, best_mean_result):
+    return [{'result_id': result_id, 'best_mean_result': best_mean_result(result_id),
+             'results_subdirectory': f'results/{result_id}', 'environment': 'Ant-v2', 'algorithm_config': '{}',
+             'date': datetime(2026, 1, 1), 'algorithm': 1} for result_id in result_ids]
+
+
+def test_leaderboard_includes_batches_committed_out_of_result_id_order(database, monkeypatch):
+    monkeypatch.setattr(TrainingResultsRepository, 'leaderboard', Leaderboard(Constants.LEADERBOARD_SIZE, 0))
+    batch_size = Constants.RESULTS_BATCH_MAX_SIZE
+
+    # batch B got higher result_ids, but committed before batch A
+    TrainingResultsRepository.insert_many(make_rows(range(batch_size + 1, 2 * batch_size + 1), lambda i: 1.0))
+    assert len(TrainingResultsRepository.get_leaderboard(None, None, 10)) == 10
+    TrainingResultsRepository.insert_many(make_rows(range(1, batch_size + 1), lambda i: 2.0 + i))
+
+    leaderboard = TrainingResultsRepository.get_leaderboard('Ant-v2', None, 3)
+
+    assert [result.result_id for result in leaderboard] == [batch_size, batch_size - 1, batch_size - 2]
+
+
+def test_batch_committed_below_the_highest_result_id_changes_the_etag(client, headers):
+    TrainingResultsRepository.insert_many(make_rows(range(1001, 2001), lambda i: 1.0))
+    first = client.get('/results', headers=headers)
+    first_leaderboard = client.get('/results/leaderboard', headers=headers, query_string={'limit': 1})
+
+    TrainingResultsRepository.insert_many(make_rows(range(1, 1001), lambda i: 2.0))
+
+    second = client.get('/results', headers={**headers, 'If-None-Match': first.headers['ETag']})
+    second_leaderboard = client.get('/results/leaderboard', query_string={'limit': 1}, headers={
+        **headers, 'If-None-Match': first_leaderboard.headers['ETag']})
+
+    assert second.status_code == 200
+    assert len(second.get_json()["All results"]) == 2000
+    assert second_leaderboard.status_code == 200
+    assert second_leaderboard.get_json()["Leaderboard"][0]["best_mean_result"] == 2.0
+
+
+def get_aggregates(client, headers, **args):
+    response = client.get('/results/aggregate', headers=headers, query_string=args)
+    assert response.status_code == 200, response.get_json()
+
+    return response.get_json()["Groups"]
+
+
+def test_aggregate_percentiles_interpolate_like_percentile_cont(client, headers):
+    add_results(client, headers, [make_result(value, 'Ant-v2') for value in (4.0, 1.0, 3.0, 2.0)] +
+                [make_result(5.0, 'Hopper-v2')])
+
+    ant, hopper = get_aggregates(client, headers, group_by='environment', percentile=[0, 25, 50, 90, 100])
+
+    # percentile_cont(p) interpolates linearly at position p * (n - 1) of the sorted values
+    assert ant == {"environment": 'Ant-v2', "count": 4, "mean": 2.5, "max": 4.0, "min": 1.0,
+                   "percentiles": {"0": 1.0, "25": 1.75, "50": 2.5, "90": pytest.approx(3.7), "100": 4.0}}
+    assert hopper["percentiles"] == {"0": 5.0, "25": 5.0, "50": 5.0, "90": 5.0, "100": 5.0}
+
+
+@pytest.mark.parametrize('date_bucket, expected_dates, expected_counts', [
+    ('hour', ['Sun, 04 Jan 2026 23:00:00 GMT', 'Mon, 05 Jan 2026 00:00:00 GMT', 'Sun, 11 Jan 2026 12:00:00 GMT',
+              'Sun, 01 Feb 2026 00:00:00 GMT'], [1, 1, 2, 1]),
+    ('day', ['Sun, 04 Jan 2026 00:00:00 GMT', 'Mon, 05 Jan 2026 00:00:00 GMT', 'Sun, 11 Jan 2026 00:00:00 GMT',
+             'Sun, 01 Feb 2026 00:00:00 GMT'], [1, 1, 2, 1]),
+    # weeks start on Monday
+    ('week', ['Mon, 29 Dec 2025 00:00:00 GMT', 'Mon, 05 Jan 2026 00:00:00 GMT', 'Mon, 26 Jan 2026 00:00:00 GMT'],
+     [1, 3, 1]),
+    ('month', ['Thu, 01 Jan 2026 00:00:00 GMT', 'Sun, 01 Feb 2026 00:00:00 GMT'], [4, 1]),
+    ('year', ['Thu, 01 Jan 2026 00:00:00 GMT'], [5]),
+])
+def test_aggregate_dates_are_truncated_to_the_start_of_the_bucket(client, headers, date_bucket, expected_dates,
+                                                                 expected_counts):
+    add_results(client, headers, [
+        make_result(1.0, date='2026-01-04T23:59:59'),
+        make_result(2.0, date='2026-01-05T00:00:00'),
+        make_result(3.0, date='2026-01-11T12:30:00'),
+        make_result(4.0, date='2026-01-11T12:45:00'),
+        make_result(5.0, date='2026-02-01T00:00:00+00:00')
+    ])
+
+    groups = get_aggregates(client, headers, group_by='date', date_bucket=date_bucket, percentile=50)
+
+    assert [group["date"] for group in groups] == expected_dates
+    assert [group["count"] for group in groups] == expected_counts
+    assert sum(group["mean"] * group["count"] for group in groups) == 15.0
+
+
+def get_result_pages(client, headers, path, key, **args):
+    # results of every page of a /results route, and the number of pages
+    results = []
+    pages = 0
+    while True:
+        response = client.get(path, headers=headers, query_string=args)
+        assert response.status_code == 200, response.get_json()
+
+        results.extend(response.get_json()[key])
+        pages += 1
+        if response.get_json()["Next cursor"] is None:
+            return results, pages
+        args['after'] = response.get_json()["Next cursor"]
+
+
+@pytest.mark.parametrize('path, key', [
+    ('/results', "All results"),
+    ('/results/environment/Ant-v2', "Results for Ant-v2 environment"),
+    ('/results/algorithm/acerac', "Results for acerac algorithm")
+])
+def test_result_pages_list_every_result_once_in_order(client, headers, path, key):
+    # ties of best_mean_result are ordered by result_id, within and across pages
+    add_results(client, headers, [make_result(value, environment, algorithm) for value, environment, algorithm in
+                                  zip([2.0, 1.0, 2.0, 3.0, 2.0, 1.0, 2.0] * 3, ['Ant-v2', 'Hopper-v2'] * 11,
+                                      ['acerac', 'acer', 'acerac'] * 7)])
+    all_results = client.get(path, headers=headers).get_json()[key]
+
+    results, pages = get_result_pages(client, headers, path, key, limit=2)
+
+    assert results == all_results
+    assert pages == (len(all_results) + 1) // 2
+    keys = [(result["environment"], result["best_mean_result"], result["result_id"]) for result in results]
+    assert keys == sorted(keys, reverse=True)
+
+
+@pytest.mark.parametrize('args', [{'after': 'not a cursor'}, {'after': encode_cursor('[1, 2, 3]')}, {'limit': 0},
+                                  {'limit': Constants.RESULTS_MAX_PAGE_SIZE + 1}])
+def test_not_valid_result_pages_are_rejected(client, headers, args):
+    assert client.get('/results', headers=headers, query_string=args).status_code == 400
+
+
+@pytest.mark.parametrize('environment, algorithm, index', [
+    (None, None, 'ix_training_results_environment_best_mean_result'),
+    ('Ant-v2', None, 'ix_training_results_environment_best_mean_result'),
+    (None, 1, 'ix_training_results_algorithm_environment_best_mean_result'),
+])
+def test_result_pages_are_read_in_index_order(database, environment, algorithm, index):
+    after = encode_cursor('["Ant-v2", 1.0, 5]')
+    if environment is not None:
+        query = TrainingResultsRepository._get_results_for_environment_query(environment, after)
+    elif algorithm is not None:
+        query = TrainingResultsRepository._get_results_for_algorithm_query(algorithm, after)
+    else:
+        query = TrainingResultsRepository._get_all_results_query(after)
+    statement = query.limit(10).statement.compile(database.engine, compile_kwargs={'literal_binds': True})
+
+    plan = " ".join(str(row[-1]) for row in database.session.execute(db.text(f"EXPLAIN QUERY PLAN {statement}")))
+
+    assert index in plan
+    assert 'TEMP B-TREE' not in plan
@@ -0,0 +1,40 @@
+from src import Constants, db
+from src.configuration_file_gateway import SqlConfigurationFileGateway
+from src.models import ConfigurationFileRecord
+from tests.test_json_configuration_file_gateway import make_configuration_file
+
+
+def take_names(monkeypatch, taken_names):
+    # the next generated filenames are taken_names, the following ones are generated as usual
+    get_configuration_file_name = SqlConfigurationFileGateway._get_configuration_file_name
+    taken_names = list(taken_names)
+    monkeypatch.setattr(SqlConfigurationFileGateway, '_get_configuration_file_name', staticmethod(
+        lambda configuration_file: taken_names.pop(0) if taken_names
+        else get_configuration_file_name(configuration_file)))
+
+
+def test_save_many_retries_with_new_ids_if_an_id_is_taken(database, monkeypatch):
+    gateway = SqlConfigurationFileGateway()
+    taken_name = gateway.save(make_configuration_file())['filename']
+    take_names(monkeypatch, [taken_name])
+
+    saved = gateway.save_many([make_configuration_file(experiment_name='a'), make_configuration_file('Ant-v2', 'b')])
+
+    assert taken_name not in [item['filename'] for item in saved]
+    assert sorted(db.session.scalars(db.select(ConfigurationFileRecord.filename))) == \
+        sorted([taken_name] + [item['filename'] for item in saved])
+    assert gateway.get_statistics()[Constants.UNPROCESSED_STATUS]['count'] == 3
+
+
+def test_save_many_returns_errors_if_ids_stay_taken(database, monkeypatch):
+    gateway = SqlConfigurationFileGateway()
+    taken_name = gateway.save(make_configuration_file())['filename']
+    take_names(monkeypatch, [taken_name] * Constants.CONFIGURATION_FILE_NAME_ATTEMPTS)
+
+    not_saved = gateway.save_many([make_configuration_file(experiment_name='a')])
+
+    assert [set(item) for item in not_saved] == [{'error'}]
+    assert gateway.get_statistics()[Constants.UNPROCESSED_STATUS]['count'] == 1
+    # the session was rolled back, so it can be used again
+    assert gateway.save(make_configuration_file(experiment_name='b'))['filename'] != taken_name
+    assert db.session.scalar(db.select(db.func.count()).select_from(ConfigurationFileRecord)) == 2
@@ -0,0 +1,71 @@
+import threading
+from collections import Counter
+
+from src import Constants
+from src.utils.statistics import ConfigurationFileStatistics
+
+COUNTERS = Counter({(Constants.UNPROCESSED_STATUS, 'acerac', 'HalfCheetah-v2'): 3})
+
+
+def get_unprocessed_count(statistics: dict) -> int:
+    return statistics[Constants.UNPROCESSED_STATUS]['count']
+
+
+def test_requests_made_during_first_count_wait_for_it():
+    statistics = ConfigurationFileStatistics(60)
+    counting = threading.Event()
+    counted = threading.Event()
+
+    def count_configuration_files():
+        counting.set()
+        counted.wait(5)
+        return COUNTERS
+
+    statistics.start_reconciliation(count_configuration_files)
+    assert counting.wait(5)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(statistics.get_statistics(count_configuration_files)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    threads[0].join(0.1)
+    assert results == []
+
+    counted.set()
+    for thread in threads:
+        thread.join()
+
+    assert [get_unprocessed_count(result) for result in results] == [3] * 4
+
+
+def test_invalidated_counters_are_returned_while_recounting():
+    statistics = ConfigurationFileStatistics(60)
+    statistics.get_statistics(lambda: COUNTERS)
+    statistics.add(Constants.UNPROCESSED_STATUS, 'acerac', 'HalfCheetah-v2')
+    statistics.invalidate()
+
+    recounted = threading.Event()
+    release = threading.Event()
+
+    def count_configuration_files():
+        release.wait(5)
+        recounted.set()
+        return COUNTERS
+
+    assert get_unprocessed_count(statistics.get_statistics(count_configuration_files)) == 4
+
+    release.set()
+    assert recounted.wait(5)
+    assert get_unprocessed_count(statistics.get_statistics(count_configuration_files)) in {3, 4}
+
+
+def test_failed_first_count_is_retried_by_next_request():
+    statistics = ConfigurationFileStatistics(60)
+
+    def failing_count():
+        raise OSError("not mounted yet")
+
+    statistics.start_reconciliation(failing_count)
+
+    assert get_unprocessed_count(statistics.get_statistics(lambda: COUNTERS)) == 3
@@ -0,0 +1,71 @@
+import pytest
+
+from src import Constants
+from src.exceptions import NotValidSweepException
+from src.sweep import SweepExpander
+from src.utils.data_validators import ParserFactory
+
+BASE_CONFIG = {"env_name": "HalfCheetah-v2", "experiment_name": "sweep"}
+
+
+def make_sweep_expander(sweep, **kwargs):
+    return SweepExpander('acerac', BASE_CONFIG, sweep, ParserFactory(), **kwargs)
+
+
+def test_grid_sweep_expands_to_every_combination():
+    sweep_expander = make_sweep_expander({"n_step": [1, 2], "gamma": {"min": 0.9, "max": 0.99, "num": 3}})
+
+    configs = [configuration_file.algorithm_config for configuration_file in sweep_expander.expand()]
+
+    assert len(configs) == 6
+    assert {(config["n_step"], round(config["gamma"], 6)) for config in configs} == \
+        {(n_step, gamma) for n_step in (1, 2) for gamma in (0.9, 0.945, 0.99)}
+
+
+def test_random_sweep_is_reproducible_with_seed():
+    sweep = {"n_step": {"min": 1, "max": 10}, "gamma": {"min": 0.9, "max": 0.99, "log": True}}
+
+    first = [c.algorithm_config for c in make_sweep_expander(sweep, mode='random', samples=5, seed=7).expand()]
+    second = [c.algorithm_config for c in make_sweep_expander(sweep, mode='random', samples=5, seed=7).expand()]
+
+    assert first == second
+    assert all(1 <= config["n_step"] <= 10 for config in first)
+
+
+@pytest.mark.parametrize('log', [False, True])
+def test_integer_grid_values_are_not_rounded_out_of_range(log):
+    sweep_expander = make_sweep_expander({"n_step": {"min": 1.4, "max": 3.6, "num": 3, "log": log}})
+
+    assert sorted(configuration_file.algorithm_config["n_step"] for configuration_file in sweep_expander.expand()) == \
+        [2, 3]
+
+
+def test_random_integer_values_are_not_rounded_out_of_range():
+    sweep = {"n_step": {"min": 1.4, "max": 3.6, "log": True}}
+
+    configs = [c.algorithm_config for c in make_sweep_expander(sweep, mode='random', samples=50, seed=3).expand()]
+
+    assert {config["n_step"] for config in configs} == {2, 3}
+
+
+@pytest.mark.parametrize('sweep, kwargs', [
+    ({"n_step": {"min": 1.2, "max": 1.8}}, {'mode': 'random', 'samples': 3}),
+    ({"n_step": {"min": 1.2, "max": 1.8, "num": 2}}, {}),
+    ({"n_step": [1, 2]}, {'mode': 'random', 'samples': 3, 'seed': [1]}),
+    ({"n_step": [1, 2]}, {'mode': 'random', 'samples': True}),
+    ({"gamma": {"min": 0.9, "max": 0.99, "num": Constants.SWEEP_MAX_CONFIGURATIONS + 1}}, {}),
+    ({"gamma": {"min": 0.9, "max": 0.99, "num": 3_000_000_000}}, {}),
+])
+def test_not_valid_sweeps_are_rejected(sweep, kwargs):
+    with pytest.raises(NotValidSweepException):
+        make_sweep_expander(sweep, **kwargs)
+
+
+def test_schedule_sweep_rejects_not_valid_seed(client, headers):
+    response = client.post('/schedule/sweep', headers=headers, json={
+        "algorithm": "acerac", "algorithm_config": BASE_CONFIG, "sweep": {"n_step": [1, 2]},
+        "mode": "random", "samples": 2, "seed": [1]
+    })
+
+    assert response.status_code == 418
+    assert response.get_json() == {'Message': "seed must be an integer"}